@@ -2,80 +2,407 @@
 Module: ai_agent.py
 Description: Self-Healing AI with Industry Classification
 """
-import google.generativeai as genai
-import os
-import streamlit as st
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import config
+import metrics
+from cache import DiskCache, LRUCache, TieredCache, MISS
 
 # --- 1. CONFIGURATION ---
+# The Gemini SDK is slow to import and configure, so both happen on first
+# use; importing this module (e.g. in a batch worker) costs almost nothing.
+
+_genai = None
+_configured = None   # None until the first AI call tries to configure
+_config_lock = threading.Lock()
+
+def _sdk():
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        _genai = genai
+    return _genai
+
 def configure_gemini():
-    api_key = st.secrets.get("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY")
+    api_key = config.get("GEMINI_API_KEY")
     if not api_key: return False
     try:
-        genai.configure(api_key=api_key)
+        _sdk().configure(api_key=api_key)
         return True
     except:
         return False
 
-is_configured = configure_gemini()
+def is_configured():
+    global _configured
+    if _configured is None:
+        with _config_lock:
+            if _configured is None:
+                _configured = configure_gemini()
+    return _configured
 
 # --- 2. DYNAMIC MODEL FINDER ---
-def get_working_model():
-    if not is_configured: return None
-    try:
-        for m in genai.list_models():
-            if 'generateContent' in m.supported_generation_methods and 'gemini' in m.name.lower():
-                return genai.GenerativeModel(m.name)
-        return genai.GenerativeModel('models/gemini-pro')
-    except: return None
+# list_models() is a network round trip, so the resolved model is cached
+# process-wide (shared by every Streamlit session) and re-resolved hourly.
+
+MODEL_REFRESH_SECONDS = config.get_int("GEMINI_MODEL_REFRESH", 3600)
+
+_model = None
+_model_resolved_at = 0.0
+_model_lock = threading.Lock()
+
+def _resolve_model():
+    genai = _sdk()
+    for m in genai.list_models():
+        if 'generateContent' in m.supported_generation_methods and 'gemini' in m.name.lower():
+            return genai.GenerativeModel(m.name)
+    return genai.GenerativeModel('models/gemini-pro')
+
+def get_working_model(force_refresh=False):
+    global _model, _model_resolved_at
+    if not is_configured(): return None
+    if _model is not None and not force_refresh and time.monotonic() - _model_resolved_at < MODEL_REFRESH_SECONDS:
+        return _model
+    with _model_lock:
+        # Another thread may have refreshed while we waited for the lock
+        if _model is None or force_refresh or time.monotonic() - _model_resolved_at >= MODEL_REFRESH_SECONDS:
+            try:
+                _model = _resolve_model()
+                _model_resolved_at = time.monotonic()
+            except:
+                # Keep serving the last good model if the refresh fails
+                if _model is None: return None
+        return _model
+
+def warm_up():
+    """Resolve the model ahead of the first AI action (call once at app start)."""
+    return get_working_model() is not None
+
+# --- 3. RESPONSE CACHE ---
+# Content-addressed: the key is a hash of model name + prompt, so identical
+# inputs never hit Gemini twice while the entry is fresh.
+
+INDUSTRY_TTL = 30 * 86400   # A business rarely changes industry
+NARRATIVE_TTL = 86400
+SEO_FIXES_TTL = 86400
 
-# --- 3. INTELLIGENCE FUNCTIONS ---
+AI_CACHE = TieredCache(LRUCache(max_entries=512), DiskCache("gemini", ttl=NARRATIVE_TTL))
 
-def identify_industry(business_name):
+# Last narrative per target: {"digest", "text"}. Kept until the audit inputs
+# change (not just for NARRATIVE_TTL), so re-audits of a site that did not
+# move reuse it even after the prompt cache expired or the model rotated.
+NARRATIVE_STORE = DiskCache("narratives", ttl=config.get_int("NARRATIVE_STORE_TTL", 90 * 86400))
+
+class EmptyResponseError(ValueError):
+    """Gemini answered with no text (e.g. every candidate was safety-blocked). Never cached."""
+
+def _cache_key(model, prompt):
+    return hashlib.sha256(f"{model.model_name}\n{prompt}".encode("utf-8")).hexdigest()
+
+def _call(model, prompt, op):
+    with metrics.span("gemini", op=op):
+        text = model.generate_content(prompt).text
+    if not text:
+        raise EmptyResponseError("Gemini returned no text")
+    return text
+
+def _generate(model, prompt, ttl, use_cache=True, op="generate"):
     """
-    New Feature: Asks AI to categorize the business name into a searchable industry string.
-    Example: "Solaire Resort North" -> "Casino Hotel"
+    Returns the response text for prompt. use_cache=False forces a fresh
+    generation (which then replaces the cached one). Raises on API errors
+    and on empty answers, so neither is cached. `op` labels the call in the metrics.
     """
-    model = get_working_model()
-    if not model: return business_name.split(' ')[-1] # Fallback to old "dumb" logic
+    key = _cache_key(model, prompt)
+    if not use_cache:
+        text = _call(model, prompt, op)
+        AI_CACHE.set(key, text, ttl)
+        return text
+    hit = True
+
+    def load():
+        nonlocal hit
+        hit = False
+        return _call(model, prompt, op)
 
-    prompt = f"""
+    text = AI_CACHE.get_or_set(key, load, ttl)
+    metrics.count_cache("gemini", hit)
+    return text
+
+def _generate_stream(model, prompt, ttl, use_cache=True, op="generate"):
+    """
+    Same as _generate() but yields text chunks as Gemini produces them.
+    A cached answer comes back as one chunk. The full text is cached only
+    once the stream completes, so an abandoned stream leaves no partial entry;
+    a stream that produced no text raises EmptyResponseError instead.
+    """
+    key = _cache_key(model, prompt)
+    if use_cache:
+        cached = AI_CACHE.get(key)
+        metrics.count_cache("gemini", bool(cached) and cached is not MISS)
+        if cached and cached is not MISS:
+            yield cached
+            return
+    parts = []
+    start = time.perf_counter()
+    with metrics.span("gemini_stream", op=op):
+        for chunk in model.generate_content(prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:
+                continue  # Chunk without text parts (e.g. safety metadata only)
+            if text:
+                if not parts:
+                    metrics.REGISTRY.observe("recon_span_seconds", time.perf_counter() - start, span="gemini_first_chunk", op=op)
+                parts.append(text)
+                yield text
+    if not parts:
+        raise EmptyResponseError("Gemini returned no text")
+    AI_CACHE.set(key, "".join(parts), ttl)
+
+# --- 4. INTELLIGENCE FUNCTIONS ---
+
+def _industry_prompt(business_name):
+    return f"""
     Identify the specific market industry for the business "{business_name}".
     Reply with ONLY the 2-3 word industry category. Do not add punctuation.
     Example Input: Jollibee -> Example Output: Fast Food Restaurant
     Example Input: Accenture -> Example Output: IT Consulting
     """
+
+def _identify_one(model, business_name, use_cache=True):
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        return _generate(model, _industry_prompt(business_name), INDUSTRY_TTL, use_cache, op="industry").strip()
     except:
         return business_name  # Fail safe
 
-def generate_audit_narrative(business_name, url, score, ssl, ports, seo, tech):
-    model = get_working_model()
-    if not model: return "AI Unavailable."
-    
-    prompt = f"""
+def identify_industry(business_name, use_cache=True):
+    """
+    New Feature: Asks AI to categorize the business name into a searchable industry string.
+    Example: "Solaire Resort North" -> "Casino Hotel"
+    """
+    return identify_industries([business_name], use_cache)[business_name]
+
+def _narrative_prompt(business_name, url, score, ssl, ports, seo, tech):
+    return f"""
     You are a Senior Cyber Security Strategist.
     Write a 3-paragraph executive summary for '{business_name}' ({url}).
     
-    DATA: Score: {score}/100, SSL: {ssl}, SEO: {seo}
+    DATA: Score: {score}/100, SSL: {ssl}, Ports: {ports}, SEO: {seo}, Tech: {tech}
     TONE: Urgent but professional.
     """
+
+def _seo_fixes_prompt(url, current_title, current_desc, industry, location):
+    return f"""
+    Act as an SEO Expert. Rewrite meta tags for {url} ({industry} in {location}).
+    CURRENT: Title: {current_title}, Desc: {current_desc}
+    Provide 3 better options.
+    """
+
+def _narrative_key(business_name, url):
+    return f"{' '.join((business_name or '').lower().split())}|{url}"
+
+def _stored_narrative(key, prompt):
+    # The prompt carries every narrative input, so its hash is the digest
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    stored = NARRATIVE_STORE.get(key)
+    fresh = stored is not MISS and stored["digest"] == digest and bool(stored["text"])
+    metrics.count_cache("narrative_store", fresh)
+    return digest, stored["text"] if fresh else None
+
+def generate_audit_narrative(business_name, url, score, ssl, ports, seo, tech, use_cache=True):
+    prompt = _narrative_prompt(business_name, url, score, ssl, ports, seo, tech)
+    key = _narrative_key(business_name, url)
+    digest, text = _stored_narrative(key, prompt)
+    if use_cache and text is not None:
+        return text
+    model = get_working_model()
+    if not model: return "AI Unavailable."
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        text = _generate(model, prompt, NARRATIVE_TTL, use_cache, op="narrative")
     except Exception as e: return f"Error: {e}"
+    if text:
+        NARRATIVE_STORE.set(key, {"digest": digest, "text": text})
+    return text
 
-def generate_seo_fixes(url, current_title, current_desc, industry, location):
+def generate_seo_fixes(url, current_title, current_desc, industry, location, use_cache=True):
     model = get_working_model()
     if not model: return "AI Unavailable."
-    
-    prompt = f"""
-    Act as an SEO Expert. Rewrite meta tags for {url} ({industry} in {location}).
-    CURRENT: Title: {current_title}, Desc: {current_desc}
-    Provide 3 better options.
+    try:
+        return _generate(model, _seo_fixes_prompt(url, current_title, current_desc, industry, location), SEO_FIXES_TTL, use_cache, op="seo_fixes")
+    except Exception as e: return f"Error: {e}"
+
+def _stream_or_error(prompt, ttl, use_cache, op):
+    model = get_working_model()
+    if not model:
+        yield "AI Unavailable."
+        return
+    try:
+        yield from _generate_stream(model, prompt, ttl, use_cache, op)
+    except Exception as e:
+        yield f"Error: {e}"
+
+def stream_audit_narrative(business_name, url, score, ssl, ports, seo, tech, use_cache=True):
+    """Streaming generate_audit_narrative(): yields text chunks (for st.write_stream)."""
+    prompt = _narrative_prompt(business_name, url, score, ssl, ports, seo, tech)
+    key = _narrative_key(business_name, url)
+    digest, text = _stored_narrative(key, prompt)
+    if use_cache and text is not None:
+        yield text
+        return
+    model = get_working_model()
+    if not model:
+        yield "AI Unavailable."
+        return
+    parts = []
+    try:
+        for chunk in _generate_stream(model, prompt, NARRATIVE_TTL, use_cache, "narrative"):
+            parts.append(chunk)
+            yield chunk
+    except Exception as e:
+        yield f"Error: {e}"
+        return
+    text = "".join(parts)
+    if text:
+        NARRATIVE_STORE.set(key, {"digest": digest, "text": text})
+
+def stream_seo_fixes(url, current_title, current_desc, industry, location, use_cache=True):
+    """Streaming generate_seo_fixes()."""
+    return _stream_or_error(_seo_fixes_prompt(url, current_title, current_desc, industry, location), SEO_FIXES_TTL, use_cache, "seo_fixes")
+
+# --- 5. BATCH INDUSTRY CLASSIFICATION ---
+# Bulk runs pack many names into one prompt. Each answer is stored under the
+# same cache key a single identify_industry() call would use, so the two
+# paths share hits.
+
+BATCH_MAX_NAMES = 80          # Keeps the JSON answer well inside the output token limit
+BATCH_MAX_PROMPT_CHARS = 12000  # ~3k tokens of names per request
+BATCH_WORKERS = 4
+
+def _batch_prompt(names):
+    lines = "\n".join(f"{i}. {name}" for i, name in enumerate(names, 1))
+    return f"""
+    Identify the specific market industry for each numbered business below.
+    Reply with ONLY a JSON object mapping each number to a 2-3 word industry category, no punctuation in the values.
+    Example: {{"1": "Fast Food Restaurant", "2": "IT Consulting"}}
+
+    {lines}
     """
+
+def _pack_batches(names):
+    batch, size = [], 0
+    for name in names:
+        if batch and (len(batch) >= BATCH_MAX_NAMES or size + len(name) > BATCH_MAX_PROMPT_CHARS):
+            yield batch
+            batch, size = [], 0
+        batch.append(name)
+        size += len(name) + 8
+    if batch:
+        yield batch
+
+def _parse_batch_reply(text, names):
+    # Models like to wrap JSON in ``` fences or add a sentence around it
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        raw = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    parsed = {}
+    for i, name in enumerate(names, 1):
+        value = raw.get(str(i)) or raw.get(name)
+        if isinstance(value, str) and value.strip():
+            parsed[name] = value.strip()
+    return parsed
+
+def _classify_batch(model, names):
     try:
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e: return f"Error: {e}"
\ No newline at end of file
+        text = _call(model, _batch_prompt(names), "industry_batch")
+    except:
+        return {}
+    parsed = _parse_batch_reply(text, names)
+    for name, industry in parsed.items():
+        AI_CACHE.set(_cache_key(model, _industry_prompt(name)), industry, INDUSTRY_TTL)
+    return parsed
+
+def identify_industries(business_names, use_cache=True):
+    """
+    Classifies many businesses with a handful of LLM requests.
+    Returns {business_name: industry}. Cached names cost nothing; names a
+    batch reply didn't cover fall back to one single-name call each.
+    """
+    names = list(dict.fromkeys(business_names))
+    model = get_working_model()
+    if not model:
+        return {n: n.split(' ')[-1] for n in names}  # Fallback to old "dumb" logic
+
+    results, todo = {}, []
+    for name in names:
+        cached = AI_CACHE.get(_cache_key(model, _industry_prompt(name))) if use_cache else MISS
+        if cached is MISS: todo.append(name)
+        else: results[name] = cached.strip()
+
+    if len(todo) > 1:
+        batches = list(_pack_batches(todo))
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+            for parsed in pool.map(lambda b: _classify_batch(model, b), batches):
+                results.update(parsed)
+
+    for name in todo:
+        if name not in results:
+            results[name] = _identify_one(model, name, use_cache)
+    return results
+
+# --- 6. SPECULATIVE GENERATION ---
+
+class SpeculativeStream:
+    """
+    Drains a chunk generator on a background thread as soon as it is
+    created. Any number of readers can replay it via stream(): chunks that
+    already arrived come back at once, the rest as they are produced.
+    """
+    def __init__(self, chunks):
+        self._chunks = []
+        self._done = False
+        self._cond = threading.Condition()
+        threading.Thread(target=self._drain, args=(chunks,), daemon=True).start()
+
+    def _drain(self, chunks):
+        try:
+            for chunk in chunks:
+                with self._cond:
+                    self._chunks.append(chunk)
+                    self._cond.notify_all()
+        except Exception as e:
+            with self._cond:
+                self._chunks.append(f"Error: {e}")
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    @property
+    def done(self):
+        return self._done
+
+    def stream(self):
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self._chunks) and not self._done:
+                    self._cond.wait()
+                if i >= len(self._chunks):
+                    return
+                chunk = self._chunks[i]
+            i += 1
+            yield chunk
+
+    def text(self):
+        """Blocks until finished and returns the full text."""
+        return "".join(self.stream())
+
+def start_audit_narrative(business_name, url, score, ssl, ports, seo, tech):
+    """Kicks off the narrative right after a scan, before anyone asks for it."""
+    return SpeculativeStream(stream_audit_narrative(business_name, url, score, ssl, ports, seo, tech))
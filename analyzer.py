@@ -1,65 +1,65 @@
 """
 Module: analyzer.py
-Description: SEO & Tech Analyzer with Anti-Blocking Headers
+Description: SEO & Tech Analyzer (reads from the shared single-fetch page)
 """
-import requests
-from bs4 import BeautifulSoup
+import metrics
+from fetcher import fetch_page
+from seo_extractor import empty_seo, extract_seo_from_page, stream_seo
+from tls_probe import probe_url, parse_hsts, tls_findings
+from fingerprint import fingerprint, MIN_CONFIDENCE
 
-def get_headers():
-    # This makes the request look like a real Chrome browser
-    return {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5"
-    }
+def inspect_ssl(url, page=None, probe=None):
+    """
+    Certificate intelligence from a handshake-only probe (no page download):
+    expiry, issuer, SAN match, protocol, cipher, plus HSTS read from the
+    shared page's headers when one is given. Adds report-ready "findings".
+    """
+    if probe is None:
+        probe = probe_url(url)
+    details = dict(probe)
+    details["hsts"] = parse_hsts(page.headers) if page is not None and page.ok else None
+    details["findings"] = tls_findings(probe, details["hsts"])
+    return details
 
-def check_ssl(url):
-    try:
-        response = requests.get(url, headers=get_headers(), timeout=5)
-        return True # If we can connect, SSL is likely working (requests fails on bad SSL by default)
-    except:
-        return False
+def check_ssl(url, page=None):
+    return bool(inspect_ssl(url, page)["valid"])
 
-def check_seo(url):
-    seo_data = {"title": None, "description": None}
+def check_seo(url, page=None):
+    """
+    Title, description, canonical, robots, og:*, hreflang, viewport,
+    h1 count and structured data. With a shared page we parse it in place;
+    without one we stream the target and stop at the byte cap.
+    """
     try:
-        response = requests.get(url, headers=get_headers(), timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        if soup.title:
-            seo_data["title"] = soup.title.string.strip()
-            
-        meta_desc = soup.find("meta", attrs={"name": "description"})
-        if meta_desc:
-            seo_data["description"] = meta_desc.get("content").strip()
-            
+        with metrics.span("seo_extract"):
+            if page is None:
+                return stream_seo(url, head_only=False)
+            if not page.ok:
+                print(f"SEO Check Error: {page.error}")
+                return empty_seo()
+            return extract_seo_from_page(page)
     except Exception as e:
         print(f"SEO Check Error: {e}")
-        
-    return seo_data
+        return empty_seo()
 
-def detect_tech_stack(url):
-    tech_stack = []
+def fingerprint_tech(url, page=None):
+    """
+    Full fingerprint: [{"name", "confidence", "version", "categories", "evidence"}].
+    Signatures live in data/tech_signatures.json.
+    """
+    page = page or fetch_page(url)
+    if not page.ok:
+        return []
     try:
-        response = requests.get(url, headers=get_headers(), timeout=5)
-        text = response.text.lower()
-        headers = str(response.headers).lower()
-        
-        # Simple signatures
-        signatures = {
-            "WordPress": ["wp-content", "wordpress"],
-            "Shopify": ["shopify"],
-            "Wix": ["wix.com", "_wix"],
-            "Squarespace": ["squarespace"],
-            "React": ["react"],
-            "Bootstrap": ["bootstrap"],
-            "Cloudflare": ["cloudflare"]
-        }
-        
-        for tech, keywords in signatures.items():
-            if any(k in text for k in keywords) or any(k in headers for k in keywords):
-                tech_stack.append(tech)
-                
-    except:
-        pass
-    return tech_stack
\ No newline at end of file
+        with metrics.span("fingerprint"):
+            return fingerprint(page)
+    except Exception as e:
+        print(f"Tech Fingerprint Error: {e}")
+        return []
+
+def tech_names(details, min_confidence=MIN_CONFIDENCE):
+    return [t["name"] for t in details if t["confidence"] >= min_confidence]
+
+def detect_tech_stack(url, page=None):
+    # Names only, for callers that just want the list
+    return tech_names(fingerprint_tech(url, page))
@@ -6,11 +6,17 @@ import streamlit as st
 import pandas as pd
 import re
 import os
-from scanner import find_business_url, find_competitors, find_social_links
-from analyzer import check_ssl, check_seo, detect_tech_stack
-from network_scanner import scan_common_ports
-from ai_agent import generate_audit_narrative, generate_seo_fixes, identify_industry
-from reporter import create_pdf
+import json
+import time
+import metrics
+from orchestrator import run_audit, score_audit, cached_audit, store_audit, bust_audit, AUDIT_CACHE
+from ai_agent import stream_seo_fixes, start_audit_narrative, warm_up
+from fetcher import get_session
+from scanner import get_serper_client
+from jobs import get_queue, DONE, FAILED
+from results_store import get_store
+import config
+from reporter import create_pdf, report_filename
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="RevenueRecon", page_icon="🕵️", layout="wide")
@@ -21,8 +27,135 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- SHARED RESOURCES (once per server, not per session) ---
+@st.cache_resource(show_spinner=False)
+def warm_ai_model():
+    return warm_up()
+
+@st.cache_resource(show_spinner=False)
+def shared_http_session():
+    return get_session()
+
+@st.cache_resource(show_spinner=False)
+def shared_serper_client():
+    try:
+        return get_serper_client()
+    except Exception as e:
+        print(f"Serper Client Error: {e}")
+        return None
+
+warm_ai_model()
+shared_http_session()
+shared_serper_client()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_portfolio():
+    # Latest audit per lead, re-scored with the current rules (vectorized)
+    return get_store().load()
+
+def render_portfolio():
+    st.header("📁 Lead Portfolio")
+    df = load_portfolio()
+    if df.empty:
+        st.info("No stored audits yet. Run a scan (or `python main.py leads.csv`) to build the portfolio.")
+        return
+
+    techs = sorted({t for stack in df['tech'] for t in stack.split("|") if t})
+    f1, f2, f3, f4 = st.columns(4)
+    score_range = f1.slider("Score", 0, 100, (0, 100))
+    ssl_state = f2.selectbox("SSL", ["Any", "Valid", "Invalid"])
+    port_state = f3.selectbox("Open Ports", ["Any", "Has open ports", "None open"])
+    tech_filter = f4.multiselect("Tech (any of)", techs)
+    search = st.text_input("Search name / URL / industry")
+
+    mask = df['score'].between(*score_range)
+    if ssl_state != "Any":
+        mask &= df['ssl_valid'] == (ssl_state == "Valid")
+    if port_state != "Any":
+        mask &= (df['open_port_count'] > 0) == (port_state == "Has open ports")
+    if tech_filter:
+        mask &= df['tech'].str.split("|").map(lambda stack: bool(set(stack) & set(tech_filter)))
+    if search:
+        text = df['name'] + " " + df['url'] + " " + df['industry']
+        mask &= text.str.contains(search, case=False, regex=False)
+    view = df[mask]
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Leads", f"{len(view)} / {len(df)}")
+    m2.metric("Avg Score", f"{view['score'].mean():.0f}" if len(view) else "n/a")
+    m3.metric("Invalid SSL", int((~view['ssl_valid'].astype(bool)).sum()))
+    m4.metric("With Open Ports", int((view['open_port_count'] > 0).sum()))
+
+    view = view.assign(audited=pd.to_datetime(view['audited_at'], unit='s').dt.strftime('%Y-%m-%d %H:%M'))
+    st.dataframe(
+        view[["score", "name", "url", "industry", "location", "issues", "ssl_valid", "open_ports", "tech", "site_broken", "audited"]],
+        column_config={"score": st.column_config.ProgressColumn("Score", min_value=0, max_value=100, format="%d")},
+        hide_index=True,
+        use_container_width=True
+    )
+    st.download_button("⬇️ Export CSV", view.to_csv(index=False), file_name="lead_portfolio.csv", mime="text/csv")
+
+# --- LIVE SCAN PANELS (filled in as each stage finishes) ---
+PANELS = [
+    ("url", "🌐 Website"), ("socials", "📡 Social Profiles"), ("ssl", "🔐 SSL / TLS"),
+    ("seo", "🔧 SEO"), ("tech", "💻 Tech Stack"), ("ports", "🔓 Port Scan"), ("dns", "📧 DNS / Email"),
+    ("site", "🕸️ Site Crawl"), ("competitors", "⚔️ Competitors")
+]
+
+def _panel_summary(stage, value):
+    if stage == "url":
+        return value
+    if stage == "socials":
+        return f"{len(value)} channels: {', '.join(value)}" if value else "No social media found."
+    if stage == "ssl":
+        days = value.get('days_remaining')
+        return f"{'Valid' if value.get('valid') else 'Invalid'} certificate" + (f", {value.get('protocol')}, expires in {days} days" if days is not None else "")
+    if stage == "seo":
+        return f"Title {'✅' if value.get('title') else '❌'} | Description {'✅' if value.get('description') else '❌'}"
+    if stage == "tech":
+        return ", ".join(t['name'] for t in value[:8]) or "Unknown Framework"
+    if stage == "ports":
+        risky = [str(p) for p, status in (value or {}).items() if "Risk" in status]
+        return f"Open: {', '.join(risky)}" if risky else "No high-risk ports."
+    if stage == "dns":
+        ips = (value.get('a') or []) + (value.get('aaaa') or [])
+        return f"{', '.join(ips[:3]) or 'No addresses'} | {len(value.get('findings', []))} email issues"
+    if stage == "site":
+        if not value: return "Crawl off (set CRAWL_AUDIT_PAGES to enable)."
+        return f"{value['pages']} pages, {len(value['findings'])} site-wide issues"
+    if stage == "competitors":
+        return f"{len(value)} found: {', '.join(c['name'] for c in value[:3])}" if value else "None nearby."
+    return str(value)
+
+def live_panels():
+    """Placeholder per panel plus the on_stage callback that fills them."""
+    cols = st.columns(2)
+    slots = {}
+    for i, (stage, label) in enumerate(PANELS):
+        with cols[i % 2]:
+            slots[stage] = (label, st.empty())
+            slots[stage][1].caption(f"{label}: ⏳ scanning...")
+
+    def on_stage(stage, value, error):
+        if stage not in slots: return
+        label, slot = slots[stage]
+        if error is not None:
+            slot.warning(f"{label}: {error}")
+        else:
+            slot.success(f"{label}: {_panel_summary(stage, value)}")
+    return on_stage
+
+def load_snapshot(snapshot):
+    st.session_state.target_data = snapshot["target"]
+    st.session_state.audit_results = snapshot["audit"]
+    st.session_state.competitors = snapshot["competitors"]
+    st.session_state.cached_at = snapshot.get("cached_at")
+    st.session_state.timings = snapshot.get("timings") or {}
+    st.session_state.spans = snapshot.get("spans") or []
+    st.session_state.scan_complete = True
+
 # --- SESSION STATE ---
-keys = ['scan_complete', 'target_data', 'competitors', 'audit_results', 'ai_report', 'pdf_path']
+keys = ['scan_complete', 'target_data', 'competitors', 'audit_results', 'ai_report', 'pdf_bytes', 'cached_at', 'narrative_job', 'timings', 'spans', 'job_id']
 for k in keys:
     if k not in st.session_state: st.session_state[k] = None
 if 'scan_complete' not in st.session_state: st.session_state.scan_complete = False
@@ -30,11 +163,59 @@ if 'scan_complete' not in st.session_state: st.session_state.scan_complete = Fal
 # --- SIDEBAR ---
 with st.sidebar:
     st.title("🕵️ RevenueRecon")
+    page = st.radio("View", ["Audit", "Portfolio"], horizontal=True)
     mode = st.radio("Mode", ["Auto-Discovery", "Direct Audit"])
     if st.button("🔄 Reset / New Search"):
         for k in keys: st.session_state[k] = None
         st.session_state.scan_complete = False
         st.rerun()
+    st.divider()
+    fresh_scan = st.checkbox("Force fresh scan (ignore cached results)")
+    use_workers = st.checkbox("Run on background workers", value=config.get("RECON_JOB_QUEUE", "0") in ("1", "true", "yes"))
+    workers_online = get_queue().active_workers() if use_workers else 0
+    if use_workers:
+        st.caption(f"👷 {workers_online} worker(s) online" if workers_online else "⚠️ No workers online, scans run in this session. Start one with `python worker.py`.")
+    if st.button("🗑️ Clear Cached Audits"):
+        AUDIT_CACHE.clear()
+        st.toast("Audit cache cleared.")
+    with st.expander("📈 Server Metrics"):
+        st.download_button("Prometheus text", metrics.REGISTRY.prometheus_text(), file_name="recon_metrics.prom", mime="text/plain")
+        st.download_button("JSON", json.dumps(metrics.REGISTRY.snapshot(), indent=2), file_name="recon_metrics.json", mime="application/json")
+
+# --- PORTFOLIO (every stored audit, ranked) ---
+if page == "Portfolio":
+    render_portfolio()
+    st.stop()
+
+# --- QUEUED SCAN (polls the job until a worker finishes it) ---
+if st.session_state.job_id and not st.session_state.scan_complete:
+    job = get_queue().get(st.session_state.job_id)
+    if job is None or job['status'] == FAILED:
+        st.error(f"❌ {(job or {}).get('error') or 'Job not found.'}")
+        if st.button("↩️ Back"):
+            st.session_state.job_id = None
+            st.rerun()
+        st.stop()
+    if job['status'] == DONE:
+        snapshot = job['result']
+        snapshot["cached_at"] = None
+        st.session_state.job_id = None
+        load_snapshot(snapshot)
+        st.rerun()
+
+    if job['status'] == "queued":
+        ahead = get_queue().position(job['id'])
+        label = f"⏳ Queued ({ahead} ahead)" if ahead else "⏳ Queued, next up"
+    else:
+        label = f"🛡️ Worker scanning {job['url'] or job['name']}..."
+    with st.status(label, expanded=True):
+        on_stage = live_panels()
+        for stage, value in job['partial'].get('stages', {}).items():
+            on_stage(stage, value, None)
+        for stage, error in job['partial'].get('errors', {}).items():
+            on_stage(stage, None, error)
+    time.sleep(1)
+    st.rerun()
 
 # --- INPUT SECTION ---
 if not st.session_state.scan_complete:
@@ -78,46 +259,37 @@ if not st.session_state.scan_complete:
         manual_url = st.text_input("Direct Website URL", placeholder="https://www.solaireresort.com")
 
     if st.button("⚡ Run Intelligence Scan"):
-        # 1. IDENTIFY URL
-        url = manual_url
-        if not url:
-            if not target_name:
-                st.error("Please enter a Business Name.")
-                st.stop()
-            with st.spinner("📡 Triangulating digital assets..."):
-                url = find_business_url(target_name, location)
-                if not url:
-                    st.error("❌ Website not found.")
+        if not manual_url and not target_name:
+            st.error("Please enter a Business Name.")
+            st.stop()
+
+        # 1. SERVE A RECENT SCAN OF THE SAME TARGET (any session)
+        snapshot = None
+        if fresh_scan:
+            stale = cached_audit(target_name, location, manual_url or None)
+            bust_audit(target_name, location, (stale or {}).get("target", {}).get("url") or manual_url or None)
+        else:
+            snapshot = cached_audit(target_name, location, manual_url or None)
+
+        # 2a. HAND OFF TO THE WORKER POOL (this session only polls; only if someone will pick it up)
+        if snapshot is None and workers_online:
+            st.session_state.job_id = get_queue().submit(target_name, location, manual_url or None)
+            st.rerun()
+
+        # 2b. IDENTIFY URL & PERFORM DEEP SCAN IN-PROCESS (panels fill in as stages finish)
+        if snapshot is None:
+            with st.status(f"🛡️ Infiltrating public data for {manual_url or target_name}...", expanded=True) as status:
+                result = run_audit(target_name, location, url=manual_url or None, on_stage=live_panels())
+                if not result.ok:
+                    status.update(label="Scan failed", state="error")
+                    st.error(f"❌ {result.errors['url']}")
                     st.stop()
-        
-        # 2. PERFORM DEEP SCAN
-        with st.spinner(f"🛡️ Infiltrating public data for {url}..."):
-            
-            # A. INDUSTRY DETECTION
-            with st.spinner("🧠 Analyzing Industry Type..."):
-                industry_type = identify_industry(target_name)
-                # Fallback
-                if not industry_type or industry_type == "Direct Audit":
-                    industry_type = target_name 
-            
-            # B. EXECUTE SCANS
-            socials = find_social_links(target_name, location)
-            ssl = check_ssl(url)
-            seo = check_seo(url)
-            tech = detect_tech_stack(url)
-            ports = scan_common_ports(url)
-            
-            # C. COMPETITORS
-            comps = []
-            if location:
-                clean_domain = url.replace("https://", "").replace("http://", "").split("/")[0]
-                comps = find_competitors(target_name, industry_type, location, clean_domain)
+                status.update(label=f"Scan complete in {result.elapsed:.1f}s", state="complete")
+            snapshot = store_audit(result)
+            snapshot["cached_at"] = None  # Fresh result, not served from cache
 
         # 3. SAVE STATE
-        st.session_state.target_data = {"name": target_name, "url": url, "location": location, "socials": socials, "industry": industry_type}
-        st.session_state.audit_results = {"ssl": ssl, "seo": seo, "tech": tech, "ports": ports}
-        st.session_state.competitors = comps
-        st.session_state.scan_complete = True
+        load_snapshot(snapshot)
         st.rerun() 
 
 # --- RESULTS DASHBOARD ---
@@ -127,18 +299,35 @@ if st.session_state.scan_complete:
     
     st.title(f"📊 Audit Report: {data['name']}")
     st.caption(f"Target URL: {data['url']} | Detected Market: **{data.get('industry', 'Unknown')}**")
+    if st.session_state.cached_at:
+        st.caption(f"⚡ Cached result from {int((time.time() - st.session_state.cached_at) // 60)} min ago. Tick 'Force fresh scan' in the sidebar to re-run.")
+    if audit.get('unchanged'):
+        st.caption("♻️ Site unchanged since the last audit - SEO and tech results were reused.")
+    kg = data.get('knowledge_graph') or {}
+    if kg.get('title'):
+        st.caption(f"Google listing: **{kg['title']}**" + (f" · {kg['type']}" if kg.get('type') else "") + (f" · {kg['rating']} ⭐" if kg.get('rating') else ""))
     
     col1, col2, col3, col4 = st.columns(4)
-    score = 100
-    if not audit['ssl']: score -= 30
-    if not audit['seo'].get('description'): score -= 15
-    if "Risk" in str(audit['ports']): score -= 20
+    score = score_audit(audit)
     
     col1.metric("Digital Health Score", f"{score}/100")
     col2.metric("SSL Security", "Secure" if audit['ssl'] else "Vulnerable", delta_color="normal" if audit['ssl'] else "inverse")
     col3.metric("Tech Stack", f"{len(audit['tech'])} Detected")
     col4.metric("Social Footprint", f"{len(data['socials'])} Channels")
 
+    if st.session_state.timings:
+        with st.expander("⏱️ Timing Breakdown"):
+            stage_ms = {k: round(v * 1000, 1) for k, v in st.session_state.timings.items()}
+            st.bar_chart(pd.DataFrame({"ms": stage_ms}))
+            calls = [sp for sp in st.session_state.spans if sp['span'] != "stage"]
+            if calls:
+                st.dataframe(
+                    pd.DataFrame([{"stage": sp['stage'], "call": sp['span'], "labels": ", ".join(f"{k}={v}" for k, v in sp['labels'].items()),
+                                   "ms": sp['ms'], "error": sp['error'] or ""} for sp in calls]).sort_values("ms", ascending=False),
+                    hide_index=True,
+                    use_container_width=True
+                )
+
     tab1, tab2, tab3 = st.tabs(["⚔️ Market Radar", "🛡️ Security & OSINT", "🔧 SEO Engine"])
     
     with tab1:
@@ -149,7 +338,10 @@ if st.session_state.scan_complete:
                 df,
                 column_config={
                     "name": "Competitor Name",
-                    "url": st.column_config.LinkColumn("Website")
+                    "url": st.column_config.LinkColumn("Website"),
+                    "rating": st.column_config.NumberColumn("Rating", format="%.1f ⭐"),
+                    "reviews": "Reviews",
+                    "distance_km": st.column_config.NumberColumn("Distance", format="%.1f km")
                 },
                 hide_index=True,
                 use_container_width=True
@@ -168,8 +360,36 @@ if st.session_state.scan_complete:
             st.subheader("🔓 Port Scan")
             if audit['ports']: st.json(audit['ports'])
             else: st.success("No high-risk ports.")
+        st.subheader("🔐 SSL / TLS")
+        tls = audit.get('ssl_details') or {}
+        if tls:
+            t1, t2, t3 = st.columns(3)
+            t1.metric("Certificate", "Valid" if tls.get('valid') else "Invalid")
+            t2.metric("Expires In", f"{tls['days_remaining']} days" if tls.get('days_remaining') is not None else "n/a")
+            t3.metric("Protocol", tls.get('protocol') or "n/a")
+            st.caption(f"Issuer: {tls.get('issuer') or 'Unknown'} | Cipher: {tls.get('cipher') or 'n/a'} | HSTS: {'Yes' if (tls.get('hsts') or {}).get('enabled') else 'No'}")
+            for finding in tls.get('findings', []):
+                st.warning(finding)
+        dns = audit.get('dns') or {}
+        if dns.get('domain'):
+            st.subheader("📧 DNS & Email Security")
+            d1, d2, d3 = st.columns(3)
+            d1.metric("Mail Servers", len(dns['mx']))
+            d2.metric("SPF", "Present" if dns['spf'] else "Missing")
+            d3.metric("DMARC", f"p={dns['dmarc_policy']}" if dns['dmarc_policy'] else ("Present" if dns['dmarc'] else "Missing"))
+            st.caption(f"A: {', '.join(dns['a']) or 'none'} | AAAA: {', '.join(dns['aaaa']) or 'none'} | NS: {', '.join(dns['ns']) or 'none'}")
+            for finding in dns.get('findings', []):
+                st.warning(finding)
         st.subheader("💻 Tech Stack")
-        st.write(", ".join(audit['tech']) if audit['tech'] else "Unknown Framework")
+        if audit.get('tech_details'):
+            st.dataframe(
+                pd.DataFrame(audit['tech_details'])[["name", "version", "confidence", "categories"]],
+                column_config={"confidence": st.column_config.ProgressColumn("Confidence", min_value=0, max_value=100)},
+                hide_index=True,
+                use_container_width=True
+            )
+        else:
+            st.write(", ".join(audit['tech']) if audit['tech'] else "Unknown Framework")
 
     with tab3:
         st.subheader("SEO Check")
@@ -177,24 +397,52 @@ if st.session_state.scan_complete:
         d = audit['seo'].get('description')
         st.markdown(f"**Title:** {'✅' if t else '❌'} `{t or 'MISSING'}`")
         st.markdown(f"**Desc:** {'✅' if d else '❌'} `{d or 'MISSING'}`")
+        seo = audit['seo']
+        if 'canonical' in seo:
+            st.markdown(f"**Canonical:** {'✅' if seo['canonical'] else '❌'} `{seo['canonical'] or 'MISSING'}`")
+            st.markdown(f"**Mobile Viewport:** {'✅' if seo['viewport'] else '❌'}  |  **H1 Tags:** {seo['h1_count']}  |  **Structured Data:** {'✅' if seo['structured_data'] else '❌'}")
+            if seo['robots']: st.caption(f"Robots: `{seo['robots']}`")
+            if seo['og']: st.caption(f"Open Graph: {', '.join(seo['og'])}")
+            if seo['hreflang']: st.caption(f"Hreflang: {', '.join(h['lang'] for h in seo['hreflang'])}")
+
+        site = audit.get('site') or {}
+        if site.get('pages'):
+            st.subheader("🕸️ Site-wide Crawl")
+            s1, s2, s3, s4 = st.columns(4)
+            s1.metric("Pages Crawled", site['pages'], help="Page budget reached" if site.get('budget_hit') else None)
+            s2.metric("Broken Pages", site['broken_count'])
+            s3.metric("Missing Descriptions", site['missing_count']['description'])
+            s4.metric("Avg Response", f"{site['avg_ms']:.0f} ms" if site.get('avg_ms') is not None else "n/a")
+            for finding in site.get('findings', []):
+                st.warning(finding)
+            with st.expander("Crawl details"):
+                if site['broken']:
+                    st.dataframe(pd.DataFrame(site['broken']), hide_index=True, use_container_width=True)
+                for field, urls in site['missing'].items():
+                    if urls: st.caption(f"No {field}: " + ", ".join(urls))
+                if site['duplicate_titles']:
+                    st.dataframe(pd.DataFrame(site['duplicate_titles']), hide_index=True, use_container_width=True)
+                if site['tech']:
+                    st.caption("Tech across pages: " + ", ".join(f"{t} ({n})" for t, n in site['tech'].items()))
         
+        fresh = st.checkbox("Fresh generation (skip AI cache)", key="seo_fresh")
         if st.button("✨ Generate AI SEO Fixes"):
-            with st.spinner("Optimizing..."):
-                fixes = generate_seo_fixes(data['url'], t, d, data['industry'], data['location'])
-                st.code(fixes)
+            st.write_stream(stream_seo_fixes(data['url'], t, d, data['industry'], data['location'], use_cache=not fresh))
 
     st.divider()
     st.subheader("📄 Executive Deliverable")
     
     if st.session_state.ai_report is None:
+        # Drafted in the background while the user reads the dashboard
+        if st.session_state.narrative_job is None:
+            st.session_state.narrative_job = start_audit_narrative(data['name'], data['url'], score, audit['ssl'], audit['ports'], audit['seo'], audit['tech'])
         if st.button("📝 Draft Strategy"):
-            with st.spinner("Drafting..."):
-                st.session_state.ai_report = generate_audit_narrative(data['name'], data['url'], score, audit['ssl'], audit['ports'], audit['seo'], audit['tech'])
-                st.rerun()
+            st.session_state.ai_report = st.write_stream(st.session_state.narrative_job.stream())
+            st.rerun()
     else:
         st.info(st.session_state.ai_report)
-        if st.session_state.pdf_path is None:
-            st.session_state.pdf_path = create_pdf(
+        if st.session_state.pdf_bytes is None:
+            st.session_state.pdf_bytes = create_pdf(
                 data['name'], 
                 data['url'], 
                 score, 
@@ -202,8 +450,10 @@ if st.session_state.scan_complete:
                 audit['ssl'], 
                 audit['seo'], 
                 audit['tech'],
-                st.session_state.competitors or []
+                st.session_state.competitors or [],
+                ssl_details=audit.get('ssl_details'),
+                site=audit.get('site'),
+                dns=audit.get('dns')
             )
             
-        with open(st.session_state.pdf_path, "rb") as f:
-            st.download_button("⬇️ Download PDF Report", data=f, file_name=st.session_state.pdf_path, mime="application/pdf")
\ No newline at end of file
+        st.download_button("⬇️ Download PDF Report", data=st.session_state.pdf_bytes, file_name=report_filename(data['name']), mime="application/pdf")
\ No newline at end of file
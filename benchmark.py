@@ -0,0 +1,569 @@
+"""
+Module: benchmark.py
+Description: Offline Benchmark Suite (local stand-ins for Serper, Gemini, target sites and open ports)
+Nothing leaves the machine: every stage talks to servers started on 127.0.0.1.
+
+Usage:
+    python benchmark.py                          # every scenario, 50 iterations, concurrency 8
+    python benchmark.py -n 200 -c 16 --only seo tech e2e
+    python benchmark.py --serper-latency 300 --gemini-latency 800 --json bench.json
+Reports p50/p95/max latency (ms) and throughput (ops/s) per scenario, and
+per orchestrator stage for the end-to-end run.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Repo caches go to a throwaway directory; must be set before the repo modules import cache.py
+_WORKDIR = tempfile.mkdtemp(prefix="recon-bench-")
+os.environ["RECON_CACHE_DIR"] = os.path.join(_WORKDIR, "cache")
+
+# --- 1. STATS ---
+
+def percentile(sorted_values, q):
+    if not sorted_values: return None
+    # Nearest-rank on the sorted samples
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class Recorder:
+    """Collects latency samples (seconds) per metric name. Thread-safe."""
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.walls = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, error=None):
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if error is not None:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self):
+        rows = []
+        for name, values in self.samples.items():
+            values = sorted(values)
+            wall = self.walls.get(name)
+            rows.append({
+                "name": name, "n": len(values), "errors": self.errors.get(name, 0),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+                "ops_per_s": round(len(values) / wall, 1) if wall else None
+            })
+        return rows
+
+def print_table(rows):
+    header = f"{'metric':<28}{'n':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'ops/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        ops = "" if r["ops_per_s"] is None else r["ops_per_s"]
+        print(f"{r['name']:<28}{r['n']:>6}{r['errors']:>5}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['max_ms']:>10}{ops:>9}")
+
+# --- 2. LOCAL STAND-INS ---
+
+def _start_server(handler, tls_context=None):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    if tls_context is not None:
+        server.socket = tls_context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheme = "https" if tls_context is not None else "http"
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}"
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # Keep-alive, like the real services
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes; don't stall on delayed ACKs
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+class FakeSerper:
+    """
+    Serper stand-in: POST /search and POST /places with canned payloads.
+    Search results point at the local site farm, so the audit that follows
+    stays offline too. `latency` (seconds) is added to every response.
+    """
+    def __init__(self, site_url, latency=0.0, places=20):
+        owner = self
+
+        class Handler(_QuietHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if owner.latency: time.sleep(owner.latency)
+                endpoint = self.path.strip("/")
+                if endpoint == "search":
+                    payload = owner.search_payload(request.get("q", ""))
+                elif endpoint == "places":
+                    payload = owner.places_payload(request.get("q", ""), request.get("num", 10))
+                else:
+                    return self._send(404, b'{"message": "not found"}', "application/json")
+                self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+
+        self.site_url = site_url
+        self.latency = latency
+        self.places = places
+        self.server, self.url = _start_server(Handler)
+
+    def search_payload(self, query):
+        slug = "-".join(query.lower().split())[:40]
+        return {
+            "knowledgeGraph": {"title": query, "type": "Hotel", "website": f"{self.site_url}/wordpress/50k", "rating": 4.4, "ratingCount": 812},
+            "organic": [
+                {"title": "Official site", "link": f"{self.site_url}/wordpress/50k",
+                 "sitelinks": [{"title": "Instagram", "link": f"https://instagram.com/{slug}"}]},
+                {"title": "Facebook", "link": f"https://www.facebook.com/{slug}"},
+                {"title": "LinkedIn", "link": f"https://www.linkedin.com/company/{slug}"},
+                {"title": "Yelp", "link": f"https://www.yelp.com/biz/{slug}"},
+            ] + [{"title": f"Result {i}", "link": f"https://example{i}.com/{slug}"} for i in range(6)],
+            "places": [{"title": query, "address": "1 Bench St", "rating": 4.4, "ratingCount": 812, "latitude": 14.55, "longitude": 121.02}]
+        }
+
+    def places_payload(self, query, num):
+        rng = random.Random(query)
+        words = ["Grand", "Royal", "Harbor", "Summit", "Golden", "Blue", "Palm", "City", "Vista", "Metro"]
+        return {"places": [
+            {
+                "title": f"{rng.choice(words)} {rng.choice(words)} {query.split()[0].title()} {i}",
+                "website": f"https://place{rng.randrange(10 ** 6)}.example",
+                "rating": round(rng.uniform(3.0, 5.0), 1), "ratingCount": rng.randrange(5000),
+                "category": query.split(" in ")[0].split(" near ")[0], "address": f"{i} Bench Ave",
+                "latitude": 14.55 + rng.uniform(-0.1, 0.1), "longitude": 121.02 + rng.uniform(-0.1, 0.1)
+            }
+            for i in range(min(num, self.places))
+        ]}
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeGeminiModel:
+    """
+    Stands in for genai.GenerativeModel. `latency` is the time to the first
+    token, `chunk_interval` the gap between streamed chunks. Batch industry
+    prompts get a JSON reply so the batch parser path is exercised.
+    """
+    model_name = "models/gemini-bench"
+
+    def __init__(self, latency=0.5, chunk_interval=0.05, chunks=20):
+        self.latency = latency
+        self.chunk_interval = chunk_interval
+        self.chunks = chunks
+
+    def _reply(self, prompt):
+        if "each numbered business" in prompt:
+            count = sum(1 for line in prompt.splitlines() if line.strip()[:1].isdigit())
+            return json.dumps({str(i): "Casino Hotel" for i in range(1, count + 1)})
+        if "industry" in prompt and "2-3 word" in prompt:
+            return "Casino Hotel"
+        return " ".join(f"Sentence {i} of the benchmark narrative." for i in range(self.chunks))
+
+    def generate_content(self, prompt, stream=False):
+        text = self._reply(prompt)
+        if not stream:
+            time.sleep(self.latency + self.chunk_interval * self.chunks)
+            return _Chunk(text)
+
+        def chunks():
+            time.sleep(self.latency)
+            step = max(1, len(text) // self.chunks)
+            for i in range(0, len(text), step):
+                if i: time.sleep(self.chunk_interval)
+                yield _Chunk(text[i:i + step])
+        return chunks()
+
+# Tech profiles: (response headers, head markup, body markup)
+SITE_PROFILES = {
+    "wordpress": (
+        [("Server", "nginx/1.24.0"), ("X-Powered-By", "PHP/8.2.12"), ("Link", '<https://bench.local/wp-json/>; rel="https://api.w.org/"'),
+         ("Set-Cookie", "wordpress_test_cookie=WP; path=/")],
+        '<meta name="generator" content="WordPress 6.4.2">'
+        '<script src="/wp-includes/js/jquery/jquery.min.js?ver=3.7.1"></script>',
+        '<div class="entry"><img src="/wp-content/uploads/hero.jpg"></div>'
+    ),
+    "shopify": (
+        [("Server", "cloudflare"), ("X-ShopId", "123456"), ("Set-Cookie", "_shopify_y=abc; path=/")],
+        '<script src="https://cdn.shopify.com/s/files/theme.js"></script>',
+        '<script>Shopify.theme = {"name": "Dawn"};</script>'
+    ),
+    "nextjs": (
+        [("Server", "nginx"), ("X-Powered-By", "Next.js")],
+        '<script src="/_next/static/chunks/main.js"></script>',
+        '<div id="__next"></div><script id="__NEXT_DATA__" type="application/json">{}</script>'
+    ),
+}
+SITE_SIZES = {"10k": 10 * 1024, "50k": 50 * 1024, "300k": 300 * 1024, "2m": 2 * 1024 * 1024}
+
+def build_page(profile, size):
+    headers, head_extra, body_extra = SITE_PROFILES[profile]
+    head = (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>Bench {profile} {size} bytes</title>"
+        '<meta name="description" content="Offline benchmark page">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        '<link rel="canonical" href="https://bench.local/">'
+        '<meta property="og:title" content="Bench">'
+        '<script type="application/ld+json">{"@type": "Hotel"}</script>'
+        f"{head_extra}</head><body><h1>Bench</h1>{body_extra}"
+    )
+    filler = "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor.</p>\n"
+    body = head + filler * max(0, (size - len(head)) // len(filler)) + "</body></html>"
+    return headers, body.encode("utf-8")
+
+CRAWL_SITE_PAGES = 500
+
+def build_crawl_site(pages=CRAWL_SITE_PAGES):
+    """A linked /crawl/<n> site (binary-tree links, a few flaws) plus its /sitemap.xml."""
+    site = {}
+    filler = "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>\n" * 150
+    for n in range(pages):
+        links = "".join(f'<a href="/crawl/{c}">Page {c}</a>' for c in (2 * n + 1, 2 * n + 2, 0) if c < pages)
+        if n % 50 == 0:
+            links += f'<a href="/crawl/missing-{n}">Broken</a>'
+        desc = "" if n % 7 == 0 else f'<meta name="description" content="Crawl page {n}">'
+        body = f"<html><head><title>Crawl page {n}</title>{desc}</head><body><h1>{n}</h1>{links}{filler}</body></html>"
+        site[f"/crawl/{n}"] = ([], body.encode("utf-8"))
+    locs = "".join(f"<url><loc>/crawl/{n}</loc></url>" for n in range(0, pages, 3))
+    return site, f'<?xml version="1.0"?><urlset>{locs}</urlset>'
+
+def make_self_signed_cert(directory):
+    """Self-signed cert for 127.0.0.1 via the openssl CLI. Returns (cert, key) or None."""
+    if not shutil.which("openssl"): return None
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    try:
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", key, "-out", cert,
+             "-days", "2", "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"],
+            check=True, capture_output=True, timeout=60
+        )
+    except Exception as e:
+        print(f"[!] openssl failed, HTTPS scenarios disabled: {e}")
+        return None
+    return cert, key
+
+class SiteFarm:
+    """Serves /<profile>/<size> over HTTP, and over HTTPS when openssl is available."""
+    def __init__(self, workdir):
+        pages = {f"/{p}/{s}": build_page(p, n) for p in SITE_PROFILES for s, n in SITE_SIZES.items()}
+        crawl_pages, sitemap = build_crawl_site()
+        pages.update(crawl_pages)
+
+        class Handler(_QuietHandler):
+            def do_GET(self):
+                if self.path == "/sitemap.xml":
+                    # Absolute <loc>s need the port, which is only known once the server runs
+                    scheme = "https" if isinstance(self.connection, ssl.SSLSocket) else "http"
+                    base = f"{scheme}://{self.headers.get('Host')}"
+                    return self._send(200, sitemap.replace("<loc>/", f"<loc>{base}/").encode("utf-8"), "application/xml")
+                page = pages.get(self.path.split("?")[0])
+                if page is None:
+                    return self._send(404, b"not found", "text/plain")
+                headers, body = page
+                self._send(200, body, "text/html; charset=utf-8", headers + [("Strict-Transport-Security", "max-age=31536000")])
+
+        self.pages = pages
+        self.server, self.http_url = _start_server(Handler)
+        self.https_server = self.https_url = None
+        self.tls_port = None
+        pair = make_self_signed_cert(workdir)
+        if pair:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(*pair)
+            self.https_server, self.https_url = _start_server(Handler, context)
+            self.tls_port = self.https_server.server_address[1]
+
+class PortFarm:
+    """
+    `open_count` listening sockets plus `closed_count` ports known to be free.
+    The kernel completes the handshake on listen(), so no accept loop is needed.
+    """
+    def __init__(self, open_count=50, closed_count=50):
+        self.listeners = []
+        for _ in range(open_count):
+            s = socket.socket()
+            s.bind(("127.0.0.1", 0))
+            s.listen(128)
+            self.listeners.append(s)
+        closed = []
+        for _ in range(closed_count):
+            s = socket.socket()
+            s.bind(("127.0.0.1", 0))
+            closed.append(s.getsockname()[1])
+            s.close()
+        self.open_ports = [s.getsockname()[1] for s in self.listeners]
+        self.ports = sorted(self.open_ports + closed)
+
+    def close(self):
+        for s in self.listeners:
+            s.close()
+
+class FakeDns:
+    """
+    UDP DNS server answering for any *.bench.test name: A 127.0.0.1, two MX,
+    two NS, an SPF TXT and a DMARC TXT, with `latency` seconds per answer.
+    Needs dnspython (the same package dns_intel.py uses).
+    """
+    def __init__(self, latency=0.0):
+        import dns.message, dns.rcode, dns.rdatatype, dns.rrset
+        records = {
+            "A": ["127.0.0.1"], "MX": ["10 mx1.bench.test.", "20 mx2.bench.test."],
+            "NS": ["ns1.bench.test.", "ns2.bench.test."], "TXT": ['"v=spf1 -all"'],
+        }
+        self.queries = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+
+        def answer(data, addr):
+            if latency: time.sleep(latency)
+            query = dns.message.from_wire(data)
+            response = dns.message.make_response(query)
+            question = query.question[0]
+            rdtype = dns.rdatatype.to_text(question.rdtype)
+            name = question.name.to_text()
+            values = ['"v=DMARC1; p=reject"'] if name.startswith("_dmarc.") and rdtype == "TXT" else records.get(rdtype)
+            if values:
+                response.answer.append(dns.rrset.from_text(question.name, 300, "IN", rdtype, *values))
+            self.sock.sendto(response.to_wire(), addr)
+
+        def serve():
+            while True:
+                try:
+                    data, addr = self.sock.recvfrom(4096)
+                except OSError:
+                    return  # Closed
+                self.queries += 1
+                threading.Thread(target=answer, args=(data, addr), daemon=True).start()
+
+        threading.Thread(target=serve, daemon=True).start()
+
+    def resolver(self):
+        import dns.resolver
+        resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = ["127.0.0.1"]
+        resolver.port = self.port
+        resolver.lifetime = 5
+        return resolver
+
+    def close(self):
+        self.sock.close()
+
+# --- 3. HARNESS ---
+
+class Bench:
+    """Starts the stand-ins and points the repo modules at them."""
+    def __init__(self, serper_latency=0.0, gemini_latency=0.5, gemini_chunk_interval=0.05, dns_latency=0.02):
+        self.sites = SiteFarm(_WORKDIR)
+        self.serper = FakeSerper(self.sites.http_url, serper_latency)
+        self.ports = PortFarm()
+        self.gemini = FakeGeminiModel(gemini_latency, gemini_chunk_interval)
+        try:
+            self.dns = FakeDns(dns_latency)
+        except ImportError:
+            self.dns = None
+            print("[!] dnspython not installed, dns scenarios skipped")
+
+        import scanner
+        import ai_agent
+        from serper_client import SerperClient
+        # Unthrottled client against the fake server (the token bucket would otherwise dominate)
+        scanner._client = SerperClient("bench-key", base_url=self.serper.url, qps=1e6, burst=1e6)
+        ai_agent._configured = True
+        ai_agent._model = self.gemini
+        ai_agent._model_resolved_at = float("inf")  # Never "stale", so list_models() is never called
+
+    def close(self):
+        self.ports.close()
+        if self.dns: self.dns.close()
+        shutil.rmtree(_WORKDIR, ignore_errors=True)
+
+class Metrics(dict):
+    """Returned by an op to record extra {metric: seconds} samples (any other return value is ignored)."""
+
+def run_scenario(recorder, name, op, iterations, concurrency):
+    """Calls op(i) `iterations` times on `concurrency` threads."""
+    def one(i):
+        start = time.perf_counter()
+        try:
+            extra = op(i)
+            error = None
+        except Exception as e:
+            extra, error = None, e
+        recorder.add(name, time.perf_counter() - start, error)
+        for metric, seconds in (extra.items() if isinstance(extra, Metrics) else ()):
+            recorder.add(metric, seconds)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(iterations)))
+    recorder.walls[name] = time.perf_counter() - start
+
+# --- 4. SCENARIOS ---
+# Every op uses a fresh query/business per iteration, so the Serper and
+# Gemini caches miss and the cold path is what gets measured.
+
+def scenarios(bench):
+    from fetcher import fetch_page
+    from analyzer import check_seo, fingerprint_tech, inspect_ssl
+    from seo_extractor import stream_seo
+    from network_scanner import scan_hosts
+    from tls_probe import probe_tls
+    from crawler import crawl_site, HostGate
+    import scanner
+    import ai_agent
+    import orchestrator
+
+    site = bench.sites.http_url
+    pages = {size: fetch_page(f"{site}/wordpress/{size}") for size in SITE_SIZES}
+    run_id = f"{time.time():.0f}"
+
+    def narrative_ttft(i):
+        start = time.perf_counter()
+        stream = ai_agent.stream_audit_narrative(f"Bench {run_id} {i}", site, 70, True, {}, {}, [], use_cache=False)
+        next(stream)
+        first = time.perf_counter() - start
+        for _ in stream: pass
+        return Metrics({"ai.narrative_first_chunk": first})
+
+    def crawl_500(i):
+        # Raw crawler throughput: politeness off, so this is NOT what a real site sees
+        site_report = crawl_site(
+            f"{site}/crawl/0", max_pages=CRAWL_SITE_PAGES, max_depth=20,
+            workers=16, gate=HostGate(per_host=8, delay=0.0)
+        )
+        if site_report["pages"] < CRAWL_SITE_PAGES:
+            raise RuntimeError(f"crawled only {site_report['pages']} pages")
+
+    def crawl_shipped(i):
+        # Shipped budget and politeness (CRAWL_MAX_PAGES, CRAWL_PER_HOST, CRAWL_HOST_DELAY)
+        if not crawl_site(f"{site}/crawl/0")["pages"]:
+            raise RuntimeError("crawled no pages")
+
+    def e2e(i):
+        result = orchestrator.run_audit(f"Bench Resort {run_id} {i}", f"Manila {run_id}-{i}")
+        if not result.ok:
+            raise RuntimeError(result.errors["url"])
+        return Metrics({f"e2e.stage.{stage}": seconds for stage, seconds in result.timings.items()})
+
+    ops = {
+        "serper.search":     lambda i: scanner.serper_query("search", f"bench {run_id} {i}", 20),
+        "serper.competitors": lambda i: scanner.find_competitors(f"Bench {i}", "Casino Hotel", f"Manila {run_id} {i}", "bench.local"),
+        "fetch.50k":         lambda i: fetch_page(f"{site}/wordpress/50k"),
+        "fetch.2m":          lambda i: fetch_page(f"{site}/wordpress/2m"),
+        "seo.head_stream":   lambda i: stream_seo(f"{site}/wordpress/300k"),
+        "seo.300k":          lambda i: check_seo(None, pages["300k"]),
+        "seo.2m":            lambda i: check_seo(None, pages["2m"]),
+        "tech.50k":          lambda i: fingerprint_tech(None, pages["50k"]),
+        "tech.2m":           lambda i: fingerprint_tech(None, pages["2m"]),
+        "crawl.500_unthrottled": crawl_500,
+        "crawl.shipped":     crawl_shipped,
+        "ports.100":         lambda i: scan_hosts(["127.0.0.1"], bench.ports.ports, timeout=1.0),
+        "ai.industry":       lambda i: ai_agent.identify_industry(f"Bench Biz {run_id} {i}", use_cache=False),
+        "ai.narrative":      narrative_ttft,
+        "e2e":               e2e,
+    }
+    if bench.dns:
+        import dns_intel
+        dns_intel._resolver = bench.dns.resolver()
+
+        def dns_bulk(i):
+            # 200 fresh domains (www. host + bare domain each) in one pass, then again from the cache
+            hosts = [f"www.d{n}.{run_id}-{i}.bench.test" for n in range(200)]
+            start = time.perf_counter()
+            dns_intel.lookup_many(hosts)
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            dns_intel.lookup_many(hosts)
+            return Metrics({"dns.bulk_200.cold": cold, "dns.bulk_200.cached": time.perf_counter() - start})
+        ops["dns.bulk_200"] = dns_bulk
+
+    if bench.sites.https_url:
+        https = bench.sites.https_url
+        ops["fetch.https_50k"] = lambda i: fetch_page(f"{https}/shopify/50k")
+        ops["tls.handshake"] = lambda i: probe_tls("127.0.0.1", bench.sites.tls_port)
+        ops["ssl.inspect"] = lambda i: inspect_ssl(f"{https}/", pages["50k"], probe_tls("127.0.0.1", bench.sites.tls_port))
+    try:
+        import fpdf  # noqa: F401  (optional: only needed for the PDF scenario)
+        from reporter import create_pdf
+        audit_seo = check_seo(None, pages["50k"])
+        ops["pdf.render"] = lambda i: create_pdf(
+            f"Bench {i}", site, 72, "Benchmark narrative. " * 150, True, audit_seo, ["WordPress", "PHP"],
+            [{"name": f"Competitor {n}", "url": f"https://c{n}.example"} for n in range(10)]
+        )
+    except ImportError:
+        print("[!] fpdf not installed, pdf.render skipped")
+    try:
+        import pandas as pd
+        from scoring import audit_features, score_frame
+        rng = random.Random(7)
+        portfolio = pd.DataFrame([
+            audit_features({"ssl": rng.random() < 0.7, "seo": {"description": "d" if rng.random() < 0.6 else None},
+                            "ports": {"21": "OPEN (Risk)"} if rng.random() < 0.2 else {}, "tech": ["WordPress"]})
+            for _ in range(100_000)
+        ])
+        ops["score.100k"] = lambda i: score_frame(portfolio)
+    except ImportError:
+        print("[!] pandas not installed, score.100k skipped")
+    return ops
+
+# --- 5. CLI ---
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks against local Serper/Gemini/site/port stand-ins.")
+    parser.add_argument("-n", "--iterations", type=int, default=50, help="Calls per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Concurrent calls per scenario")
+    parser.add_argument("--only", nargs="+", help="Scenario names or prefixes (e.g. seo tech e2e)")
+    parser.add_argument("--serper-latency", type=float, default=150, help="Fake Serper response delay (ms)")
+    parser.add_argument("--gemini-latency", type=float, default=500, help="Fake Gemini time to first token (ms)")
+    parser.add_argument("--gemini-chunk-interval", type=float, default=50, help="Fake Gemini delay between streamed chunks (ms)")
+    parser.add_argument("--dns-latency", type=float, default=20, help="Fake DNS server response delay (ms)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    bench = Bench(args.serper_latency / 1000, args.gemini_latency / 1000, args.gemini_chunk_interval / 1000, args.dns_latency / 1000)
+    recorder = Recorder()
+    try:
+        ops = scenarios(bench)
+        for name, op in ops.items():
+            if args.only and not any(name.startswith(o) for o in args.only):
+                continue
+            print(f"[*] {name} ({args.iterations} x, concurrency {args.concurrency})")
+            run_scenario(recorder, name, op, args.iterations, args.concurrency)
+    finally:
+        bench.close()
+
+    rows = recorder.summary()
+    print()
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
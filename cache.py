@@ -0,0 +1,240 @@
+"""
+Module: cache.py
+Description: TTL Caches (SQLite-backed disk tier, in-memory LRU tier, single-flight loads)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+CACHE_DIR = config.get("RECON_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+MISS = object()
+
+# --- 1. SINGLE-FLIGHT ---
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+# --- 2. DISK CACHE ---
+
+class DiskCache:
+    """
+    Key/value cache stored in one SQLite file.
+    - Values are JSON-serialized, so keep them to plain dicts/lists/strings.
+    - Every entry expires after `ttl` seconds (per-call override allowed).
+    - Past `max_entries`, the least recently used rows are evicted.
+    - get_or_set() runs the loader once per key even if many threads ask at once.
+    """
+    EVICT_EVERY = 64  # Check the size bound every N writes, not on every write
+
+    def __init__(self, name, ttl=86400, max_entries=10000, path=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path or os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed_at)")
+
+    def get(self, key):
+        """Returns the cached value or cache.MISS."""
+        value = self._lookup(key)
+        with self._lock:
+            if value is MISS: self.misses += 1
+            else: self.hits += 1
+        return value
+
+    def _lookup(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return MISS
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now)
+            )
+            self._writes += 1
+            if (self._writes - 1) % self.EVICT_EVERY == 0:  # First write, then every N
+                self._evict(now)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def get_or_set(self, key, loader, ttl=None):
+        """
+        Returns the cached value, or calls loader() and stores its result.
+        Concurrent callers for the same key wait for the first one's result
+        instead of calling loader() again. Exceptions are shared, not cached.
+        """
+        value = self.get(key)
+        if value is not MISS:
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            # Another leader may have finished between our get() and taking the flight
+            value = self._lookup(key)
+            if value is MISS:
+                value = loader()
+                self.set(key, value, ttl)
+            flight.value = value
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses, "entries": size,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+
+# --- 3. MEMORY TIER ---
+
+class LRUCache:
+    """
+    Small in-process LRU with per-entry TTL. Same get/set/MISS contract as
+    DiskCache, but values are kept as-is (no serialization).
+    """
+    def __init__(self, max_entries=512, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return MISS
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses, "entries": len(self._data),
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+
+class TieredCache:
+    """
+    Memory LRU in front of a DiskCache. Reads check memory first, then disk
+    (promoting hits into memory); loads are single-flighted by the disk tier.
+    """
+    def __init__(self, memory, disk):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is MISS:
+            value = self.disk.get(key)
+            if value is not MISS:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.disk.set(key, value, ttl)
+        self.memory.set(key, value, min(ttl, self.memory.ttl) if ttl is not None else None)
+
+    def get_or_set(self, key, loader, ttl=None):
+        value = self.memory.get(key)
+        if value is MISS:
+            value = self.disk.get_or_set(key, loader, ttl)
+            self.memory.set(key, value, min(ttl, self.memory.ttl) if ttl is not None else None)
+        return value
+
+    def delete(self, key):
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self):
+        return {"memory": self.memory.stats(), "disk": self.disk.stats()}
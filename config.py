@@ -0,0 +1,51 @@
+"""
+Module: config.py
+Description: Settings Provider (environment -> .env file -> Streamlit secrets)
+Importing this never imports Streamlit: st.secrets is only consulted when the
+process is already running under Streamlit (i.e. the module is loaded).
+"""
+import os
+import sys
+import threading
+
+ENV_FILE = os.getenv("RECON_ENV_FILE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+
+_dotenv = None
+_dotenv_lock = threading.Lock()
+
+def _dotenv_values():
+    global _dotenv
+    if _dotenv is None:
+        with _dotenv_lock:
+            if _dotenv is None:
+                values = {}
+                if os.path.exists(ENV_FILE):
+                    try:
+                        from dotenv import dotenv_values
+                        values = {k: v for k, v in dotenv_values(ENV_FILE).items() if v is not None}
+                    except ImportError:
+                        print(f"Config Warning: python-dotenv not installed, {ENV_FILE} ignored")
+                _dotenv = values
+    return _dotenv
+
+def _streamlit_secret(name):
+    st = sys.modules.get("streamlit")
+    if st is None:
+        return None
+    try:
+        return st.secrets[name] if name in st.secrets else None
+    except Exception:
+        return None  # No secrets.toml
+
+def get(name, default=None):
+    """First non-empty value from: environment, .env, Streamlit secrets."""
+    for value in (os.environ.get(name), _dotenv_values().get(name), _streamlit_secret(name)):
+        if value not in (None, ""):
+            return value
+    return default
+
+def get_int(name, default):
+    return int(get(name, default))
+
+def get_float(name, default):
+    return float(get(name, default))
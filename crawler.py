@@ -0,0 +1,364 @@
+"""
+Module: crawler.py
+Description: Site Crawler (sitemap + link frontier, bounded concurrency, per-page SEO/tech)
+Each page is analysed as soon as it arrives and then reduced to a small
+summary, so memory stays flat whatever the page budget is.
+"""
+import gzip
+import html
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from urllib.parse import urljoin, urldefrag, urlparse
+from urllib.robotparser import RobotFileParser
+
+import config
+import metrics
+from cache import DiskCache, MISS
+from fetcher import PageResponse, fetch_page, normalize_url
+from seo_extractor import extract_seo_from_page
+from fingerprint import fingerprint, MIN_CONFIDENCE
+
+CRAWL_MAX_PAGES = config.get_int("CRAWL_MAX_PAGES", 20)           # Page budget of crawl_site()
+CRAWL_AUDIT_PAGES = config.get_int("CRAWL_AUDIT_PAGES", 0)        # Pages each audit crawls; 0 (default) = no site stage
+CRAWL_MAX_DEPTH = config.get_int("CRAWL_MAX_DEPTH", 3)            # Link hops from the start page
+CRAWL_WORKERS = config.get_int("CRAWL_WORKERS", 8)                # Global concurrency cap
+CRAWL_PER_HOST = config.get_int("CRAWL_PER_HOST", 2)              # Concurrent requests to one host
+CRAWL_HOST_DELAY = config.get_float("CRAWL_HOST_DELAY", 0.25)     # Min seconds between request starts on a host
+CRAWL_REUSE_TTL = config.get_int("CRAWL_REUSE_TTL", 7 * 86400)    # Max age of a summary reused for an unchanged site
+CRAWL_MAX_BYTES = 512 * 1024
+CRAWL_TIMEOUT = 8
+SITEMAP_MAX_FILES = 10      # Sitemap index fan-out cap
+SITEMAP_MAX_BYTES = 10 * 1024 * 1024
+SAMPLE_SIZE = 10            # URLs listed per finding in the report
+
+# url -> {"analysis_key", "summary"}: the last crawl, reused while the start page is unchanged
+SITE_SUMMARIES = DiskCache("site_summary", ttl=CRAWL_REUSE_TTL, max_entries=config.get_int("PAGE_STATE_MAX_ENTRIES", 20000))
+
+_HREF = re.compile(rb"""<a\s[^>]*?href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.I)
+_LOC = re.compile(rb"<loc>\s*([^<]+?)\s*</loc>", re.I)
+_SKIP_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".pdf", ".zip", ".gz", ".mp4", ".mp3",
+    ".css", ".js", ".json", ".xml", ".doc", ".docx", ".xls", ".xlsx", ".woff", ".woff2", ".ttf"
+)
+
+# --- 1. URL HELPERS ---
+
+def _site(url):
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+def _frontier_key(url):
+    # Scheme, www, trailing slash and fragment don't make a new page; the query does
+    query = urlparse(url).query
+    return f"{normalize_url(url)}?{query}" if query else normalize_url(url)
+
+def _crawlable(url, site):
+    parsed = urlparse(url)
+    return (
+        parsed.scheme in ("http", "https") and _site(url) == site
+        and not parsed.path.lower().endswith(_SKIP_EXTENSIONS)
+    )
+
+def extract_links(page):
+    """Absolute, fragment-free <a href> targets of a fetched page (any host)."""
+    base = page.final_url or page.url
+    encoding = page.encoding or "utf-8"
+    links = []
+    for m in _HREF.finditer(page.body or b""):
+        raw = (m.group(1) or m.group(2) or m.group(3) or b"").decode(encoding, "replace").strip()
+        if not raw or raw.startswith(("#", "mailto:", "tel:", "javascript:", "data:")):
+            continue
+        links.append(urldefrag(urljoin(base, html.unescape(raw)))[0])
+    return links
+
+# --- 2. POLITENESS ---
+
+class HostGate:
+    """
+    Per-host politeness: at most `per_host` requests in flight to one host,
+    and request starts spaced at least `delay` seconds apart.
+    """
+    def __init__(self, per_host=CRAWL_PER_HOST, delay=CRAWL_HOST_DELAY):
+        self.per_host = max(1, per_host)
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_start = {}
+
+    @contextmanager
+    def slot(self, url):
+        host = (urlparse(url).hostname or "").lower()
+        with self._lock:
+            sem = self._slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with sem:
+            if self.delay > 0:
+                with self._lock:
+                    now = time.monotonic()
+                    start = max(now, self._next_start.get(host, 0.0))
+                    self._next_start[host] = start + self.delay
+                if start > now:
+                    time.sleep(start - now)
+            yield
+
+def load_robots(root, gate):
+    """robots.txt rules for the site (None when there is none)."""
+    with gate.slot(root):
+        page = fetch_page(urljoin(root, "/robots.txt"), timeout=CRAWL_TIMEOUT, max_bytes=512 * 1024)
+    if not page.ok or page.status_code != 200:
+        return None
+    robots = RobotFileParser()
+    robots.parse(page.text.splitlines())
+    return robots
+
+# --- 3. SITEMAPS ---
+
+def sitemap_urls(root, gate, robots=None, limit=CRAWL_MAX_PAGES):
+    """
+    Page URLs from the sitemaps listed in robots.txt, or /sitemap.xml.
+    Follows sitemap indexes (up to SITEMAP_MAX_FILES files) and .xml.gz.
+    """
+    queue = deque((robots.site_maps() if robots else None) or [urljoin(root, "/sitemap.xml")])
+    seen, urls = set(), []
+    while queue and len(seen) < SITEMAP_MAX_FILES and len(urls) < limit:
+        url = queue.popleft()
+        if url in seen:
+            continue
+        seen.add(url)
+        with gate.slot(url):
+            page = fetch_page(url, timeout=CRAWL_TIMEOUT, max_bytes=SITEMAP_MAX_BYTES)
+        if not page.ok or page.status_code != 200:
+            continue
+        body = page.body
+        if body[:2] == b"\x1f\x8b":
+            try:
+                body = gzip.decompress(body)
+            except (OSError, EOFError):
+                continue
+        locs = [html.unescape(m.decode("utf-8", "replace")) for m in _LOC.findall(body)]
+        if b"<sitemapindex" in body[:2048].lower():
+            queue.extend(locs)
+        else:
+            urls.extend(locs[:limit - len(urls)])
+    return urls
+
+# --- 4. PAGE VISIT ---
+
+def _summarize(page, url, depth, referrer, links_found):
+    """The only thing kept per page: a few hundred bytes, never the body."""
+    return {
+        "url": url, "final_url": page.final_url, "depth": depth, "referrer": referrer,
+        "status": page.status_code, "error": page.error, "bytes": len(page.body or b""),
+        "ms": round(page.elapsed * 1000, 1), "links": links_found,
+        "title": None, "description": None, "canonical": None, "h1_count": None,
+        "noindex": False, "tech": []
+    }
+
+def visit(url, depth, referrer, gate, page=None):
+    """
+    Fetches (unless `page` is given) and analyses one page.
+    Returns (summary, outgoing links). Never raises: a failure is recorded
+    in the summary's "error" so one bad page can't end the crawl.
+    """
+    summary = None
+    try:
+        if page is None:
+            with gate.slot(url):
+                page = fetch_page(url, timeout=CRAWL_TIMEOUT, max_bytes=CRAWL_MAX_BYTES)
+        summary = _summarize(page, url, depth, referrer, 0)
+        is_html = "html" in (page.headers.get("Content-Type") or "text/html").lower()
+        if not page.ok or page.status_code >= 400 or not is_html or not page.body:
+            return summary, []
+
+        with metrics.span("crawl_page"):
+            seo = extract_seo_from_page(page)
+            tech = fingerprint(page)
+            links = extract_links(page)
+    except Exception as e:
+        print(f"Crawl Error: {url}: {e}")
+        summary = summary or _summarize(PageResponse(url), url, depth, referrer, 0)
+        summary["error"] = str(e) or e.__class__.__name__
+        return summary, []
+    summary.update(
+        title=seo["title"], description=seo["description"], canonical=seo["canonical"],
+        h1_count=seo["h1_count"], noindex="noindex" in (seo["robots"] or "").lower(),
+        tech=[t["name"] for t in tech if t["confidence"] >= MIN_CONFIDENCE], links=len(links)
+    )
+    return summary, links
+
+# --- 5. CRAWL ---
+
+def crawl(start_url, max_pages=CRAWL_MAX_PAGES, max_depth=CRAWL_MAX_DEPTH, workers=CRAWL_WORKERS,
+          gate=None, seed_page=None, use_sitemap=True, stats=None):
+    """
+    Breadth-first crawl of start_url's site. Yields one page summary as each
+    page finishes (in completion order). The frontier is seeded with the
+    sitemap, deduplicated, limited to the same site (www or not) and to
+    robots.txt-allowed paths. `seed_page` (the audit's already-fetched
+    start page) is analysed without downloading it again.
+    `stats`, if given, receives {"sitemap_urls", "robots", "budget_hit"}.
+    """
+    gate = gate or HostGate()
+    site = _site(start_url)
+    root = f"{urlparse(start_url).scheme or 'https'}://{urlparse(start_url).netloc}"
+    robots = load_robots(root, gate)
+    if robots is not None and robots.crawl_delay("*"):
+        gate.delay = max(gate.delay, float(robots.crawl_delay("*")))
+
+    seen = set()
+    frontier = deque()
+
+    def enqueue(url, depth, referrer):
+        if depth > max_depth or not _crawlable(url, site):
+            return
+        key = _frontier_key(url)
+        if key in seen:
+            return
+        seen.add(key)
+        if robots is not None and not robots.can_fetch("*", url):
+            return
+        frontier.append((url, depth, referrer))
+
+    enqueue(start_url, 0, None)
+    sitemap = sitemap_urls(root, gate, robots, max_pages) if use_sitemap else []
+    for url in sitemap:
+        enqueue(url, 1, "sitemap")
+    if stats is not None:
+        stats.update(sitemap_urls=len(sitemap), robots=robots is not None, budget_hit=False)
+
+    seed = seed_page if seed_page is not None and seed_page.ok and seed_page.body else None
+    submitted = 0
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while frontier or running:
+            while frontier and len(running) < workers and submitted < max_pages:
+                url, depth, referrer = frontier.popleft()
+                page = seed if seed is not None and depth == 0 else None
+                running[pool.submit(metrics.bind(visit), url, depth, referrer, gate, page)] = url
+                submitted += 1
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                summary, links = future.result()
+                # A redirect onto an already-queued URL is the same page
+                seen.add(_frontier_key(summary["final_url"] or summary["url"]))
+                if _site(summary["final_url"] or summary["url"]) == site:
+                    for link in links:
+                        enqueue(link, summary["depth"] + 1, summary["url"])
+                yield summary
+    if stats is not None:
+        stats["budget_hit"] = bool(frontier)
+
+# --- 6. SITE-WIDE AGGREGATION ---
+
+class SiteReport:
+    """Folds page summaries into site-wide counts, samples and findings."""
+    def __init__(self):
+        self.pages = 0
+        self.statuses = {}
+        self.broken = []
+        self.broken_count = 0
+        self.missing = {"title": [], "description": [], "h1": []}
+        self.missing_count = {"title": 0, "description": 0, "h1": 0}
+        self.titles = {}       # title -> pages using it
+        self.noindex = 0
+        self.tech = {}         # tech -> pages it was seen on
+        self.total_ms = 0.0
+        self.total_bytes = 0
+
+    def _sample(self, bucket, url):
+        if len(bucket) < SAMPLE_SIZE:
+            bucket.append(url)
+
+    def add(self, page):
+        self.pages += 1
+        status = str(page["status"]) if page["status"] is not None else "error"
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.total_ms += page["ms"]
+        self.total_bytes += page["bytes"]
+        if page["error"] or (page["status"] or 0) >= 400:
+            self.broken_count += 1
+            if len(self.broken) < SAMPLE_SIZE:
+                self.broken.append({"url": page["url"], "status": page["status"] or page["error"], "from": page["referrer"]})
+            return
+        if page["links"] == 0 and page["title"] is None and page["h1_count"] is None:
+            return  # Not an HTML page
+        for field, missing in (("title", not page["title"]), ("description", not page["description"]), ("h1", not page["h1_count"])):
+            if missing:
+                self.missing_count[field] += 1
+                self._sample(self.missing[field], page["url"])
+        if page["title"]:
+            self.titles[page["title"]] = self.titles.get(page["title"], 0) + 1
+        if page["noindex"]:
+            self.noindex += 1
+        for tech in page["tech"]:
+            self.tech[tech] = self.tech.get(tech, 0) + 1
+
+    def findings(self):
+        findings = []
+        if self.broken_count:
+            findings.append(f"{self.broken_count} broken page(s) linked from the site")
+        for field, label in (("title", "<title>"), ("description", "meta description"), ("h1", "<h1> heading")):
+            if self.missing_count[field]:
+                findings.append(f"{self.missing_count[field]} of {self.pages} pages have no {label}")
+        dupes = sum(n for n in self.titles.values() if n > 1)
+        if dupes:
+            findings.append(f"{dupes} pages share a duplicate title")
+        if self.noindex:
+            findings.append(f"{self.noindex} page(s) are marked noindex")
+        return findings
+
+    def summary(self, elapsed=0.0, stats=None):
+        stats = stats or {}
+        duplicates = sorted(((t, n) for t, n in self.titles.items() if n > 1), key=lambda x: -x[1])[:SAMPLE_SIZE]
+        return {
+            "pages": self.pages, "elapsed": round(elapsed, 2),
+            "avg_ms": round(self.total_ms / self.pages, 1) if self.pages else None,
+            "bytes": self.total_bytes, "statuses": self.statuses,
+            "sitemap_urls": stats.get("sitemap_urls", 0), "robots": stats.get("robots", False),
+            "budget_hit": stats.get("budget_hit", False),
+            "broken": self.broken, "broken_count": self.broken_count,
+            "missing": self.missing, "missing_count": self.missing_count,
+            "duplicate_titles": [{"title": t, "pages": n} for t, n in duplicates],
+            "noindex": self.noindex,
+            "tech": dict(sorted(self.tech.items(), key=lambda x: -x[1])),
+            "findings": self.findings()
+        }
+
+def crawl_site(start_url, seed_page=None, on_page=None, max_pages=CRAWL_MAX_PAGES, **kwargs):
+    """
+    Crawls the site and returns the site-wide summary dict (see SiteReport).
+    on_page(summary) is called for every page as it is analysed.
+    """
+    report = SiteReport()
+    stats = {}
+    start = time.perf_counter()
+    with metrics.span("crawl"):
+        for page in crawl(start_url, max_pages=max_pages, seed_page=seed_page, stats=stats, **kwargs):
+            report.add(page)
+            if on_page:
+                on_page(page)
+    return report.summary(time.perf_counter() - start, stats)
+
+def audit_site(start_url, page=None, max_pages=CRAWL_AUDIT_PAGES, **kwargs):
+    """
+    crawl_site() for an audit, on the (opt-in) CRAWL_AUDIT_PAGES budget. While the audit's start page is unchanged
+    (page.unchanged, see incremental.py) the stored summary of the last
+    crawl is returned instead, for up to CRAWL_REUSE_TTL seconds.
+    """
+    key = normalize_url(start_url)
+    page_key = getattr(page, "analysis_key", None)
+    stored = SITE_SUMMARIES.get(key)
+    reuse = getattr(page, "unchanged", False) and stored is not MISS and stored["analysis_key"] == page_key
+    metrics.count_cache("site_summary", reuse)
+    if reuse:
+        return stored["summary"]
+    summary = crawl_site(start_url, seed_page=page, max_pages=max_pages, **kwargs)
+    if page_key is not None:
+        SITE_SUMMARIES.set(key, {"analysis_key": page_key, "summary": summary})
+    return summary
@@ -0,0 +1,256 @@
+"""
+Module: dns_intel.py
+Description: DNS Intelligence (shared TTL-honouring resolver cache, bulk lookups, email-security findings)
+One pass per domain: A/AAAA for the host, MX/NS/TXT for its organizational
+domain and TXT for _dmarc.<domain>, all issued concurrently. The resolved addresses are
+handed to the port scanner and the TLS probe so neither resolves again.
+dnspython is imported on first use; without it only A/AAAA are resolved
+(through the system resolver).
+"""
+import ipaddress
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import metrics
+from cache import DiskCache, LRUCache, TieredCache, MISS
+
+DNS_TIMEOUT = config.get_float("DNS_TIMEOUT", 3.0)    # Seconds per lookup, retries included
+DNS_WORKERS = config.get_int("DNS_WORKERS", 32)       # Concurrent queries in a bulk lookup
+DNS_MIN_TTL = 60                                      # Floor/ceiling on cached record lifetimes
+DNS_MAX_TTL = 86400
+NEGATIVE_TTL = 300                                    # NXDOMAIN / no such record
+
+# "<rdtype>|<name>" -> list of record strings (MX as dicts); per-entry TTL from the answer
+DNS_CACHE = TieredCache(LRUCache(max_entries=4096, ttl=DNS_MAX_TTL), DiskCache("dns", ttl=DNS_MAX_TTL, max_entries=50000))
+
+HOST_TYPES = ("A", "AAAA")
+DOMAIN_TYPES = ("MX", "NS", "TXT")
+
+# --- 1. RESOLVER ---
+
+_resolver = None
+_resolver_lock = threading.Lock()
+_warned = False
+
+def _get_resolver():
+    """Process-wide dnspython Resolver, or None when dnspython is missing."""
+    global _resolver, _warned
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                try:
+                    import dns.resolver
+                except ImportError:
+                    if not _warned:
+                        print("DNS Warning: dnspython not installed, only A/AAAA records are resolved")
+                        _warned = True
+                    return None
+                resolver = dns.resolver.Resolver()
+                resolver.lifetime = DNS_TIMEOUT
+                nameservers = config.get("DNS_NAMESERVERS")
+                if nameservers:
+                    resolver.nameservers = [ns.strip() for ns in nameservers.split(",") if ns.strip()]
+                _resolver = resolver
+    return _resolver
+
+def _record_text(rdtype, rdata):
+    if rdtype in HOST_TYPES:
+        return rdata.address
+    if rdtype == "MX":
+        return {"preference": rdata.preference, "exchange": rdata.exchange.to_text().rstrip(".")}
+    if rdtype == "NS":
+        return rdata.target.to_text().rstrip(".")
+    if rdtype == "SOA":
+        return rdata.mname.to_text().rstrip(".")
+    if rdtype == "TXT":
+        return b"".join(rdata.strings).decode("utf-8", "replace")
+    return rdata.to_text()
+
+def _resolve_system(name, rdtype):
+    # Fallback without dnspython: getaddrinfo has no TTLs, so use the floor
+    family = socket.AF_INET if rdtype == "A" else socket.AF_INET6
+    try:
+        infos = socket.getaddrinfo(name, None, family, socket.SOCK_STREAM)
+    except socket.gaierror:
+        return [], NEGATIVE_TTL
+    return list(dict.fromkeys(info[4][0] for info in infos)), DNS_MIN_TTL
+
+def _resolve(name, rdtype):
+    """(records, ttl). Raises only on transient failures (timeouts, SERVFAIL), which are not cached."""
+    resolver = _get_resolver()
+    if resolver is None:
+        if rdtype not in HOST_TYPES:
+            raise RuntimeError("dnspython not installed")
+        return _resolve_system(name, rdtype)
+    import dns.resolver
+    with metrics.span("dns", rdtype=rdtype):
+        try:
+            answer = resolver.resolve(name, rdtype, raise_on_no_answer=False)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return [], NEGATIVE_TTL
+    if answer.rrset is None:
+        return [], NEGATIVE_TTL
+    ttl = max(DNS_MIN_TTL, min(DNS_MAX_TTL, answer.rrset.ttl))
+    return [_record_text(rdtype, r) for r in answer.rrset], ttl
+
+def query(name, rdtype):
+    """Cached lookup of one record set. Raises on transient resolver failures."""
+    name = name.lower().rstrip(".")
+    key = f"{rdtype}|{name}"
+    records = DNS_CACHE.get(key)
+    metrics.count_cache("dns", records is not MISS)
+    if records is MISS:
+        records, ttl = _resolve(name, rdtype)
+        DNS_CACHE.set(key, records, ttl)
+    return records
+
+# --- 2. BULK LOOKUPS ---
+
+def _bare_host(host):
+    host = (host or "").lower().rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+def mail_domain(host):
+    """
+    The domain whose MX/SPF/DMARC records govern mail for `host`: the host
+    itself or the closest parent that is a zone apex (SOA) or receives mail
+    (MX). shop.example.com -> example.com; example.co.uk stays as is.
+    Falls back to the host (minus www.) when nothing answers.
+    """
+    host = _bare_host(host)
+    labels = host.split(".")
+    if len(labels) <= 2 or _is_ip(host):
+        return host
+    for i in range(len(labels) - 1):
+        candidate = ".".join(labels[i:])
+        try:
+            if query(candidate, "SOA") or query(candidate, "MX"):
+                return candidate
+        except Exception:
+            break  # Resolver trouble or no dnspython: don't guess
+    return host
+
+def _queries(host, domain):
+    return [(host, t) for t in HOST_TYPES] + [(domain, t) for t in DOMAIN_TYPES] + [(f"_dmarc.{domain}", "TXT")]
+
+def lookup_many(hosts, max_workers=DNS_WORKERS):
+    """
+    DNS intelligence for many hosts in one concurrent pass. Every distinct
+    (name, type) is queried once, however many hosts share it.
+    Returns {host: record dict}. Never raises.
+    """
+    hosts = [h for h in dict.fromkeys(h.lower().rstrip(".") for h in hosts if h)]
+    literals = {h: _literal_record(h) for h in hosts if _is_ip(h)}
+    hosts = [h for h in hosts if h not in literals]
+    if not hosts:
+        return literals
+
+    def run(job):
+        try:
+            return query(*job), None
+        except Exception as e:
+            return [], str(e) or e.__class__.__name__
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(hosts) * 6))) as pool:
+        # Subdomains need their organizational domain before its mail records can be queried
+        domain_futures = [pool.submit(metrics.bind(mail_domain), h) for h in hosts]
+        domains = {h: f.result() for h, f in zip(hosts, domain_futures)}
+        jobs = list(dict.fromkeys(q for h in hosts for q in _queries(h, domains[h])))
+        futures = [pool.submit(metrics.bind(run), job) for job in jobs]
+        answers = {job: f.result() for job, f in zip(jobs, futures)}
+    records = {h: _host_record(h, domains[h], answers) for h in hosts}
+    records.update(literals)
+    return records
+
+def lookup(host):
+    """lookup_many() for a single host. Returns its record dict."""
+    return lookup_many([host]).get((host or "").lower().rstrip("."), empty_dns(host))
+
+def empty_dns(host=None, domain=None):
+    return {
+        "host": host, "domain": domain or _bare_host(host), "a": [], "aaaa": [], "mx": [], "ns": [], "txt": [],
+        "spf": None, "dmarc": None, "dmarc_policy": None, "errors": {}, "findings": []
+    }
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+def _literal_record(host):
+    # An IP target has nothing to resolve and no mail domain to judge
+    record = empty_dns(host)
+    record["domain"] = None
+    record["aaaa" if ":" in host else "a"] = [host]
+    return record
+
+def first_address(record):
+    """The address port scans and TLS probes should connect to (IPv4 preferred), or None."""
+    record = record or {}
+    return next(iter(record.get("a") or record.get("aaaa") or []), None)
+
+def _host_record(host, domain, answers):
+    record = empty_dns(host, domain)
+    sources = {"a": (host, "A"), "aaaa": (host, "AAAA"), "mx": (domain, "MX"), "ns": (domain, "NS"), "txt": (domain, "TXT")}
+    for field, job in sources.items():
+        record[field], error = answers[job]
+        if error:
+            record["errors"][job[1]] = error
+    record["mx"] = sorted(record["mx"], key=lambda mx: mx["preference"])
+
+    spf = [t for t in record["txt"] if t.lower().startswith("v=spf1")]
+    record["spf"] = spf[0] if spf else None
+    dmarc_txt, error = answers[(f"_dmarc.{domain}", "TXT")]
+    if error:
+        record["errors"]["DMARC"] = error
+    dmarc = [t for t in dmarc_txt if t.lower().startswith("v=dmarc1")]
+    record["dmarc"] = dmarc[0] if dmarc else None
+    record["dmarc_policy"] = _dmarc_tag(record["dmarc"], "p")
+    record["findings"] = email_findings(record, spf_count=len(spf), dmarc_count=len(dmarc))
+    return record
+
+# --- 3. EMAIL-SECURITY FINDINGS ---
+
+def _dmarc_tag(dmarc, tag):
+    for part in (dmarc or "").split(";"):
+        key, _, value = part.strip().partition("=")
+        if key.strip().lower() == tag:
+            return value.strip().lower()
+    return None
+
+def email_findings(record, spf_count=None, dmarc_count=None):
+    """Turns a DNS record dict into report-ready sentences (same style as tls_findings)."""
+    findings = []
+    if "TXT" in record["errors"] or "DMARC" in record["errors"]:
+        return ["Email security could not be checked (DNS lookup failed)"]
+    domain = record["domain"]
+    if not record["mx"] and "MX" not in record["errors"]:
+        findings.append(f"No MX records: {domain} does not receive email")
+
+    spf = (record["spf"] or "").lower()
+    if not spf:
+        findings.append(f"No SPF record: anyone can send mail as @{domain}")
+    elif (spf_count or 1) > 1:
+        findings.append("Multiple SPF records (invalid: receivers ignore SPF entirely)")
+    elif spf.endswith("+all") or spf.endswith(" all"):
+        findings.append("SPF allows any sender (+all)")
+    elif spf.endswith("?all"):
+        findings.append("SPF ends in ?all (neutral: gives no protection)")
+
+    policy = record["dmarc_policy"]
+    if not record["dmarc"]:
+        findings.append("No DMARC record: spoofed mail is neither rejected nor reported")
+    elif (dmarc_count or 1) > 1:
+        findings.append("Multiple DMARC records (invalid: receivers ignore DMARC)")
+    elif policy == "none":
+        findings.append("DMARC policy is p=none (monitoring only, spoofed mail is still delivered)")
+    elif policy not in ("quarantine", "reject"):
+        findings.append("DMARC record has no valid policy (p=)")
+
+    if len(record["ns"]) == 1:
+        findings.append(f"Only one nameserver ({record['ns'][0]}): no DNS redundancy")
+    return findings
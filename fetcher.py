@@ -0,0 +1,183 @@
+"""
+Module: fetcher.py
+Description: Shared Single-Fetch Page Layer (one download per target, pooled connections)
+"""
+import codecs
+import re
+import threading
+import time
+import warnings
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import metrics
+
+# --- 1. SHARED SESSION ---
+
+DEFAULT_TIMEOUT = 10
+POOL_SIZE = 32
+MAX_BODY_BYTES = 2 * 1024 * 1024   # Memory per page stays bounded, however big the site is
+CHUNK_SIZE = 16 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_headers():
+    # This makes the request look like a real Chrome browser
+    return {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.5"
+    }
+
+def normalize_url(url):
+    """"HTTPS://www.Acme.com/" and "acme.com" are the same target."""
+    url = (url or "").strip()
+    parsed = urlparse(url if "//" in url else f"//{url}")
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parsed.path.rstrip("/")
+    return host + path
+
+def get_session():
+    """
+    Returns the process-wide requests.Session (keep-alive + connection pool).
+    Safe to share between threads for plain GETs.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                s.headers.update(get_headers())
+                _session = s
+    return _session
+
+# --- 2. PAGE RESPONSE ---
+
+class PageResponse:
+    """
+    Everything the analyzers need from one GET of a target page.
+    ssl_ok is None for plain http:// targets, True/False for https://.
+    headers is case-insensitive, like requests' own.
+    """
+    def __init__(self, url):
+        self.url = url
+        self.final_url = url
+        self.status_code = None
+        self.headers = CaseInsensitiveDict()
+        self.body = b""
+        self.truncated = False
+        self.encoding = None
+        self.ssl_ok = None
+        self.ssl_error = None
+        self.error = None
+        self.not_modified = False   # 304 answer to a conditional GET (body is empty)
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None and self.status_code is not None
+
+    def iter_chunks(self, chunk_size=CHUNK_SIZE):
+        # Lets stream-style consumers (seo_extractor) read a fetched page the same way
+        view = memoryview(self.body)
+        for i in range(0, len(view), chunk_size):
+            yield view[i:i + chunk_size].tobytes()
+
+    @property
+    def text(self):
+        if not self.body: return ""
+        return self.body.decode(self.encoding or "utf-8", errors="replace")
+
+    def __repr__(self):
+        return f"<PageResponse {self.final_url} status={self.status_code} bytes={len(self.body)} ssl={self.ssl_ok}>"
+
+# --- 3. FETCH ---
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w-]+)""", re.I)
+
+def _guess_encoding(response, head):
+    # requests defaults charset-less text/html to ISO-8859-1; prefer the page's own <meta charset>
+    if "charset" in response.headers.get("content-type", "").lower():
+        return response.encoding
+    m = _META_CHARSET.search(head)
+    if m:
+        try:
+            return codecs.lookup(m.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+def iter_body(response, max_bytes=MAX_BODY_BYTES, chunk_size=CHUNK_SIZE):
+    """Yields raw body chunks from a stream=True response, stopping at max_bytes."""
+    read = 0
+    for chunk in response.iter_content(chunk_size):
+        if not chunk: continue
+        if read + len(chunk) > max_bytes:
+            yield chunk[:max_bytes - read]
+            return
+        read += len(chunk)
+        yield chunk
+
+def _fill(page, response, max_bytes):
+    page.final_url = response.url
+    page.status_code = response.status_code
+    page.headers = CaseInsensitiveDict(response.headers)
+    buf = bytearray()
+    try:
+        for chunk in iter_body(response, max_bytes):
+            buf += chunk
+        page.truncated = len(buf) >= max_bytes
+    finally:
+        response.close()
+    page.body = bytes(buf)
+    page.encoding = _guess_encoding(response, page.body[:4096])
+
+def fetch_page(url, timeout=DEFAULT_TIMEOUT, max_bytes=MAX_BODY_BYTES, headers=None):
+    """
+    Downloads a page exactly once and records status, headers, body,
+    TLS outcome and timing. Never raises: failures land in page.error.
+    The body is streamed and capped at max_bytes (page.truncated tells).
+
+    If certificate verification fails we still fetch the page unverified,
+    so SEO/tech checks keep working while ssl_ok reports the problem.
+    Extra `headers` (e.g. If-None-Match) are sent on top of the session's.
+    """
+    page = PageResponse(url)
+    session = get_session()
+    start = time.perf_counter()
+    with metrics.span("fetch"):
+        try:
+            response = session.get(url, timeout=timeout, stream=True, headers=headers)
+            _fill(page, response, max_bytes)
+            if response.url.startswith("https://"):
+                page.ssl_ok = True
+        except requests.exceptions.SSLError as e:
+            page.ssl_ok = False
+            page.ssl_error = str(e)
+            metrics.count_error("fetch", "SSLError")
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    response = session.get(url, timeout=timeout, verify=False, stream=True, headers=headers)
+                _fill(page, response, max_bytes)
+            except Exception as e2:
+                page.error = str(e2)
+                metrics.count_error("fetch", e2.__class__.__name__)
+        except Exception as e:
+            page.error = str(e)
+            metrics.count_error("fetch", e.__class__.__name__)
+            if url.startswith("https://"):
+                page.ssl_ok = False
+    page.not_modified = page.status_code == 304
+    metrics.count_bytes("page", len(page.body or b""))
+    page.elapsed = time.perf_counter() - start
+    return page
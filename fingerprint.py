@@ -0,0 +1,230 @@
+"""
+Module: fingerprint.py
+Description: Single-pass Tech-Stack Fingerprinting Engine (signatures live in data/tech_signatures.json)
+"""
+import json
+import os
+import re
+import threading
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SIGNATURES_PATH = os.path.join(DATA_DIR, "tech_signatures.json")
+
+MIN_CONFIDENCE = 50       # Below this a technology is reported only by fingerprint()
+META_SCAN_BYTES = 256 * 1024  # <meta> tags and version strings live near the top of the page
+BODY_WINDOW = 64 * 1024       # Body is lowercased one window at a time
+
+# Default weight of one matching pattern, per evidence source
+SOURCE_CONFIDENCE = {"headers": 100, "meta": 100, "cookies": 90, "scripts": 80, "body": 60}
+
+_META_TAG = re.compile(rb"<meta\s[^>]*>", re.I)
+_META_ATTR = re.compile(rb"""(name|property|http-equiv|content)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.I)
+_SCRIPT_SRC = re.compile(rb"""<script[^>]+src\s*=\s*["']?([^"'\s>]+)""", re.I)
+
+# --- 1. SIGNATURE DATABASE ---
+
+def _split_pattern(raw, source):
+    # "literal;confidence:40" -> ("literal", 40)
+    literal, _, opts = raw.partition(";confidence:")
+    return literal.lower(), int(opts) if opts else SOURCE_CONFIDENCE[source]
+
+def _trie_pattern(literals):
+    """
+    Builds one regex from all literals, factored as a prefix trie
+    (e.g. "wp-(?:content/|includes/)"). The regex engine then does one
+    cheap branch per position instead of one try per literal.
+    """
+    trie = {}
+    for lit in literals:
+        node = trie
+        for byte in lit:
+            node = node.setdefault(byte, {})
+        node[None] = True
+
+    def build(node):
+        alts = [re.escape(bytes([b])) + build(child) for b, child in sorted((k, v) for k, v in node.items() if k is not None)]
+        if not alts: return b""
+        if len(alts) == 1 and None not in node: return alts[0]
+        # Greedy "?" keeps the longest literal when a shorter one ends here
+        return b"(?:" + b"|".join(alts) + b")" + (b"?" if None in node else b"")
+
+    return build(trie)
+
+class SignatureDB:
+    """
+    Compiled form of the signature file. Every body pattern of every
+    technology goes into ONE trie-shaped regex, so the page body is scanned
+    once no matter how many signatures exist.
+    """
+    def __init__(self, raw):
+        self.techs = {name: spec for name, spec in raw.items() if not name.startswith("_")}
+        self.headers = {}   # header name -> [(substring, tech, confidence)]
+        self.cookies = []   # [(name prefix, tech, confidence)]
+        self.meta = {}      # meta name -> [(substring, tech, confidence)]
+        self.scripts = []   # [(substring, tech, confidence)]
+        body = {}           # literal -> [(tech, confidence)]
+        self.versions = {}  # tech -> [compiled regex]
+
+        for tech, spec in self.techs.items():
+            for header, raw_pat in spec.get("headers", {}).items():
+                lit, conf = _split_pattern(raw_pat, "headers")
+                self.headers.setdefault(header.lower(), []).append((lit, tech, conf))
+            for raw_pat in spec.get("cookies", []):
+                lit, conf = _split_pattern(raw_pat, "cookies")
+                self.cookies.append((lit, tech, conf))
+            for meta_name, raw_pat in spec.get("meta", {}).items():
+                lit, conf = _split_pattern(raw_pat, "meta")
+                self.meta.setdefault(meta_name.lower(), []).append((lit, tech, conf))
+            for raw_pat in spec.get("scripts", []):
+                lit, conf = _split_pattern(raw_pat, "scripts")
+                self.scripts.append((lit, tech, conf))
+            for raw_pat in spec.get("body", []):
+                lit, conf = _split_pattern(raw_pat, "body")
+                body.setdefault(lit.encode("utf-8"), []).append((tech, conf))
+            if spec.get("version"):
+                self.versions[tech] = [re.compile(v.encode("utf-8"), re.I) for v in spec["version"]]
+
+        # The matcher reports the longest literal starting at each position
+        # (a zero-width lookahead, so matches may overlap), which would still
+        # miss a literal inside another. Credit contained literals explicitly.
+        self.body_hits = {}
+        for lit in body:
+            self.body_hits[lit] = [(t, c) for other, owners in body.items() if other in lit for t, c in owners]
+        self.body_regex = re.compile(b"(?=(" + _trie_pattern(body) + b"))") if body else None
+        self.body_max_len = max((len(l) for l in body), default=0)
+
+_db = None
+_db_lock = threading.Lock()
+
+def load_signatures(path=SIGNATURES_PATH, reload=False):
+    global _db
+    if _db is None or reload:
+        with _db_lock:
+            if _db is None or reload:
+                with open(path, encoding="utf-8") as f:
+                    _db = SignatureDB(json.load(f))
+    return _db
+
+# --- 2. EVIDENCE EXTRACTION ---
+
+def _meta_tags(body):
+    metas = []
+    for tag in _META_TAG.finditer(body, 0, min(len(body), META_SCAN_BYTES)):
+        attrs = {}
+        for m in _META_ATTR.finditer(tag.group(0)):
+            value = m.group(2) or m.group(3) or m.group(4) or b""
+            attrs[m.group(1).decode("ascii").lower()] = value.decode("utf-8", "replace")
+        key = attrs.get("name") or attrs.get("property") or attrs.get("http-equiv")
+        if key and "content" in attrs:
+            metas.append((key.lower(), attrs["content"]))
+    return metas
+
+def _cookie_names(headers):
+    raw = headers.get("set-cookie", "")
+    # requests folds repeated Set-Cookie headers into one comma-joined value
+    return [part.split("=", 1)[0].strip().lower() for part in re.split(r",\s*(?=[^;,\s]+=)", raw) if "=" in part]
+
+# --- 3. MATCHING ---
+
+class _Evidence:
+    def __init__(self):
+        self.by_source = {}   # source -> best confidence
+        self.snippets = []    # strings the version regexes may look at
+
+    def add(self, source, confidence, snippet=None):
+        self.by_source[source] = max(self.by_source.get(source, 0), confidence)
+        if snippet:
+            self.snippets.append(snippet)
+
+    @property
+    def confidence(self):
+        return min(100, sum(self.by_source.values()))
+
+def fingerprint(page, db=None):
+    """
+    Detects technologies on a fetcher.PageResponse.
+    Returns [{"name", "confidence", "version", "categories", "evidence"}],
+    highest confidence first.
+    """
+    db = db or load_signatures()
+    found = {}
+    headers = {k.lower(): str(v) for k, v in (page.headers or {}).items()}
+    body = page.body or b""
+
+    def hit(tech, source, conf, snippet=None):
+        found.setdefault(tech, _Evidence()).add(source, conf, snippet)
+
+    # A. Headers (tiny, lowercasing them is free)
+    for name, value in headers.items():
+        for lit, tech, conf in db.headers.get(name, ()):
+            if lit in value.lower():
+                hit(tech, "headers", conf, f"{name}: {value}")
+
+    # B. Cookies
+    for cookie in _cookie_names(headers):
+        for prefix, tech, conf in db.cookies:
+            if cookie.startswith(prefix):
+                hit(tech, "cookies", conf)
+
+    if body:
+        # C. Meta tags (head region only)
+        for name, content in _meta_tags(body):
+            for lit, tech, conf in db.meta.get(name, ()):
+                if lit in content.lower():
+                    hit(tech, "meta", conf, content)
+
+        # D. Script sources
+        for m in _SCRIPT_SRC.finditer(body):
+            src = m.group(1).decode("utf-8", "replace").lower()
+            for lit, tech, conf in db.scripts:
+                if lit in src:
+                    hit(tech, "scripts", conf, src)
+
+        # E. Body: one pass, lowercased a window at a time (never the whole page)
+        if db.body_regex is not None:
+            for lit in _scan_body(db, body):
+                for tech, conf in db.body_hits[lit]:
+                    hit(tech, "body", conf)
+
+    # F. Implied technologies (WooCommerce -> WordPress) inherit the confidence
+    for tech in list(found):
+        for implied in db.techs.get(tech, {}).get("implies", []):
+            if implied not in found:
+                found.setdefault(implied, _Evidence()).add("implied", found[tech].confidence)
+
+    results = []
+    for tech, ev in found.items():
+        results.append({
+            "name": tech,
+            "confidence": ev.confidence,
+            "version": _find_version(db, tech, ev, body),
+            "categories": db.techs.get(tech, {}).get("categories", []),
+            "evidence": sorted(ev.by_source)
+        })
+    results.sort(key=lambda r: (-r["confidence"], r["name"]))
+    return results
+
+def _scan_body(db, body):
+    # Windows overlap by the longest literal, so nothing straddling a
+    # boundary is lost; matches are only counted in the window they start in.
+    seen = set()
+    overlap = max(db.body_max_len - 1, 0)
+    for start in range(0, len(body), BODY_WINDOW):
+        window = body[start:start + BODY_WINDOW + overlap].lower()
+        for m in db.body_regex.finditer(window):
+            if m.start() >= BODY_WINDOW: break
+            lit = m.group(1)
+            if lit not in seen:
+                seen.add(lit)
+                yield lit
+        if len(seen) == len(db.body_hits): break
+
+def _find_version(db, tech, evidence, body):
+    # Only runs for detected technologies, so the cost doesn't grow with the DB
+    for regex in db.versions.get(tech, ()):
+        for snippet in evidence.snippets:
+            m = regex.search(snippet.encode("utf-8", "replace"))
+            if m: return m.group(1).decode("ascii", "replace").strip(".")
+        m = regex.search(body, 0, META_SCAN_BYTES)
+        if m: return m.group(1).decode("ascii", "replace").strip(".")
+    return None
@@ -0,0 +1,136 @@
+"""
+Module: incremental.py
+Description: Incremental Re-audits (conditional GETs + content-addressed SEO/tech results)
+A re-audit of an unchanged site sends If-None-Match / If-Modified-Since and,
+on a 304 or an identical body, reuses the stored SEO and tech analysis
+instead of parsing and fingerprinting the page again.
+"""
+import hashlib
+import threading
+import time
+
+import config
+import metrics
+from cache import DiskCache, MISS
+from fetcher import fetch_page, normalize_url
+from fingerprint import load_signatures, SIGNATURES_PATH, _cookie_names
+
+STATE_TTL = config.get_int("PAGE_STATE_TTL", 90 * 86400)
+
+# url -> {"etag", "last_modified", "analysis_key", "hsts", "fetched_at"}
+PAGE_STATE = DiskCache("page_state", ttl=STATE_TTL, max_entries=config.get_int("PAGE_STATE_MAX_ENTRIES", 20000))
+# "<kind>|<analysis_key>" -> seo dict / tech list (same input, same output)
+ANALYSIS = DiskCache("analysis", ttl=STATE_TTL, max_entries=config.get_int("ANALYSIS_MAX_ENTRIES", 20000))
+
+KINDS = ("seo", "tech")
+
+# --- 1. CONTENT KEYS ---
+
+_signatures_digest = None
+_signatures_lock = threading.Lock()
+
+def _signatures_version():
+    # Editing data/tech_signatures.json must invalidate every stored fingerprint
+    global _signatures_digest
+    if _signatures_digest is None:
+        with _signatures_lock:
+            if _signatures_digest is None:
+                with open(SIGNATURES_PATH, "rb") as f:
+                    _signatures_digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    return _signatures_digest
+
+def analysis_key(page):
+    """
+    Hash of everything the SEO and tech extractors read: the body, the
+    response headers the signature DB matches on, and the cookie names.
+    Volatile headers (Date, ETag, request ids) are left out on purpose.
+    """
+    db = load_signatures()
+    headers = {k.lower(): str(v) for k, v in (page.headers or {}).items()}
+    relevant = sorted((k, v) for k, v in headers.items() if k in db.headers)
+    digest = hashlib.sha256(page.body or b"")
+    digest.update(repr((relevant, sorted(_cookie_names(headers)), page.truncated)).encode("utf-8"))
+    digest.update(_signatures_version().encode("ascii"))
+    return digest.hexdigest()
+
+def _has_analysis(key):
+    return all(ANALYSIS.get(f"{kind}|{key}") is not MISS for kind in KINDS)
+
+# --- 2. CONDITIONAL FETCH ---
+
+def fetch_incremental(url, **kwargs):
+    """
+    fetch_page() that remembers the target's validators between audits.
+    Sets page.analysis_key, and page.unchanged when the server answered 304
+    or returned a body identical to the last audit's. A 304 page has no
+    body: its SEO/tech results must come from analysis(). Servers often
+    leave Strict-Transport-Security off a 304, so the last full response's
+    value is put back on it.
+    """
+    state_key = normalize_url(url)
+    state = PAGE_STATE.get(state_key)
+    headers = {}
+    # Only ask for a 304 if we can still answer from stored results
+    if state is not MISS and _has_analysis(state["analysis_key"]):
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+    page = fetch_page(url, headers=headers or None, **kwargs)
+    page.analysis_key = None
+    page.unchanged = False
+
+    if page.not_modified and headers:
+        page.analysis_key = state["analysis_key"]
+        page.unchanged = True
+        if state.get("hsts") and not page.headers.get("Strict-Transport-Security"):
+            page.headers["Strict-Transport-Security"] = state["hsts"]
+        # 304s carry no body; keep the validators the server may have refreshed
+        state = dict(
+            state, etag=page.headers.get("ETag") or state.get("etag"),
+            last_modified=page.headers.get("Last-Modified") or state.get("last_modified"), fetched_at=time.time()
+        )
+        PAGE_STATE.set(state_key, state)
+    elif page.ok and page.status_code < 400:
+        page.analysis_key = analysis_key(page)
+        page.unchanged = state is not MISS and state["analysis_key"] == page.analysis_key
+        PAGE_STATE.set(state_key, {
+            "etag": page.headers.get("ETag"), "last_modified": page.headers.get("Last-Modified"),
+            "analysis_key": page.analysis_key, "hsts": page.headers.get("Strict-Transport-Security"),
+            "fetched_at": time.time()
+        })
+    metrics.count_cache("page_state", page.unchanged)
+    return page
+
+# --- 3. CONTENT-ADDRESSED ANALYSIS ---
+
+def analysis(url, page, kind, compute):
+    """
+    compute(url, page) once per distinct page content. A 304 page whose
+    stored result has been evicted is fetched again in full first.
+    """
+    key = getattr(page, "analysis_key", None)
+    if key is None:
+        return compute(url, page)
+
+    cache_key = f"{kind}|{key}"
+    value = ANALYSIS.get(cache_key)
+    metrics.count_cache(f"analysis_{kind}", value is not MISS)
+    if value is not MISS:
+        return value
+
+    if page.not_modified:
+        page = fetch_page(url)
+        if not page.ok:
+            return compute(url, page)
+        if analysis_key(page) != key:
+            # Changed between the 304 and now; don't file it under the old key
+            return compute(url, page)
+    value = compute(url, page)
+    ANALYSIS.set(cache_key, value)
+    return value
+
+def forget(url):
+    """Drops the stored validators so the next audit does a full fetch."""
+    PAGE_STATE.delete(normalize_url(url))
@@ -0,0 +1,201 @@
+"""
+Module: jobs.py
+Description: SQLite-backed Audit Job Queue (shared by the dashboard and any number of worker processes)
+Workers on other hosts can share the queue through a common RECON_JOBS_DB path,
+as long as the filesystem supports SQLite locking (local disk or a proper
+shared volume; NFS locking is not reliable).
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+import config
+from cache import CACHE_DIR
+
+JOBS_DB = config.get("RECON_JOBS_DB") or os.path.join(CACHE_DIR, "jobs.sqlite3")
+MAX_ATTEMPTS = 3          # A job whose worker died is retried this many times in total
+STALE_AFTER = 120         # Seconds without a heartbeat before a running job counts as abandoned
+WORKER_SEEN_WINDOW = 30   # Seconds; workers that checked in within this are "active"
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# --- 1. QUEUE ---
+
+class JobQueue:
+    """
+    One row per audit job: queued -> running -> done | failed.
+    claim() is atomic across processes (BEGIN IMMEDIATE), so a job is never
+    handed to two workers. Running jobs record finished stages as they go,
+    so the dashboard can show partial results.
+    """
+    def __init__(self, path=None):
+        self.path = path or JOBS_DB
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, status TEXT NOT NULL,"
+            " name TEXT, location TEXT, url TEXT,"
+            " partial TEXT NOT NULL DEFAULT '{}', result TEXT, error TEXT,"
+            " worker TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL, started_at REAL, heartbeat_at REAL, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS workers ("
+            " id TEXT PRIMARY KEY, host TEXT, pid INTEGER, seen_at REAL NOT NULL)"
+        )
+
+    def submit(self, name, location, url=None):
+        job_id = uuid.uuid4().hex[:16]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, name, location, url, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, name or "", location or "", url or None, time.time())
+            )
+        return job_id
+
+    def claim(self, worker_id):
+        """Oldest queued job, marked running for worker_id. Returns a job dict or None."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1,"
+                        " started_at = ?, heartbeat_at = ?, partial = '{}' WHERE id = ?",
+                        (RUNNING, worker_id, now, now, row["id"])
+                    )
+                    # Hand back the row as claimed, not as it was queued
+                    row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return _job(row) if row is not None else None
+
+    def record_stage(self, job_id, stage, value=None, error=None):
+        """Merges one finished stage into the job's partial result (also a heartbeat)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT partial FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                partial = json.loads(row["partial"]) if row else {}
+                if error is None:
+                    partial.setdefault("stages", {})[stage] = value
+                else:
+                    partial.setdefault("errors", {})[stage] = error
+                self._conn.execute(
+                    "UPDATE jobs SET partial = ?, heartbeat_at = ? WHERE id = ?",
+                    (json.dumps(partial, default=str), time.time(), job_id)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def heartbeat(self, job_id):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def complete(self, job_id, result):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                (DONE, json.dumps(result, default=str), time.time(), job_id)
+            )
+
+    def fail(self, job_id, error):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, str(error), time.time(), job_id)
+            )
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row is not None else None
+
+    def position(self, job_id):
+        """How many queued jobs are ahead of this one (0 = next)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < (SELECT created_at FROM jobs WHERE id = ?)",
+                (QUEUED, job_id)
+            ).fetchone()
+        return row[0]
+
+    def requeue_stale(self, stale_after=STALE_AFTER, max_attempts=MAX_ATTEMPTS):
+        """Jobs whose worker stopped heart-beating go back to the queue (or fail after max_attempts)."""
+        cutoff = time.time() - stale_after
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = 'worker lost', finished_at = ?"
+                " WHERE status = ? AND heartbeat_at < ? AND attempts >= ?",
+                (FAILED, time.time(), RUNNING, cutoff, max_attempts)
+            )
+            return self._conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat_at < ?",
+                (QUEUED, RUNNING, cutoff)
+            ).rowcount
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+    def purge(self, older_than=7 * 86400):
+        """Deletes finished jobs older than `older_than` seconds."""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, time.time() - older_than)
+            ).rowcount
+
+    # --- Worker registry ---
+
+    def worker_seen(self, worker_id):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO workers (id, host, pid, seen_at) VALUES (?, ?, ?, ?)",
+                (worker_id, socket.gethostname(), os.getpid(), time.time())
+            )
+
+    def worker_gone(self, worker_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def active_workers(self, within=WORKER_SEEN_WINDOW):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM workers WHERE seen_at >= ?", (time.time() - within,)
+            ).fetchone()[0]
+
+def _job(row):
+    job = dict(row)
+    job["partial"] = json.loads(job["partial"] or "{}")
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_queue():
+    """Process-wide JobQueue on JOBS_DB."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
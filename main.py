@@ -1,89 +1,253 @@
 """
 Project: B2B Threat & Opportunity Intelligence Tool
-Author: [Your Name]
-Description: Main entry point. Orchestrates Input -> Search -> Analysis -> Reporting.
+Description: Headless bulk-audit entry point.
+Streams a CSV/JSONL of leads -> runs the same pipeline as app.py -> writes JSONL as each target finishes.
+
+Usage:
+    python main.py leads.csv -o results.jsonl --concurrency 8 --narrative
+Re-running the same command resumes: rows already in the checkpoint file are skipped,
+rows that failed (website not found, Serper errors, crashes) are tried again.
+Add --reports reports.zip (or a directory) to render a PDF per audited target at the end.
 """
 
+import argparse
+import csv
+import hashlib
+import json
+import os
 import sys
-from scanner import find_business_url
-from analyzer import check_ssl, check_seo
-from ai_agent import generate_website_strategy
-from reporter import save_audit_report, save_strategy_proposal # <-- NEW IMPORT
-
-def get_target_input():
-    """Collects business data from the user via CLI."""
-    print("\n--- B2B INTEL TOOL: INITIALIZING ---")
-    
-    target_name = input("[?] Target Business Name: ").strip()
-    target_location = input("[?] Target Location (City, State): ").strip()
-    
-    print("[?] Paste 3-4 recent Google Reviews (Press Enter twice to finish):")
-    reviews = []
-    while True:
-        line = sys.stdin.readline().strip()
-        if not line:
-            break
-        reviews.append(line)
-        
-    return target_name, target_location, " ".join(reviews)
-
-def main():
-    # Step 1: Input
-    name, location, reviews = get_target_input()
-
-    print(f"\n[+] Processing Intelligence for: {name} ({location})...")
-
-    # Step 2: OSINT Search
-    website_url = find_business_url(name, location)
-
-    # Step 3: Branching Logic
-    if website_url:
-        # BRANCH A: The Auditor
-        print(f"\n[+] Official URL found: {website_url}")
-        print("-" * 40)
-        
-        # Security Scan
-        print("[+] Running Security Scan...", end=" ")
-        is_secure = check_ssl(website_url)
-        if is_secure:
-            print("PASS (SSL Valid)")
-        else:
-            print("FAIL (SSL Expired/Missing)")
-
-        # Marketing Scan
-        print("[+] Running Marketing Scan...", end=" ")
-        seo_text = check_seo(website_url)
-        if seo_text:
-            print("PASS (SEO Detected)")
-            print(f"    -> Meta Description: {seo_text[:60]}...") 
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import metrics
+from orchestrator import run_audit, score_audit
+from results_store import record_audits, STORE_BATCH
+
+# --- 1. INPUT STREAMING ---
+
+def _normalize_row(row):
+    row = {str(k).strip().lower(): (v or "").strip() if isinstance(v, str) else v for k, v in row.items() if k}
+    return {
+        "id": str(row.get("id") or ""),  # JSONL ids may be numbers; checkpoint keys are strings
+        "name": row.get("name") or row.get("business") or row.get("business_name") or "",
+        "location": row.get("location") or row.get("city") or "",
+        "url": row.get("url") or row.get("website") or ""
+    }
+
+def read_targets(path):
+    """Yields normalized {id, name, location, url} rows one at a time (never loads the whole file)."""
+    is_jsonl = path.endswith((".jsonl", ".ndjson"))
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if is_jsonl:
+            for line in f:
+                if line.strip():
+                    yield _normalize_row(json.loads(line))
         else:
-            print("FAIL (Missing Meta Description)")
-            
-        print("-" * 40)
-        print("[+] Audit Complete. Generating PDF Report...")
-        
-        # REPORT GENERATION
-        filename = save_audit_report(name, website_url, is_secure, seo_text)
-        print(f"[SUCCESS] Report saved as: {filename}")
-        
-    else:
-        # BRANCH B: The Architect (Gemini AI)
-        print("\n[-] No official website detected.")
-        print("[+] Initiating AI Strategy Proposal (Branch B)...")
-        print("-" * 40)
-        
-        # Fallback for empty reviews
-        if len(reviews) < 5:
-            reviews = "Customer service was great. Best food in town. Highly recommended."
-            
-        proposal = generate_website_strategy(name, location, reviews)
-        print(proposal) # Show in terminal
-        
-        print("\n[+] Strategy Generated. Saving PDF...")
-        filename = save_strategy_proposal(name, proposal)
-        print(f"[SUCCESS] Proposal saved as: {filename}")
-
-    print("\n[+] Intelligence run complete.")
+            for row in csv.DictReader(f):
+                yield _normalize_row(row)
+
+def row_key(row):
+    # Stable identity for checkpointing: explicit id column, else a hash of the inputs
+    if row["id"]:
+        return row["id"]
+    raw = "|".join([row["name"].lower(), row["location"].lower(), row["url"].lower()])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def prefetch_industries(rows, window=200):
+    """
+    Passes rows through unchanged, but classifies the industries of each
+    upcoming window of rows in a few batched LLM calls first. The
+    orchestrator's per-target identify_industry() then hits the cache.
+    """
+    from ai_agent import identify_industries
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= window:
+            identify_industries([r["name"] for r in buffer if r["name"]])
+            yield from buffer
+            buffer = []
+    if buffer:
+        identify_industries([r["name"] for r in buffer if r["name"]])
+        yield from buffer
+
+def prefetch_dns(rows, window=200):
+    """
+    Same idea for DNS: resolves the hosts of each upcoming window of rows
+    (that have a URL) in one concurrent bulk pass, so every per-target DNS
+    stage is a cache hit and each domain is resolved once per run.
+    """
+    from dns_intel import lookup_many
+    from network_scanner import extract_hostname
+
+    def resolve(batch):
+        hosts = [extract_hostname(r["url"]) for r in batch if r["url"]]
+        if hosts:
+            lookup_many(hosts)
+
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= window:
+            resolve(buffer)
+            yield from buffer
+            buffer = []
+    if buffer:
+        resolve(buffer)
+        yield from buffer
+
+# --- 2. CHECKPOINT ---
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+# --- 3. PIPELINE ---
+
+def audit_target(row, with_narrative=False):
+    """Runs one lead through the full pipeline and returns a JSON-ready record."""
+    result = run_audit(row["name"], row["location"], url=row["url"] or None)
+    record = {"key": row_key(row), "input": row, "audited_at": time.time()}
+    record.update(result.to_dict())
+    if result.ok:
+        audit = result.audit_results()
+        record["score"] = score_audit(audit)
+        if with_narrative:
+            from ai_agent import generate_audit_narrative
+            record["narrative"] = generate_audit_narrative(
+                row["name"], result.url, record["score"], audit["ssl"], audit["ports"], audit["seo"], audit["tech"]
+            )
+    return record
+
+def run_batch(input_path, output_path, checkpoint_path, concurrency=4, with_narrative=False, limit=None):
+    done_keys = load_checkpoint(checkpoint_path)
+    print(f"[+] Resuming with {len(done_keys)} completed rows" if done_keys else "[+] Starting fresh run")
+
+    finished = failed = skipped = 0
+    in_flight = {}
+    stored = []   # Successful records waiting to go to the result store as one part
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    with open(output_path, "a", encoding="utf-8") as out, open(checkpoint_path, "a", encoding="utf-8") as ckpt:
+
+        def drain(block_until):
+            nonlocal finished, failed
+            while len(in_flight) > block_until:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    row = in_flight.pop(future)
+                    if future.cancelled():
+                        continue  # Not checkpointed, so the next run picks it up
+                    key = row_key(row)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        record = {"key": key, "input": row, "errors": {"pipeline": str(e)}}
+                    ok = "url" not in record.get("errors", {}) and "pipeline" not in record.get("errors", {})
+                    if not ok:
+                        failed += 1
+                    finished += 1
+                    # Result first, then checkpoint: a crash in between re-audits the row, never loses it
+                    out.write(json.dumps(record, default=str) + "\n")
+                    out.flush()
+                    if ok:  # Failed rows stay out of the checkpoint so the next run retries them
+                        ckpt.write(key + "\n")
+                        ckpt.flush()
+                    print(f"[{finished}] {row['name'] or row['url']} -> score {record.get('score', 'n/a')}")
+                    if "score" in record:
+                        stored.append(record)
+                    if len(stored) >= STORE_BATCH:
+                        record_audits(stored)
+                        stored.clear()
+
+        try:
+            def todo():
+                nonlocal skipped
+                for i, row in enumerate(read_targets(input_path)):
+                    if limit is not None and i >= limit:
+                        break
+                    if row_key(row) in done_keys:
+                        skipped += 1
+                        continue
+                    yield row
+
+            for row in prefetch_dns(prefetch_industries(todo())):
+                key = row_key(row)
+                if key in done_keys:
+                    skipped += 1
+                    continue
+                done_keys.add(key)  # Also dedups repeated rows within this run
+                # Keep the input streaming: never queue more than 2x the worker count
+                drain(block_until=concurrency * 2 - 1)
+                in_flight[pool.submit(audit_target, row, with_narrative)] = row
+            drain(block_until=0)
+        except KeyboardInterrupt:
+            print("\n[!] Interrupted - finishing in-flight targets, re-run to resume.")
+            for future in in_flight:
+                future.cancel()
+            drain(block_until=0)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            record_audits(stored)
+
+    print(f"\n[+] Done: {finished} audited ({failed} failed, re-run to retry), {skipped} skipped (already done or duplicate).")
+    return finished
+
+def report_jobs(results_path):
+    """Yields one create_pdf job per successful record in a results JSONL (latest record per key wins)."""
+    latest = {}
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if "score" in record:
+                    latest[record["key"]] = record
+    for key, record in latest.items():
+        audit, target = record["audit"], record["target"]
+        yield {
+            "filename": f"{key}_Audit.pdf",
+            "business_name": target["name"] or target["url"], "url": target["url"], "score": record["score"],
+            "ai_summary": record.get("narrative") or "", "ssl": audit["ssl"], "seo": audit["seo"],
+            "tech": audit["tech"], "competitors": record.get("competitors") or [],
+            "ssl_details": audit.get("ssl_details"), "site": audit.get("site"), "dns": audit.get("dns")
+        }
+
+def render_batch_reports(results_path, destination, workers=None):
+    from reporter import render_reports
+    count = render_reports(report_jobs(results_path), destination, workers)
+    print(f"[+] Rendered {count} PDF reports into {destination}")
+    return count
+
+# --- 4. CLI ---
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless bulk audit: CSV/JSONL of name,location,url -> JSONL results.")
+    parser.add_argument("input", help="CSV or JSONL file of targets (columns: name, location, url; optional id)")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.ckpt)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Targets audited at the same time")
+    parser.add_argument("--narrative", action="store_true", help="Also generate the AI executive summary")
+    parser.add_argument("--limit", type=int, help="Stop after this many input rows")
+    parser.add_argument("--reports", help="Render PDF reports into this .zip file or directory after the run")
+    parser.add_argument("--report-workers", type=int, help="Processes used for PDF rendering (default: CPU count)")
+    parser.add_argument("--metrics", help="Dump run metrics here at the end (.prom/.txt = Prometheus text, else JSON)")
+    parser.add_argument("--metrics-port", type=int, help="Serve live metrics on http://0.0.0.0:<port>/metrics while running")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    checkpoint = args.checkpoint or args.output + ".ckpt"
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        print(f"[+] Metrics on http://0.0.0.0:{args.metrics_port}/metrics")
+    run_batch(args.input, args.output, checkpoint, args.concurrency, args.narrative, args.limit)
+    if args.reports:
+        render_batch_reports(args.output, args.reports, args.report_workers)
+    if args.metrics:
+        metrics.dump(args.metrics)
+        print(f"[+] Metrics written to {args.metrics}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Module: metrics.py
+Description: Lightweight Instrumentation (timing spans, counters, Prometheus text / JSON export)
+No dependencies: spans feed process-wide histograms, and the spans of one
+audit are also collected in a Trace for the dashboard's timing breakdown.
+"""
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers a cache hit (ms) up to a slow Gemini call
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# --- 1. REGISTRY ---
+
+def _key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+class Registry:
+    """Counters and histograms keyed by (metric name, label set). Thread-safe."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}     # name -> {labels: value}
+        self.histograms = {}   # name -> {labels: [bucket counts..., sum, count]}
+        self.help = {}
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[_key(labels)] = series.get(_key(labels), 0) + value
+
+    def observe(self, name, seconds, **labels):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            h = series.setdefault(_key(labels), [0] * len(BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # --- Export ---
+
+    def snapshot(self):
+        """JSON-ready dict: counters as flat series, histograms with count/sum/avg."""
+        with self._lock:
+            out = {"counters": [], "histograms": []}
+            for name, series in sorted(self.counters.items()):
+                for labels, value in sorted(series.items()):
+                    out["counters"].append({"name": name, "labels": dict(labels), "value": value})
+            for name, series in sorted(self.histograms.items()):
+                for labels, h in sorted(series.items()):
+                    out["histograms"].append({
+                        "name": name, "labels": dict(labels), "count": h[-1], "sum": round(h[-2], 6),
+                        "avg": round(h[-2] / h[-1], 6) if h[-1] else None,
+                        "buckets": {str(b): c for b, c in zip(BUCKETS, h)}
+                    })
+            return out
+
+    def prometheus_text(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs: return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                if name in self.help: lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{fmt(labels)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                if name in self.help: lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, h in sorted(series.items()):
+                    for bound, count in zip(BUCKETS, h):
+                        lines.append(f"{name}_bucket{fmt(labels, [('le', str(bound))])} {count}")
+                    lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {h[-1]}")
+                    lines.append(f"{name}_sum{fmt(labels)} {h[-2]:.6f}")
+                    lines.append(f"{name}_count{fmt(labels)} {h[-1]}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+REGISTRY.describe("recon_span_seconds", "Duration of instrumented calls")
+REGISTRY.describe("recon_span_errors_total", "Failed instrumented calls by exception class")
+REGISTRY.describe("recon_bytes_total", "Bytes downloaded or produced")
+REGISTRY.describe("recon_cache_requests_total", "Cache lookups by result (hit/miss)")
+REGISTRY.describe("recon_ports_probed_total", "Port probes by outcome")
+
+# --- 2. PER-AUDIT TRACE ---
+
+class Trace:
+    """The spans recorded while one audit runs (across its stage threads)."""
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+_current = contextvars.ContextVar("recon_trace", default=(None, None))
+
+@contextmanager
+def tracing(trace, stage=None):
+    """Routes spans recorded in this thread to `trace`, tagged with `stage`."""
+    token = _current.set((trace, stage))
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+def bind(fn):
+    """
+    Carries the current trace into a worker thread: pool.submit(bind(fn), ...).
+    Bind once per submit (a captured context can't run in two threads at once).
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+# --- 3. RECORDING API ---
+
+@contextmanager
+def span(name, **labels):
+    """
+    Times the block. Records recon_span_seconds{span=name,...}, and on
+    an exception recon_span_errors_total{span, error=<class>} (then re-raises).
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = e.__class__.__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        REGISTRY.observe("recon_span_seconds", seconds, span=name, **labels)
+        if error:
+            REGISTRY.inc("recon_span_errors_total", span=name, error=error, **labels)
+        trace, stage = _current.get()
+        if trace is not None:
+            trace.add({"span": name, "stage": stage, "labels": labels, "ms": round(seconds * 1000, 2), "error": error})
+
+def count_error(name, error, **labels):
+    # For calls that report failures in their return value instead of raising
+    REGISTRY.inc("recon_span_errors_total", span=name, error=error, **labels)
+
+def count_bytes(source, n):
+    if n: REGISTRY.inc("recon_bytes_total", n, source=source)
+
+def count_cache(cache, hit):
+    REGISTRY.inc("recon_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+def count_ports(statuses):
+    for status in statuses:
+        REGISTRY.inc("recon_ports_probed_total", status=status.split()[0].lower())
+
+# --- 4. EXPORT ---
+
+def dump(path, registry=REGISTRY):
+    """Writes Prometheus text for *.prom / *.txt paths, JSON otherwise."""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith((".prom", ".txt")):
+            f.write(registry.prometheus_text())
+        else:
+            json.dump(registry.snapshot(), f, indent=2)
+
+def serve(port, host="0.0.0.0", registry=REGISTRY):
+    """Serves GET /metrics (Prometheus text) and /metrics.json from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, ctype = registry.prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, ctype = json.dumps(registry.snapshot()).encode("utf-8"), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,48 +1,162 @@
 """
 Module: network_scanner.py
-Description: Scans target for high-risk open ports using standard sockets.
+Description: Asyncio port scanner (resolve once, probe concurrently, batch many hosts).
 """
+import asyncio
+import ipaddress
+import os
 import socket
 from urllib.parse import urlparse
 
-def scan_common_ports(target_url):
+import metrics
+
+# --- 1. PORT PROFILES ---
+# 21=FTP (Old/Insecure), 22=SSH (Admin Access), 3389=RDP (Remote Desktop)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+PORT_PROFILES = {
+    "top5": "21,22,80,443,3389",
+    "top20": "21-23,25,53,80,110-111,135,139,143,443,445,993,995,1723,3306,3389,5900,8080",
+    "top100": (
+        "7,9,13,21-23,25-26,37,53,79-81,88,106,110-111,113,119,135,139,143-144,179,199,389,427,"
+        "443-445,465,513-515,543-544,548,554,587,631,646,873,990,993,995,1025-1029,1110,1433,1720,"
+        "1723,1755,1900,2000-2001,2049,2121,2717,3000,3128,3306,3389,3986,4899,5000,5009,5051,5060,"
+        "5101,5190,5357,5432,5631,5666,5800,5900,6000-6001,6646,7070,8000,8008-8009,8080-8081,8443,"
+        "8888,9100,9999-10000,32768,49152-49157"
+    ),
+    "top1000": "@ports_top1000.txt",  # Too long to inline, lives in data/
+}
+DEFAULT_PROFILE = "top5"
+
+DEFAULT_TIMEOUT = 1.0       # Per-probe connect timeout (seconds)
+DEFAULT_CONCURRENCY = 500   # Global cap on sockets in flight across all hosts
+
+_profile_cache = {}
+
+def _parse_ports(spec):
+    ports = []
+    for part in spec.replace("\n", ",").split(","):
+        part = part.strip()
+        if not part: continue
+        start, _, end = part.partition("-")
+        ports.extend(range(int(start), int(end or start) + 1))
+    return ports
+
+def get_port_profile(profile):
     """
-    Scans the Top 5 most critical ports for B2B security.
-    Returns: A dictionary of {port: status_string}.
+    Returns the list of ports for a named profile ("top5" ... "top1000").
+    A list/tuple of ints is passed straight through.
     """
-    # 1. Extract Hostname (remove https://)
+    if isinstance(profile, (list, tuple)):
+        return list(profile)
+    if profile not in _profile_cache:
+        spec = PORT_PROFILES[profile]
+        if spec.startswith("@"):
+            with open(os.path.join(DATA_DIR, spec[1:])) as f:
+                spec = ",".join(l for l in f.read().splitlines() if not l.startswith("#"))
+        _profile_cache[profile] = _parse_ports(spec)
+    return _profile_cache[profile]
+
+# --- 2. HOST HELPERS ---
+
+def extract_hostname(target_url):
+    # IP literals first: urlparse can't read a bare IPv6 address ("2001:db8::1"), and "[::1]:443" has no scheme
+    target = (target_url or "").strip()
+    literal = target[1:].split("]")[0] if target.startswith("[") else target
     try:
-        hostname = urlparse(target_url).netloc
-        # Handle cases where netloc might be empty if user entered "google.com" without https
+        return str(ipaddress.ip_address(literal))
+    except ValueError:
+        pass
+    # Handle cases where netloc might be empty if user entered "google.com" without https
+    try:
+        hostname = urlparse(target_url).hostname
         if not hostname:
-            hostname = target_url.split("/")[0]
-    except:
-        return {}
+            hostname = target_url.split("/")[0].split(":")[0]
+        return hostname
+    except Exception:
+        return None
 
-    print(f"[?] scanning ports on: {hostname}...")
+async def _resolve(hostname):
+    # One lookup per host, not one per port
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+    return infos[0][4][0]
 
-    # 2. Define High-Risk Ports
-    # 21=FTP (Old/Insecure), 22=SSH (Admin Access), 3389=RDP (Remote Desktop)
-    ports = [21, 22, 80, 443, 3389]
-    results = {}
+# --- 3. ASYNC SCAN CORE ---
 
-    # 3. The Scan Loop
-    for port in ports:
+async def _probe(ip, port, timeout, sem):
+    async with sem:
         try:
-            # Create a socket
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            # Short timeout (1s) so we don't hang the script
-            s.settimeout(1.0)
-            
-            # Attempt Connection
-            result = s.connect_ex((hostname, port))
-            
-            if result == 0:
-                results[port] = "OPEN (Risk)"
-            else:
-                results[port] = "Closed"
-            s.close()
-        except:
-            results[port] = "Error"
-            
-    return results
\ No newline at end of file
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+            return port, "OPEN (Risk)"
+        except (asyncio.TimeoutError, ConnectionRefusedError, OSError):
+            return port, "Closed"
+        except Exception:
+            return port, "Error"
+
+async def _scan_host(hostname, ports, timeout, sem, ip=None):
+    try:
+        ip = ip or await _resolve(hostname)
+    except Exception:
+        return {port: "Error" for port in ports}
+    results = await asyncio.gather(*[_probe(ip, p, timeout, sem) for p in ports])
+    return dict(sorted(results))
+
+async def scan_hosts_async(targets, profile=DEFAULT_PROFILE, timeout=DEFAULT_TIMEOUT,
+                           concurrency=DEFAULT_CONCURRENCY, addresses=None):
+    """
+    Scans many hosts at once. All probes share one semaphore, so the total
+    number of open sockets never exceeds `concurrency`. `addresses`
+    ({hostname: ip}, e.g. from dns_intel) skips resolving those hosts.
+    Returns: {target: {port: status_string}}
+    """
+    addresses = addresses or {}
+    ports = get_port_profile(profile)
+    sem = asyncio.Semaphore(concurrency)
+    targets = list(dict.fromkeys(targets))
+    hosts = [extract_hostname(t) for t in targets]
+    scans = [_scan_host(h, ports, timeout, sem, addresses.get(h)) if h else asyncio.sleep(0, result={}) for h in hosts]
+    return dict(zip(targets, await asyncio.gather(*scans)))
+
+def _run(coro):
+    # Streamlit / orchestrator threads have no running loop, so asyncio.run is fine.
+    # If we're already inside a loop, run on a helper thread instead.
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+# --- 4. PUBLIC API ---
+
+def scan_hosts(targets, profile=DEFAULT_PROFILE, timeout=DEFAULT_TIMEOUT, concurrency=DEFAULT_CONCURRENCY, addresses=None):
+    """
+    Blocking wrapper for bulk audits: sweep many URLs/hostnames in one call.
+    Returns: {target: {port: status_string}}
+    """
+    label = profile if isinstance(profile, str) else "custom"
+    with metrics.span("port_scan", profile=label):
+        results = _run(scan_hosts_async(targets, profile, timeout, concurrency, addresses))
+    metrics.count_ports(status for ports in results.values() for status in ports.values())
+    return results
+
+def scan_common_ports(target_url, profile=DEFAULT_PROFILE, timeout=DEFAULT_TIMEOUT, ip=None):
+    """
+    Scans the Top 5 most critical ports for B2B security (or any named profile).
+    Pass `ip` when the address is already resolved.
+    Returns: A dictionary of {port: status_string}.
+    """
+    hostname = extract_hostname(target_url)
+    if not hostname:
+        return {}
+
+    print(f"[?] scanning ports on: {hostname}...")
+    return scan_hosts([hostname], profile, timeout, addresses={hostname: ip} if ip else None)[hostname]
@@ -0,0 +1,262 @@
+"""
+Module: orchestrator.py
+Description: Concurrent Scan Orchestrator (runs the audit stages as a dependency graph)
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from scanner import find_competitors
+from query_planner import run_audit_plan
+from analyzer import inspect_ssl, check_seo, fingerprint_tech, tech_names
+from fetcher import normalize_url
+from incremental import fetch_incremental, analysis
+from crawler import audit_site, CRAWL_AUDIT_PAGES
+from seo_extractor import empty_seo
+from network_scanner import scan_common_ports, extract_hostname
+from tls_probe import probe_url
+from dns_intel import lookup, first_address
+from ai_agent import identify_industry
+from cache import DiskCache, MISS
+from scoring import score_audit  # Re-exported: app.py and main.py import it from here
+from results_store import record_audits
+import config
+import metrics
+
+MAX_WORKERS = 8
+
+# --- 1. RESULT CONTAINER ---
+
+class AuditResult:
+    """
+    Structured output of one audit. Stage values live in .stages,
+    failures in .errors ({stage: message}), durations in .timings (seconds).
+    """
+    def __init__(self, name, location, url=None):
+        self.name = name
+        self.location = location
+        self.url = url
+        self.stages = {}
+        self.errors = {}
+        self.timings = {}
+        self.spans = []     # Every instrumented call made for this audit (see metrics.py)
+        self.elapsed = 0.0
+
+    def get(self, stage, default=None):
+        return self.stages.get(stage, default)
+
+    @property
+    def ok(self):
+        return "url" not in self.errors
+
+    def target_data(self):
+        # Same shape app.py keeps in st.session_state.target_data
+        return {
+            "name": self.name, "url": self.url, "location": self.location,
+            "socials": self.get("socials") or {}, "industry": self.get("industry") or self.name,
+            "knowledge_graph": getattr(self.get("serp"), "knowledge_graph", {})
+        }
+
+    def audit_results(self):
+        # Same shape app.py keeps in st.session_state.audit_results
+        return {
+            "ssl": bool((self.get("ssl") or {}).get("valid")),
+            "ssl_details": self.get("ssl") or {},
+            "seo": self.get("seo") or empty_seo(),
+            "tech": tech_names(self.get("tech") or []),
+            "tech_details": self.get("tech") or [],
+            "ports": self.get("ports") or {},
+            "dns": self.get("dns") or {},
+            "site": self.get("site") or {},
+            # Same content as the last audit (304 or identical body): SEO/tech were reused
+            "unchanged": bool(getattr(self.get("page"), "unchanged", False))
+        }
+
+    def to_dict(self):
+        return {
+            "target": self.target_data(),
+            "audit": self.audit_results(),
+            "competitors": self.get("competitors") or [],
+            "errors": dict(self.errors),
+            "timings": {k: round(v, 3) for k, v in self.timings.items()},
+            "spans": self.spans,
+            "elapsed": round(self.elapsed, 3)
+        }
+
+# --- 2. STAGE DEFINITIONS ---
+# Each stage is (name, dependencies, fn(ctx) -> value). ctx holds the
+# audit inputs plus the values of every finished stage.
+
+def _stage_url(ctx):
+    if ctx["url"]:
+        return ctx["url"]
+    if not ctx["name"]:
+        raise ValueError("Please enter a Business Name.")
+    serp = ctx["serp"]
+    if serp.error is not None:
+        raise serp.error
+    if not serp.website:
+        raise LookupError("Website not found.")
+    return serp.website
+
+def _stage_socials(ctx):
+    serp = ctx["serp"]
+    if serp.error is not None:
+        raise serp.error
+    return serp.socials
+
+def _stage_industry(ctx):
+    industry = identify_industry(ctx["name"])
+    # Fallback
+    if not industry or industry == "Direct Audit":
+        industry = ctx["name"]
+    return industry
+
+def _stage_competitors(ctx):
+    if not ctx["location"]:
+        return []
+    clean_domain = ctx["url"].replace("https://", "").replace("http://", "").split("/")[0]
+    # The audit search's local pack locates the target and adds nearby candidates
+    return find_competitors(ctx["name"], ctx["industry"], ctx["location"], clean_domain, local_pack=ctx["serp"].places)
+
+def _stage_site(ctx):
+    # Opt-in: at the default politeness a crawl is most of an audit's wall time
+    if CRAWL_AUDIT_PAGES <= 0:
+        return None
+    return audit_site(ctx["url"], ctx["page"])
+
+STAGES = [
+    ("serp",        [],                      lambda ctx: run_audit_plan(ctx["name"], ctx["location"], ctx["url"])),
+    ("url",         ["serp"],                _stage_url),
+    ("industry",    [],                      _stage_industry),
+    ("socials",     ["serp"],                _stage_socials),
+    ("page",        ["url"],                 lambda ctx: fetch_incremental(ctx["url"])),
+    ("dns",         ["url"],                 lambda ctx: lookup(extract_hostname(ctx["url"]))),
+    ("tls",         ["url", "dns"],          lambda ctx: probe_url(ctx["url"], ip=first_address(ctx["dns"]))),
+    ("ssl",         ["url", "page", "tls"],  lambda ctx: inspect_ssl(ctx["url"], ctx["page"], ctx["tls"])),
+    ("seo",         ["url", "page"],         lambda ctx: analysis(ctx["url"], ctx["page"], "seo", check_seo)),
+    ("tech",        ["url", "page"],         lambda ctx: analysis(ctx["url"], ctx["page"], "tech", fingerprint_tech)),
+    ("ports",       ["url", "dns"],          lambda ctx: scan_common_ports(ctx["url"], ip=first_address(ctx["dns"]))),
+    ("site",        ["url", "page"],         _stage_site),
+    ("competitors", ["url", "industry", "serp"], _stage_competitors),
+]
+
+# Dependencies that replace a stage's own when the caller supplies the URL:
+# nothing has to wait for the search before page/dns/tls/ports can start
+DIRECT_DEPS = {"url": []}
+
+# --- 3. SCHEDULER ---
+
+def _timed(fn, ctx, stage, trace):
+    start = time.perf_counter()
+    try:
+        with metrics.tracing(trace, stage), metrics.span("stage", stage=stage):
+            return fn(ctx), None, time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+
+def run_audit(name, location, url=None, on_stage=None, max_workers=MAX_WORKERS, stages=STAGES):
+    """
+    Runs every stage as soon as its dependencies are done, on a bounded
+    thread pool. Wall-clock time is roughly the slowest dependency chain.
+
+    on_stage(stage, value, error) is called from the *calling* thread as each
+    stage finishes, so Streamlit placeholders can be updated from it.
+    """
+    result = AuditResult(name, location, url)
+    ctx = {"name": name or "", "location": location or "", "url": url}
+    pending = {s[0]: (s[0], DIRECT_DEPS.get(s[0], s[1]) if url else s[1], s[2]) for s in stages}
+    running = {}
+    trace = metrics.Trace()
+    start = time.perf_counter()
+
+    def finish(stage, value, error, elapsed):
+        result.timings[stage] = elapsed
+        if error is None:
+            result.stages[stage] = value
+            ctx[stage] = value
+        else:
+            result.errors[stage] = str(error) or error.__class__.__name__
+        if on_stage:
+            on_stage(stage, value, error)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            # Launch (or skip) everything whose dependencies have settled
+            progressed = True
+            while progressed:
+                progressed = False
+                for stage, (_, deps, fn) in list(pending.items()):
+                    failed = [d for d in deps if d in result.errors]
+                    if failed:
+                        del pending[stage]
+                        finish(stage, None, RuntimeError(f"skipped: '{failed[0]}' failed"), 0.0)
+                        progressed = True
+                    elif all(d in result.stages for d in deps):
+                        del pending[stage]
+                        running[pool.submit(_timed, fn, dict(ctx), stage, trace)] = stage
+
+            if not running:
+                # Unknown dependency names would otherwise spin forever
+                for stage in list(pending):
+                    del pending[stage]
+                    finish(stage, None, RuntimeError("unresolved dependencies"), 0.0)
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                finish(stage, *future.result())
+
+    result.url = result.stages.get("url", url)
+    result.elapsed = time.perf_counter() - start
+    result.spans = trace.spans
+    return result
+
+# --- 4. RESULT CACHE (shared by every dashboard session and worker process) ---
+
+AUDIT_CACHE = DiskCache(
+    "audits",
+    ttl=config.get_int("AUDIT_CACHE_TTL", 6 * 3600),
+    max_entries=config.get_int("AUDIT_CACHE_MAX_ENTRIES", 5000)
+)
+
+def audit_cache_keys(name, location, url=None):
+    # Lookups by URL (direct audits) and by name (auto-discovery) both land on the same entry
+    location = " ".join((location or "").lower().split())
+    keys = []
+    if url:
+        keys.append(f"url|{normalize_url(url)}|{location}")
+    if name:
+        keys.append(f"name|{' '.join(name.lower().split())}|{location}")
+    return keys
+
+def cached_audit(name, location, url=None):
+    """Cached {"target", "audit", "competitors", "cached_at"} snapshot, or None."""
+    keys = audit_cache_keys(name, location, url)
+    # A direct audit must match on its URL; the name is only a fallback for discovery
+    for key in keys[:1] if url else keys:
+        snapshot = AUDIT_CACHE.get(key)
+        if snapshot is not MISS:
+            return snapshot
+    return None
+
+def store_audit(result):
+    """
+    Caches a successful audit under both its URL and its name keys, and
+    appends it to the columnar result store (portfolio history).
+    """
+    if not result.ok:
+        return None
+    snapshot = {
+        "target": result.target_data(), "audit": result.audit_results(),
+        "competitors": result.get("competitors") or [], "cached_at": time.time(),
+        "timings": result.timings, "spans": result.spans
+    }
+    for key in audit_cache_keys(result.name, result.location, result.url):
+        AUDIT_CACHE.set(key, snapshot)
+    record_audits([snapshot])
+    return snapshot
+
+def bust_audit(name, location, url=None):
+    for key in audit_cache_keys(name, location, url):
+        AUDIT_CACHE.delete(key)
@@ -0,0 +1,62 @@
+"""
+Module: query_planner.py
+Description: SERP Query Planner (one Serper search per audit, read for every field it can answer)
+Website, socials, knowledge graph and the local pack all come from the same
+"<name> <location>" payload; competitor passes are separate places queries
+(scanner.find_competitors), which the local pack feeds into.
+"""
+from scanner import serper_query, audit_search_query, extract_website, extract_socials, AUDIT_SEARCH_NUM
+
+# --- 1. AUDIT EXTRACTION ---
+
+class SerpIntel:
+    """Everything one audit reads from the search results."""
+    def __init__(self):
+        self.website = None
+        self.socials = {}
+        self.knowledge_graph = {}
+        self.places = []
+        self.queries = 0
+        self.error = None   # Set when the search itself failed
+
+def extract_knowledge_graph(payload):
+    kg = payload.get('knowledgeGraph') or {}
+    if not kg:
+        return {}
+    return {
+        "title": kg.get('title'), "type": kg.get('type'), "website": kg.get('website'),
+        "description": kg.get('description'), "rating": kg.get('rating'),
+        "reviews": kg.get('ratingCount'), "address": (kg.get('attributes') or {}).get('Address')
+    }
+
+def extract_places(payload):
+    # Local pack that Serper embeds in a regular search for "<name> <location>".
+    # Kept in the places-endpoint shape so find_competitors() can merge it as a pass.
+    fields = ('title', 'address', 'website', 'rating', 'ratingCount', 'category', 'latitude', 'longitude')
+    return [{k: p.get(k) for k in fields if p.get(k) is not None} for p in payload.get('places', [])]
+
+def run_audit_plan(name, location, url=None):
+    """
+    Website, socials, knowledge graph and local places for one business
+    from a single search. With a known url the website is not extracted.
+    Never raises: a failed search is kept in .error so a manually supplied
+    URL can still be audited.
+    """
+    intel = SerpIntel()
+    intel.website = url
+    if not name:
+        return intel
+
+    intel.queries = 1
+    try:
+        payload = serper_query("search", audit_search_query(name, location), AUDIT_SEARCH_NUM)
+    except Exception as e:
+        intel.error = e
+        return intel
+
+    if not url:
+        intel.website = extract_website(payload)
+    intel.socials = extract_socials(payload)
+    intel.knowledge_graph = extract_knowledge_graph(payload)
+    intel.places = extract_places(payload)
+    return intel
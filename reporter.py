@@ -1,23 +1,41 @@
 """
 Module: reporter.py
 Description: Generates professional PDF Audit Reports (Now with Competitor Data)
+Reports are rendered to bytes in memory; render_reports() fans a batch out
+over a process pool and streams the files into a zip or a directory.
 """
 from fpdf import FPDF
 import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import metrics
+
+# --- 1. TEXT SANITIZING ---
+
+# Built once: one str.translate() pass instead of a chain of replace() calls.
+# "⚠️" is "⚠" + an emoji variation selector, so the selector is dropped separately.
+_CLEAN_TABLE = str.maketrans({
+    "✅": "[PASS]", "❌": "[FAIL]", "⚠": "[WARN]", "\ufe0f": None,
+    "🚀": None, "🔥": None, "💰": "$", "📉": None,
+    # Typography the AI text is full of, which latin-1 would turn into "?"
+    "\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"',
+    "\u2013": "-", "\u2014": "-", "\u2026": "...", "\u2022": "-", "\u00a0": " "
+})
 
 def clean_text(text):
     """
     Removes emojis and special characters that crash FPDF.
     """
     if not text: return ""
-    replacements = {
-        "✅": "[PASS]", "❌": "[FAIL]", "⚠️": "[WARN]",
-        "🚀": "", "🔥": "", "💰": "$", "📉": ""
-    }
-    for emoji, replacement in replacements.items():
-        text = text.replace(emoji, replacement)
-    
-    return text.encode('latin-1', 'replace').decode('latin-1')
+    return str(text).translate(_CLEAN_TABLE).encode('latin-1', 'replace').decode('latin-1')
+
+def report_filename(business_name):
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", clean_text(business_name)).strip("._") or "Report"
+    return f"{name}_Audit.pdf"
+
+# --- 2. SINGLE REPORT ---
 
 class AuditReport(FPDF):
     def header(self):
@@ -30,10 +48,17 @@ class AuditReport(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
 
-def create_pdf(business_name, url, score, ai_summary, ssl, seo, tech, competitors):
+def create_pdf(business_name, url, score, ai_summary, ssl, seo, tech, competitors, ssl_details=None, site=None, dns=None):
     """
-    Generates the PDF file with Competitor Intel.
+    Renders the PDF with Competitor Intel and returns it as bytes.
+    Nothing touches the disk, so concurrent sessions never collide.
     """
+    with metrics.span("pdf_render"):
+        data = _render(business_name, url, score, ai_summary, ssl, seo, tech, competitors, ssl_details, site, dns)
+    metrics.count_bytes("pdf", len(data))
+    return data
+
+def _render(business_name, url, score, ai_summary, ssl, seo, tech, competitors, ssl_details, site=None, dns=None):
     pdf = AuditReport()
     pdf.add_page()
     
@@ -57,14 +82,39 @@ def create_pdf(business_name, url, score, ai_summary, ssl, seo, tech, competitor
     
     ssl_status = "Secure (HTTPS)" if ssl else "Not Secure (HTTP)"
     pdf.cell(0, 8, f"- SSL Security: {ssl_status}", 0, 1)
+    if ssl_details:
+        if ssl_details.get('days_remaining') is not None:
+            pdf.cell(0, 8, f"  Certificate: {clean_text(ssl_details.get('issuer') or 'Unknown issuer')}, expires {ssl_details['expires']} ({ssl_details['days_remaining']} days)", 0, 1)
+        for finding in ssl_details.get('findings', []):
+            pdf.cell(0, 8, f"  [WARN] {clean_text(finding)}", 0, 1)
     
     seo_status = "Present" if seo.get('title') else "Missing (Critical)"
     pdf.cell(0, 8, f"- SEO Title Tag: {seo_status}", 0, 1)
     
     tech_list = ", ".join(tech) if tech else "None Detected"
     pdf.cell(0, 8, f"- Technology Stack: {clean_text(tech_list)}", 0, 1)
+
+    if dns and dns.get('domain'):
+        spf = "SPF present" if dns.get('spf') else "no SPF"
+        dmarc = f"DMARC p={dns['dmarc_policy']}" if dns.get('dmarc_policy') else ("DMARC present" if dns.get('dmarc') else "no DMARC")
+        pdf.cell(0, 8, f"- Email Security: {len(dns.get('mx') or [])} mail server(s), {spf}, {dmarc}", 0, 1)
+        for finding in dns.get('findings', []):
+            pdf.cell(0, 8, f"  [WARN] {clean_text(finding)}", 0, 1)
     pdf.ln(5)
 
+    # 3b. Site-wide Crawl
+    if site and site.get('pages'):
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(0, 10, "Site-wide Crawl:", 0, 1)
+        pdf.set_font("Arial", '', 11)
+        budget = " (page budget reached)" if site.get('budget_hit') else ""
+        pdf.cell(0, 8, f"- Pages analysed: {site['pages']}{budget}", 0, 1)
+        for finding in site.get('findings', []):
+            pdf.cell(0, 8, f"  [WARN] {clean_text(finding)}", 0, 1)
+        if not site.get('findings'):
+            pdf.cell(0, 8, "  No site-wide SEO issues found.", 0, 1)
+        pdf.ln(5)
+
     # 4. Market Battlefield (Competitors)
     pdf.set_font("Arial", 'B', 12)
     pdf.cell(0, 10, "Market Battlefield (Identified Competitors):", 0, 1)
@@ -95,7 +145,78 @@ def create_pdf(business_name, url, score, ai_summary, ssl, seo, tech, competitor
     pdf.set_text_color(0, 100, 0)
     pdf.cell(0, 10, "RECOMMENDATION: Immediate Website Optimization Required.", 0, 1)
     
-    # Save File
-    filename = f"{clean_text(business_name).replace(' ', '_')}_Audit.pdf"
-    pdf.output(filename)
-    return filename
\ No newline at end of file
+    # PyFPDF returns a latin-1 str, fpdf2 a bytearray
+    out = pdf.output(dest='S')
+    return out.encode('latin-1') if isinstance(out, str) else bytes(out)
+
+# --- 3. BATCH RENDERING ---
+
+def _render_job(job):
+    # Top-level so the process pool can pickle it
+    job = dict(job)
+    filename = job.pop("filename", None) or report_filename(job.get("business_name"))
+    return filename, create_pdf(**job)
+
+def _unique_name(filename, used):
+    stem, ext = os.path.splitext(filename)
+    candidate, n = filename, 1
+    while candidate in used:
+        n += 1
+        candidate = f"{stem}_{n}{ext}"
+    used.add(candidate)
+    return candidate
+
+def render_reports(jobs, destination, workers=None, on_report=None):
+    """
+    Renders many reports on a process pool (PDF layout is CPU-bound, threads
+    would serialize on the GIL). `jobs` is an iterable of create_pdf keyword
+    dicts, optionally with a "filename". Each PDF is written as soon as it is
+    ready, into `destination`: a .zip archive, or else a directory.
+    Only a few jobs per worker are in flight, so the input can be a generator.
+    Returns the number of reports written; failures go to on_report(name, error).
+    """
+    workers = workers or os.cpu_count() or 1
+    to_zip = destination.lower().endswith(".zip")
+    if to_zip:
+        parent = os.path.dirname(destination)
+        if parent: os.makedirs(parent, exist_ok=True)
+        archive = zipfile.ZipFile(destination, "w", compression=zipfile.ZIP_DEFLATED)
+    else:
+        os.makedirs(destination, exist_ok=True)
+        archive = None
+
+    used = set()
+    written = 0
+    in_flight = {}
+
+    def collect(block_until):
+        nonlocal written
+        while len(in_flight) > block_until:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                label = in_flight.pop(future)
+                try:
+                    filename, data = future.result()
+                except Exception as e:
+                    print(f"PDF Render Error ({label}): {e}")
+                    if on_report: on_report(label, e)
+                    continue
+                filename = _unique_name(filename, used)
+                if archive is not None:
+                    archive.writestr(filename, data)
+                else:
+                    with open(os.path.join(destination, filename), "wb") as f:
+                        f.write(data)
+                written += 1
+                if on_report: on_report(filename, None)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for job in jobs:
+                collect(block_until=workers * 4 - 1)
+                in_flight[pool.submit(_render_job, job)] = job.get("filename") or job.get("business_name")
+            collect(block_until=0)
+    finally:
+        if archive is not None:
+            archive.close()
+    return written
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Module: results_store.py
+Description: Columnar Audit Result Store (append-only Parquet parts, one row per audit)
+Every finished audit is appended as a flat row of scoring features. Rows are
+never rewritten, so the store keeps the full history; load() returns the
+latest audit per target with scores computed from the current RULES.
+pandas/pyarrow are imported on first use, not at module import.
+"""
+import os
+import threading
+import time
+import uuid
+
+import config
+from fetcher import normalize_url
+from scoring import audit_features, score_frame, failed_rules
+
+STORE_DIR = config.get("RECON_STORE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".store", "audits")
+COMPACT_AFTER = config.get_int("STORE_COMPACT_AFTER", 64)   # Small part files before they are merged
+STORE_BATCH = 500                                           # Rows buffered per part file in bulk runs
+
+# --- 1. ROWS ---
+
+def audit_row(snapshot, audited_at=None):
+    """Flat row from a {"target", "audit", "competitors"} snapshot or main.py record."""
+    target, audit = snapshot["target"], snapshot["audit"]
+    row = {
+        "key": normalize_url(target.get("url")) or (target.get("name") or "").lower(),
+        "name": target.get("name") or "",
+        "location": target.get("location") or "",
+        "url": target.get("url") or "",
+        "industry": target.get("industry") or "",
+        "audited_at": audited_at or snapshot.get("audited_at") or snapshot.get("cached_at") or time.time(),
+        "competitors": len(snapshot.get("competitors") or []),
+    }
+    row.update(audit_features(audit))
+    return row
+
+# --- 2. STORE ---
+
+class ResultStore:
+    """
+    A directory of Parquet files. append() writes a new part file (written
+    under a temp name, then renamed, so readers never see half a file);
+    compact() merges parts into one without dropping any rows. Several
+    processes can append at once since part names never collide.
+    """
+    def __init__(self, path=None):
+        self.path = path or STORE_DIR
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def parts(self):
+        return sorted(
+            os.path.join(self.path, f) for f in os.listdir(self.path)
+            if f.endswith(".parquet") and not f.startswith(".")
+        )
+
+    def _write(self, df, prefix="part"):
+        name = f"{prefix}-{time.time():.6f}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp = os.path.join(self.path, f".{name}.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(self.path, name))
+
+    def append(self, rows):
+        """Writes rows (list of audit_row() dicts) as one part. Returns the row count."""
+        if not rows:
+            return 0
+        import pandas as pd
+        with self._lock:
+            self._write(pd.DataFrame(rows))
+            if len(self.parts()) > COMPACT_AFTER:
+                self.compact()
+        return len(rows)
+
+    def history(self, columns=None):
+        """Every stored row (all audits of all targets)."""
+        import pandas as pd
+        frames = []
+        for part in self.parts():
+            try:
+                frames.append(pd.read_parquet(part, columns=columns))
+            except FileNotFoundError:
+                continue  # Merged away by a concurrent compact()
+        if not frames:
+            return pd.DataFrame(columns=columns or ["key", "audited_at"])
+        df = pd.concat(frames, ignore_index=True)
+        # A concurrent compact() can briefly leave a row in two files
+        return df.drop_duplicates(subset=["key", "audited_at"]) if "audited_at" in df else df
+
+    def compact(self):
+        """Merges every part into one file (history is kept, only files change)."""
+        import pandas as pd
+        parts = self.parts()
+        if len(parts) < 2:
+            return 0
+        frames = []
+        for part in parts:
+            try:
+                frames.append(pd.read_parquet(part))
+            except FileNotFoundError:
+                pass
+        self._write(pd.concat(frames, ignore_index=True).drop_duplicates(subset=["key", "audited_at"]), prefix="compact")
+        for part in parts:
+            try:
+                os.remove(part)
+            except FileNotFoundError:
+                pass
+        return len(parts)
+
+    def load(self, rules=None):
+        """
+        Latest audit per target, scored with the current rules (vectorized),
+        worst score first. Adds "score" and "issues" columns.
+        """
+        df = self.history()
+        if df.empty:
+            return df
+        df = df.sort_values("audited_at").drop_duplicates(subset=["key"], keep="last")
+        kwargs = {"rules": rules} if rules is not None else {}
+        df["score"] = score_frame(df, **kwargs)
+        df["issues"] = failed_rules(df, **kwargs)
+        return df.sort_values(["score", "open_port_count"], ascending=[True, False]).reset_index(drop=True)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Process-wide ResultStore on STORE_DIR."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultStore()
+    return _store
+
+def record_audits(snapshots):
+    """Appends audit snapshots as one part. Never raises: the store is a side channel."""
+    try:
+        return get_store().append([audit_row(s) for s in snapshots])
+    except ImportError as e:
+        print(f"Store Warning: {e}, audit not persisted (pip install pandas pyarrow)")
+    except Exception as e:
+        print(f"Store Error: {e}")
@@ -1,121 +1,270 @@
 """
 Module: scanner.py
 Description: Serper.dev API with Multi-Pass Competitor Discovery
+Serper failures raise serper_client.SerperError subclasses (rate limit,
+auth, server, network) instead of looking like "no results".
 """
-import requests
 import json
-import streamlit as st
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+import config
+import metrics
+from cache import DiskCache
+from serper_client import SerperClient, SerperError
 
 # --- 1. CORE SEARCH FUNCTIONS ---
 
+# Repeat audits of the same business reuse the paid Serper responses
+SERPER_CACHE = DiskCache(
+    "serper",
+    ttl=config.get_int("SERPER_CACHE_TTL", 7 * 86400),
+    max_entries=config.get_int("SERPER_CACHE_MAX_ENTRIES", 50000)
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_serper_client():
+    """Process-wide SerperClient (one connection pool + one rate limiter)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SerperClient(config.get("SERPER_API_KEY"))
+    return _client
+
+def serper_query(endpoint, query, num_results):
+    """
+    Raw Serper payload for (endpoint, query, num), served from the disk cache
+    when fresh. Identical concurrent queries share one API call.
+    Raises a SerperError subclass on failure; failures are never cached.
+    """
+    key = json.dumps([endpoint, query, num_results])
+    hit = True
+
+    def load():
+        nonlocal hit
+        hit = False
+        return get_serper_client().query(endpoint, query, num_results)
+
+    with metrics.span("serper", endpoint=endpoint):
+        payload = SERPER_CACHE.get_or_set(key, load)
+    metrics.count_cache("serper", hit)
+    return payload
+
 def serper_search(query, num_results=5):
-    if "SERPER_API_KEY" not in st.secrets:
-        return []
-    url = "https://google.serper.dev/search"
-    payload = json.dumps({"q": query, "num": num_results})
-    headers = {'X-API-KEY': st.secrets["SERPER_API_KEY"], 'Content-Type': 'application/json'}
-    try:
-        response = requests.post(url, headers=headers, data=payload)
-        return response.json().get('organic', [])
-    except:
-        return []
+    return serper_query("search", query, num_results).get('organic', [])
 
 def serper_places(query, num_results=10):
-    if "SERPER_API_KEY" not in st.secrets:
-        return []
-    url = "https://google.serper.dev/places"
-    payload = json.dumps({"q": query, "num": num_results})
-    headers = {'X-API-KEY': st.secrets["SERPER_API_KEY"], 'Content-Type': 'application/json'}
-    try:
-        response = requests.post(url, headers=headers, data=payload)
-        return response.json().get('places', [])
-    except:
-        return []
+    return serper_query("places", query, num_results).get('places', [])
 
 # --- 2. BUSINESS LOCATORS ---
+# URL and social lookups read the SAME search payload (see query_planner.py),
+# so an audit pays for one search call, not two.
 
-def find_business_url(name, location):
-    query = f"{name} {location} official website"
-    results = serper_search(query)
-    skip = ['facebook', 'instagram', 'linkedin', 'yelp', 'tripadvisor', 'youtube', 'tiktok', 'wikipedia']
-    for r in results:
+AUDIT_SEARCH_NUM = 20
+
+# Directories and social networks (matched as the host or a parent domain, so x.com does not skip netflix.com)
+SKIP_DOMAINS = [
+    'facebook.com', 'instagram.com', 'linkedin.com', 'youtube.com', 'tiktok.com', 'twitter.com', 'x.com', 'wikipedia.org',
+    'yelp.com', 'yelp.ca', 'yelp.co.uk', 'yelp.com.au',
+    'tripadvisor.com', 'tripadvisor.ca', 'tripadvisor.co.uk', 'tripadvisor.com.au'
+]
+SOCIAL_TARGETS = {
+    "facebook.com": "Facebook", "instagram.com": "Instagram",
+    "linkedin.com": "LinkedIn", "twitter.com": "X (Twitter)", "x.com": "X (Twitter)",
+    "tiktok.com": "TikTok", "youtube.com": "YouTube"
+}
+
+def _domain(url):
+    host = urlparse(url if "//" in (url or "") else f"//{url or ''}").hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+def _on_domain(host, domain):
+    return host == domain or host.endswith("." + domain)
+
+def audit_search_query(name, location):
+    return " ".join(p for p in (name, location) if p)
+
+def extract_website(payload):
+    # The knowledge graph's website is the business's own claim; trust it first
+    kg_site = (payload.get('knowledgeGraph') or {}).get('website')
+    if kg_site:
+        return kg_site
+    for r in payload.get('organic', []):
         link = r.get('link', '')
-        if not any(x in link for x in skip):
+        if link and not any(_on_domain(_domain(link), d) for d in SKIP_DOMAINS):
             return link
     return None
 
-def find_social_links(name, location):
-    query = f"{name} {location} social media profile"
-    results = serper_search(query, num_results=10)
+def extract_socials(payload):
     socials = {}
-    targets = {
-        "facebook.com": "Facebook", "instagram.com": "Instagram", 
-        "linkedin.com": "LinkedIn", "twitter.com": "X (Twitter)",
-        "tiktok.com": "TikTok", "youtube.com": "YouTube"
-    }
-    for r in results:
-        link = r.get('link', '')
-        for domain, platform in targets.items():
-            if domain in link and platform not in socials:
+    links = [r.get('link', '') for r in payload.get('organic', [])]
+    links += [s.get('link', '') for r in payload.get('organic', []) for s in r.get('sitelinks', [])]
+    for link in links:
+        host = _domain(link)
+        for domain, platform in SOCIAL_TARGETS.items():
+            if _on_domain(host, domain) and platform not in socials:
                 socials[platform] = link
     return socials
 
-# --- 3. COMPETITOR FINDER (Multi-Pass Fix) ---
+def find_business_url(name, location):
+    return extract_website(serper_query("search", audit_search_query(name, location), AUDIT_SEARCH_NUM))
+
+def find_social_links(name, location):
+    return extract_socials(serper_query("search", audit_search_query(name, location), AUDIT_SEARCH_NUM))
+
+# --- 3. COMPETITOR FINDER (Parallel Multi-Pass) ---
 
-def find_competitors(target_name, industry, location, user_domain):
+MAX_COMPETITORS = config.get_int("MAX_COMPETITORS", 10)
+PLACES_PER_PASS = 20
+NEAR_DUPLICATE = 0.75     # Token-set Jaccard at/above which two names are the same business
+DISTANCE_PENALTY = 0.15   # Rank points lost per km from the target
+PASS_WORKERS = 2          # Passes in flight at once; later ones start only if still needed
+
+_STOPWORDS = {"the", "and", "of", "at", "by", "in", "inc", "corp", "co", "ltd", "llc", "branch"}
+# Category words say what a place is, not which business it is
+_GENERIC = {
+    "hotel", "hotels", "resort", "resorts", "casino", "restaurant", "cafe", "coffee", "bar", "grill",
+    "store", "shop", "mall", "center", "centre", "clinic", "hospital", "spa", "salon", "bank",
+    "school", "company", "group", "services", "city", "north", "south", "east", "west"
+}
+
+def _tokens(name):
+    name = (name or "").lower().replace("&", " and ")
+    return {t for t in re.split(r"[^a-z0-9]+", name) if t and t not in _STOPWORDS}
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def _distance_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(h))
+
+class _CompetitorIndex:
     """
-    Attempts to find competitors using specific industry terms first.
-    If none found (likely because the target is the only one),
-    falls back to broader terms (e.g. "Integrated Resort" -> "Resort").
+    Dedup index: exact domain, exact token-set key, then near-duplicate
+    names via an inverted token index (only names sharing a token are compared).
+    "Shangri-La EDSA" and "EDSA Shangri-La" share the key "edsa la shangri".
     """
+    def __init__(self):
+        self.domains = set()
+        self.keys = set()
+        self.by_token = {}
+
+    def seen(self, tokens, domain):
+        if domain and domain in self.domains: return True
+        if " ".join(sorted(tokens)) in self.keys: return True
+        candidates = {id(o): o for t in tokens for o in self.by_token.get(t, ())}
+        return any(_jaccard(tokens, other) >= NEAR_DUPLICATE for other in candidates.values())
+
+    def add(self, tokens, domain):
+        if domain: self.domains.add(domain)
+        self.keys.add(" ".join(sorted(tokens)))
+        for t in tokens:
+            self.by_token.setdefault(t, []).append(tokens)
+
+def _is_self(tokens, domain, brand, user_domain):
+    # Same site, or shares the target's brand words (not its category words)
+    if user_domain and domain and (domain == user_domain or domain.endswith("." + user_domain)):
+        return True
+    distinctive = tokens - _GENERIC
+    return bool(brand and distinctive) and len(brand & distinctive) / min(len(brand), len(distinctive)) >= 0.5
+
+def _competitor_passes(industry, location):
+    # 1. "Integrated Resort in Quezon City"  2. "Resort in Quezon City"  3. "Resort near Quezon City"
+    broad = industry.split()[-1] if industry.split() else industry
+    passes = [f"{industry} in {location}", f"{broad} in {location}", f"{broad} near {location}"]
+    return list(dict.fromkeys(passes))
+
+def _merge_passes(pass_results, target_name, location, user_domain, limit=None):
+    brand = _tokens(target_name) - _GENERIC - _tokens(location)
+    user_domain = _domain(user_domain) if user_domain else ""
+    index = _CompetitorIndex()
+    origin = None
     competitors = []
-    seen_urls = set()
-    
-    # Define exclusion keywords (e.g., "Solaire")
-    exclusion_keywords = target_name.lower().split()[:2]
-    
-    # Strategy: Try specific first, then broad
-    # 1. "Integrated Resort in Quezon City"
-    # 2. "Resort in Quezon City" (The broad fallback)
-    search_queries = [
-        f"{industry} in {location}",
-        f"{industry.split()[-1]} in {location}" # Grabs the last word (e.g. "Resort" from "Integrated Resort")
-    ]
-    
-    print(f"[*] Competitor Radar: Targets {exclusion_keywords}")
-
-    for query in search_queries:
-        if len(competitors) >= 4:
-            break
-            
-        print(f"[*] Trying Query: {query}")
-        places = serper_places(query, num_results=15)
-        
+
+    for rank, places in enumerate(pass_results):
         for p in places:
-            name = p.get('title', 'Unknown')
-            website = p.get('website', '') 
-            
-            # --- FILTERS ---
-            # 1. Self-Destruct: Skip if name contains target keywords
-            if any(keyword in name.lower() for keyword in exclusion_keywords):
-                continue
-            
-            # 2. Domain Filter: Skip if URL matches user
-            if user_domain and website and (user_domain in website):
-                continue
-                
-            # 3. Duplicate Filter: Skip if we already have this competitor
-            # (Checks both name and website to be safe)
-            if website in seen_urls:
+            name = p.get('title') or 'Unknown'
+            website = p.get('website', '')
+            tokens, domain = _tokens(name), _domain(website)
+
+            if _is_self(tokens, domain, brand, user_domain):
+                if origin is None and p.get('latitude') is not None and p.get('longitude') is not None:
+                    origin = (p['latitude'], p['longitude'])
                 continue
-            if any(c['name'] == name for c in competitors):
+            if index.seen(tokens, domain):
                 continue
+            index.add(tokens, domain)
+            competitors.append({
+                "name": name,
+                "url": website or "No Website Listed",
+                "rating": p.get('rating'),
+                "reviews": p.get('ratingCount'),
+                "category": p.get('category'),
+                "address": p.get('address'),
+                "_lat": p.get('latitude'), "_lng": p.get('longitude'), "_pass": rank
+            })
+        if limit and len(competitors) >= limit:
+            break
+    return competitors, origin
+
+def _rank(competitors, origin):
+    # Pass order first (a specific match beats any broad one), then quality within a pass
+    for c in competitors:
+        lat, lng = c.pop("_lat"), c.pop("_lng")
+        c["distance_km"] = round(_distance_km(origin[0], origin[1], lat, lng), 2) if origin and lat is not None and lng is not None else None
+        # Well-reviewed and close beats a lone 5-star review across town
+        score = (c["rating"] or 0) * math.log1p(c["reviews"] or 0)
+        if c["distance_km"] is not None:
+            score -= DISTANCE_PENALTY * c["distance_km"]
+        c["_score"] = score
+    competitors.sort(key=lambda c: (c.pop("_pass"), -c.pop("_score")))
+    return competitors
 
-            # Add to list
-            competitors.append({"name": name, "url": website or "No Website Listed"})
-            if website: seen_urls.add(website)
-            
-            if len(competitors) >= 4: 
+def find_competitors(target_name, industry, location, user_domain, max_competitors=MAX_COMPETITORS, local_pack=None):
+    """
+    Runs the query passes (specific -> broad) PASS_WORKERS at a time.
+    Results are merged and ranked in pass order, so specific matches still
+    win; once the passes finished so far yield enough competitors, passes
+    that have not started yet are cancelled.
+    `local_pack` (places from the audit search, already paid for) is merged
+    last: it usually contains the target itself, which fixes the origin.
+    Within a pass, competitors are ranked by rating/reviews and distance.
+    """
+    passes = _competitor_passes(industry, location)
+    print(f"[*] Competitor Radar: {len(passes)} passes for '{target_name}'")
+
+    pool = ThreadPoolExecutor(max_workers=min(PASS_WORKERS, len(passes)))
+    futures = [pool.submit(metrics.bind(serper_places), q, PLACES_PER_PASS) for q in passes]
+    results = [None] * len(passes)
+    errors = []
+    try:
+        for future in as_completed(futures):
+            i = futures.index(future)
+            try:
+                results[i] = future.result()
+            except SerperError as e:
+                results[i] = []
+                errors.append(e)
+            # Only an unbroken prefix of finished passes counts, to keep pass priority
+            done = []
+            for r in results:
+                if r is None: break
+                done.append(r)
+            if len(_merge_passes(done, target_name, location, user_domain, max_competitors)[0]) >= max_competitors:
                 break
-    
-    return competitors
\ No newline at end of file
+    finally:
+        # Don't wait for abandoned passes; their responses still land in the cache
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    finished = [r for r in results if r is not None]
+    if errors and len(errors) == len(finished) and not any(finished) and not local_pack:
+        raise errors[0]
+    competitors, origin = _merge_passes(finished + [local_pack or []], target_name, location, user_domain)
+    return _rank(competitors, origin)[:max_competitors]
@@ -0,0 +1,77 @@
+"""
+Module: scoring.py
+Description: Digital Health Score (one rule table, scored per audit or vectorized over a portfolio)
+Rules read flat feature columns, so the same table scores a single audit
+(plain dict of scalars) and a pandas DataFrame of every stored audit at once.
+Changing RULES re-scores the whole portfolio on its next load.
+"""
+
+# --- 1. FEATURES ---
+
+def audit_features(audit):
+    """Flat scoring/portfolio features from an audit_results() dict."""
+    ssl_details = audit.get('ssl_details') or {}
+    seo = audit.get('seo') or {}
+    site = audit.get('site') or {}
+    dns = audit.get('dns') or {}
+    open_ports = sorted(str(p) for p, status in (audit.get('ports') or {}).items() if "Risk" in str(status))
+    return {
+        "ssl_valid": bool(audit.get('ssl')),
+        "ssl_days_remaining": ssl_details.get('days_remaining'),
+        "ssl_findings": len(ssl_details.get('findings') or []),
+        "hsts": bool((ssl_details.get('hsts') or {}).get('enabled')),
+        "has_title": bool(seo.get('title')),
+        "has_description": bool(seo.get('description')),
+        "has_canonical": bool(seo.get('canonical')),
+        "has_viewport": bool(seo.get('viewport')),
+        "h1_count": seo.get('h1_count') or 0,
+        "structured_data": bool(seo.get('structured_data')),
+        "tech": "|".join(audit.get('tech') or []),
+        "open_ports": ",".join(open_ports),
+        "open_port_count": len(open_ports),
+        "has_spf": bool(dns.get('spf')),
+        "has_dmarc": bool(dns.get('dmarc')),
+        "dmarc_policy": dns.get('dmarc_policy') or "",
+        "email_findings": len(dns.get('findings') or []),
+        "site_pages": site.get('pages') or 0,
+        "site_broken": site.get('broken_count') or 0,
+        "site_missing_descriptions": (site.get('missing_count') or {}).get('description', 0),
+    }
+
+# --- 2. RULES ---
+# (name, penalty, condition). A condition gets the features as a mapping
+# and must use only element-wise operators (==, >, &, |), so it works on
+# scalars and on DataFrame columns alike.
+
+RULES = [
+    ("no_ssl",         30, lambda f: f["ssl_valid"] == False),  # noqa: E712 (element-wise on Series)
+    ("no_description", 15, lambda f: f["has_description"] == False),  # noqa: E712
+    ("open_ports",     20, lambda f: f["open_port_count"] > 0),
+]
+
+MAX_SCORE = 100
+
+def score_row(features, rules=RULES):
+    score = MAX_SCORE - sum(penalty * bool(cond(features)) for _, penalty, cond in rules)
+    return max(0, min(MAX_SCORE, score))
+
+def score_audit(audit):
+    """
+    Digital Health Score (0-100) from an audit_results() dict.
+    Shared by the dashboard, the PDF and the batch CLI.
+    """
+    return score_row(audit_features(audit))
+
+def score_frame(df, rules=RULES):
+    """Vectorized score_row(): one int Series for every row of `df`."""
+    score = MAX_SCORE
+    for _, penalty, cond in rules:
+        score = score - penalty * cond(df).astype("int64")
+    return score.clip(0, MAX_SCORE) if hasattr(score, "clip") else score
+
+def failed_rules(df, rules=RULES):
+    """Comma-separated names of the rules each row trips (for the portfolio table)."""
+    flags = [cond(df).map({True: name + ",", False: ""}) for name, _, cond in rules]
+    if not flags:
+        return df.index.to_series().map(lambda _: "")
+    return sum(flags[1:], flags[0]).str.rstrip(",")
@@ -0,0 +1,167 @@
+"""
+Module: seo_extractor.py
+Description: Streaming SEO Extractor (parses only up to </head>, reads at most a capped number of bytes)
+"""
+import codecs
+import re
+from html.parser import HTMLParser
+
+from fetcher import get_session, iter_body, DEFAULT_TIMEOUT
+
+MAX_SEO_BYTES = 512 * 1024   # Body bytes scanned for <h1>/structured data after the head
+
+_H1 = re.compile(rb"<h1[\s>]", re.I)
+_LD_JSON = re.compile(rb"""<script[^>]+type\s*=\s*["']?application/ld\+json""", re.I)
+_MICRODATA = re.compile(rb"\sitemscope[\s>=]", re.I)
+_LD_TYPE = re.compile(rb'"@type"\s*:\s*"([^"]{1,60})"')
+
+# Tags that can only appear once the document body has started
+_BODY_TAGS = {"body", "div", "p", "h1", "h2", "main", "header", "nav", "section", "article", "footer", "img", "table", "form"}
+
+def empty_seo():
+    return {
+        "title": None, "description": None, "canonical": None, "robots": None, "viewport": None,
+        "og": {}, "hreflang": [], "h1_count": 0, "structured_data": False, "structured_data_types": [],
+        "bytes_read": 0, "truncated": False
+    }
+
+# --- 1. HEAD PARSER ---
+
+class HeadParser(HTMLParser):
+    """
+    Event-based parser (no DOM tree). Collects head metadata and flips
+    .done at </head>, or at the first tag that can only live in <body>.
+    Body tags inside a head <noscript> (tracking pixels) don't count.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.seo = empty_seo()
+        self.done = False
+        self._in_title = False
+        self._title = []
+        self._noscript = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.done: return
+        if tag == "noscript":
+            self._noscript += 1
+            return
+        if tag in _BODY_TAGS and (tag == "body" or not self._noscript):
+            self.done = True
+            return
+        a = {k.lower(): (v or "").strip() for k, v in attrs if k}
+        if tag == "title" and self.seo["title"] is None:
+            self._in_title = True
+        elif tag == "meta":
+            self._meta(a)
+        elif tag == "link":
+            rel = a.get("rel", "").lower().split()
+            if "canonical" in rel and a.get("href"):
+                self.seo["canonical"] = a["href"]
+            elif "alternate" in rel and a.get("hreflang") and a.get("href"):
+                self.seo["hreflang"].append({"lang": a["hreflang"], "href": a["href"]})
+        elif tag == "script" and a.get("type", "").lower() == "application/ld+json":
+            self.seo["structured_data"] = True
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def _meta(self, a):
+        name = (a.get("name") or a.get("property") or "").lower()
+        content = a.get("content")
+        if not name or content is None: return
+        if name == "description" and self.seo["description"] is None:
+            self.seo["description"] = content or None
+        elif name == "robots":
+            self.seo["robots"] = content
+        elif name == "viewport":
+            self.seo["viewport"] = content
+        elif name.startswith("og:"):
+            self.seo["og"].setdefault(name[3:], content)
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.seo["title"] = " ".join("".join(self._title).split()) or None
+        elif tag == "noscript" and self._noscript:
+            self._noscript -= 1
+        elif tag == "head":
+            self.done = True
+
+# --- 2. EXTRACTION ---
+
+def extract_seo(chunks, encoding="utf-8", max_bytes=MAX_SEO_BYTES, head_only=False):
+    """
+    Pulls the SEO set out of an iterable of raw byte chunks in one pass.
+    The HTML parser stops at </head>; after that only cheap byte regexes
+    look for <h1> and structured data, and only within max_bytes.
+    head_only=True stops reading as soon as the head is done.
+    Never raises on malformed markup.
+    """
+    parser = HeadParser()
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    read = 0
+    tail = b""  # Carries a partial tag across chunk boundaries for the byte regexes
+    h1_count = 0
+    ld_types = []
+    microdata = False
+
+    for chunk in chunks:
+        if read >= max_bytes:
+            parser.seo["truncated"] = True
+            break
+        chunk = chunk[:max_bytes - read]
+        read += len(chunk)
+
+        if not parser.done:
+            try:
+                parser.feed(decoder.decode(chunk))
+            except Exception:
+                parser.done = True  # Broken markup: keep what we have
+            if parser.done and head_only:
+                break
+
+        window = tail + chunk
+        h1_count += len(_H1.findall(window, len(tail) - min(len(tail), 3)))
+        if _LD_JSON.search(window):
+            parser.seo["structured_data"] = True
+        if not microdata and _MICRODATA.search(window):
+            microdata = True
+        if len(ld_types) < 10:
+            ld_types.extend(t.decode("utf-8", "replace") for t in _LD_TYPE.findall(window))
+        tail = chunk[-64:]
+
+    seo = parser.seo
+    if parser._in_title and seo["title"] is None:
+        seo["title"] = " ".join("".join(parser._title).split()) or None  # Unclosed <title>
+    seo["h1_count"] = None if head_only else h1_count
+    seo["structured_data"] = seo["structured_data"] or microdata
+    seo["structured_data_types"] = list(dict.fromkeys(ld_types))[:10]
+    seo["bytes_read"] = read
+    return seo
+
+def extract_seo_from_page(page, max_bytes=MAX_SEO_BYTES):
+    """Same extraction over a fetcher.PageResponse that is already in memory."""
+    seo = extract_seo(page.iter_chunks(), page.encoding or "utf-8", max_bytes)
+    seo["truncated"] = seo["truncated"] or page.truncated
+    return seo
+
+def stream_seo(url, max_bytes=MAX_SEO_BYTES, head_only=True, timeout=DEFAULT_TIMEOUT):
+    """
+    Standalone streaming check: downloads only until </head> (or max_bytes)
+    and closes the connection. Use when no shared page is available.
+    """
+    response = get_session().get(url, timeout=timeout, stream=True)
+    try:
+        encoding = response.encoding if "charset" in response.headers.get("content-type", "").lower() else "utf-8"
+        return extract_seo(iter_body(response, max_bytes), encoding, max_bytes, head_only)
+    finally:
+        response.close()
@@ -0,0 +1,142 @@
+"""
+Module: serper_client.py
+Description: Pooled, rate-limited, retrying HTTP client for the Serper.dev API
+"""
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+SERPER_BASE_URL = config.get("SERPER_BASE_URL", "https://google.serper.dev")
+SERPER_QPS = config.get_float("SERPER_QPS", 5)       # Match the plan's queries/second
+SERPER_BURST = config.get_int("SERPER_BURST", 10)
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 20
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5   # Seconds; doubles each attempt
+BACKOFF_CAP = 20.0
+
+# --- 1. TYPED ERRORS ---
+
+class SerperError(Exception):
+    """Base class: anything that went wrong talking to Serper."""
+    status_code = None
+
+class SerperConfigError(SerperError):
+    """No API key configured."""
+
+class SerperAuthError(SerperError):
+    """401/403: key rejected or out of credits."""
+
+class SerperRateLimitError(SerperError):
+    """429 that survived every retry."""
+
+class SerperServerError(SerperError):
+    """5xx that survived every retry."""
+
+class SerperNetworkError(SerperError):
+    """Timeout or connection failure that survived every retry."""
+
+class SerperResponseError(SerperError):
+    """Any other non-2xx status, or a body that isn't JSON."""
+
+def _http_error(response):
+    code = response.status_code
+    if code in (401, 403): cls = SerperAuthError
+    elif code == 429: cls = SerperRateLimitError
+    elif code >= 500: cls = SerperServerError
+    else: cls = SerperResponseError
+    err = cls(f"Serper HTTP {code}: {response.text[:200]}")
+    err.status_code = code
+    return err
+
+# --- 2. RATE LIMITER ---
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens/second, up to `capacity` saved up.
+    acquire() blocks until a token is available. Thread-safe.
+    """
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+# --- 3. CLIENT ---
+
+class SerperClient:
+    """
+    One pooled keep-alive session shared by every Serper call in the process.
+    Retries 429/5xx/network failures with exponential backoff + full jitter,
+    honouring Retry-After when Serper sends it.
+    """
+    def __init__(self, api_key, base_url=SERPER_BASE_URL, qps=SERPER_QPS, burst=SERPER_BURST,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_retries=MAX_RETRIES, pool_size=32):
+        if not api_key:
+            raise SerperConfigError("SERPER_API_KEY is not configured.")
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = TokenBucket(qps, burst)
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=pool_size))
+        self.session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=pool_size))
+        self.session.headers.update({'X-API-KEY': api_key, 'Content-Type': 'application/json'})
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(BACKOFF_CAP, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+    def query(self, endpoint, query, num_results=10):
+        """
+        POSTs one query to /<endpoint> ("search", "places", ...) and returns
+        the decoded JSON payload. Raises a SerperError subclass on failure.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        payload = {"q": query, "num": num_results}
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            retry_after = None
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                last_error = SerperNetworkError(f"Serper unreachable: {e}")
+            else:
+                if response.ok:
+                    try:
+                        return response.json()
+                    except ValueError:
+                        raise SerperResponseError("Serper returned a non-JSON body.")
+                last_error = _http_error(response)
+                if not isinstance(last_error, (SerperRateLimitError, SerperServerError)):
+                    raise last_error
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, retry_after))
+
+        raise last_error
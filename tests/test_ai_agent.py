@@ -0,0 +1,84 @@
+import pytest
+
+import ai_agent
+from cache import DiskCache, LRUCache, TieredCache, MISS
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _BlockedChunk:
+    @property
+    def text(self):
+        raise ValueError("response was blocked")
+
+
+class EmptyModel:
+    """Every chunk safety-blocked or blank, as Gemini sends for a blocked prompt."""
+    model_name = "models/fake-empty"
+
+    def generate_content(self, prompt, stream=False):
+        if not stream:
+            return _Chunk("")
+        return iter([_BlockedChunk(), _Chunk(""), _BlockedChunk()])
+
+
+class CountingModel:
+    model_name = "models/fake-counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        text = f"Narrative {self.calls}"
+        return iter([_Chunk(text)]) if stream else _Chunk(text)
+
+
+def _use_model(monkeypatch, tmp_path, model):
+    ai_cache = TieredCache(LRUCache(max_entries=64), DiskCache("ai", path=str(tmp_path / "ai.sqlite3")))
+    monkeypatch.setattr(ai_agent, "AI_CACHE", ai_cache)
+    monkeypatch.setattr(ai_agent, "NARRATIVE_STORE", DiskCache("narratives", path=str(tmp_path / "narratives.sqlite3")))
+    monkeypatch.setattr(ai_agent, "get_working_model", lambda: model)
+    return model
+
+
+@pytest.fixture
+def empty_model(monkeypatch, tmp_path):
+    return _use_model(monkeypatch, tmp_path, EmptyModel())
+
+
+@pytest.fixture
+def counting_model(monkeypatch, tmp_path):
+    return _use_model(monkeypatch, tmp_path, CountingModel())
+
+
+def test_empty_stream_is_not_cached(empty_model):
+    with pytest.raises(ai_agent.EmptyResponseError):
+        list(ai_agent._generate_stream(empty_model, "prompt", ttl=60))
+    assert ai_agent.AI_CACHE.get(ai_agent._cache_key(empty_model, "prompt")) is MISS
+
+
+def test_empty_generate_is_not_cached(empty_model):
+    with pytest.raises(ai_agent.EmptyResponseError):
+        ai_agent._generate(empty_model, "prompt", ttl=60)
+    assert ai_agent.AI_CACHE.get(ai_agent._cache_key(empty_model, "prompt")) is MISS
+
+
+@pytest.mark.parametrize("narrate", [ai_agent.generate_audit_narrative, lambda *a: "".join(ai_agent.stream_audit_narrative(*a))])
+def test_empty_narrative_is_not_stored(empty_model, narrate):
+    text = narrate("Acme", "https://acme.test", 70, True, {}, {}, [])
+    assert text.startswith("Error:")
+    assert ai_agent.NARRATIVE_STORE.get(ai_agent._narrative_key("Acme", "https://acme.test")) is MISS
+
+
+@pytest.mark.parametrize("narrate", [ai_agent.generate_audit_narrative, lambda *a: "".join(ai_agent.stream_audit_narrative(*a))])
+def test_narrative_is_regenerated_when_ports_or_tech_change(counting_model, narrate):
+    base = ("Acme", "https://acme.test", 70, True, {"443": "Open"}, {"description": "x"}, ["Nginx"])
+    assert narrate(*base) == "Narrative 1"
+    assert narrate(*base) == "Narrative 1"
+    assert narrate(*base[:4], {"21": "Open (Risk)"}, *base[5:]) == "Narrative 2"
+    assert narrate(*base[:6], ["Nginx", "WordPress"]) == "Narrative 3"
+    assert counting_model.calls == 3
@@ -0,0 +1,114 @@
+import threading
+import time
+import types
+
+import pytest
+
+import cache
+from cache import DiskCache, LRUCache, TieredCache, MISS
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def disk(tmp_path):
+    return DiskCache("test", ttl=60, max_entries=3, path=str(tmp_path / "test.sqlite3"))
+
+
+# --- Expiry ---
+
+def test_lru_entries_expire(clock):
+    lru = LRUCache(max_entries=10, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2, ttl=5)
+    clock.now += 10
+    assert lru.get("a") == 1
+    assert lru.get("b") is MISS
+    clock.now += 60
+    assert lru.get("a") is MISS
+
+
+def test_disk_entries_expire(clock, disk):
+    disk.set("a", {"x": 1})
+    disk.set("b", [1, 2], ttl=5)
+    clock.now += 10
+    assert disk.get("a") == {"x": 1}
+    assert disk.get("b") is MISS
+    clock.now += 60
+    assert disk.get("a") is MISS
+
+
+# --- Eviction order ---
+
+def test_lru_evicts_least_recently_used(clock):
+    lru = LRUCache(max_entries=3)
+    for key in "abc":
+        lru.set(key, key)
+    lru.get("a")          # a is now the most recently used
+    lru.set("d", "d")     # evicts b
+    assert lru.get("b") is MISS
+    assert [lru.get(k) for k in "acd"] == ["a", "c", "d"]
+
+
+def test_disk_evicts_least_recently_accessed(clock, disk):
+    disk.EVICT_EVERY = 1  # Check the bound on every write
+    for key in "abc":
+        clock.now += 1
+        disk.set(key, key)
+    clock.now += 1
+    disk.get("a")
+    clock.now += 1
+    disk.set("d", "d")
+    assert disk.get("b") is MISS
+    assert [disk.get(k) for k in "acd"] == ["a", "c", "d"]
+
+
+# --- Single flight ---
+
+@pytest.mark.parametrize("make", [
+    lambda path: DiskCache("flight", path=path),
+    lambda path: TieredCache(LRUCache(), DiskCache("flight", path=path)),
+])
+def test_get_or_set_computes_once_per_key(tmp_path, make):
+    store = make(str(tmp_path / "flight.sqlite3"))
+    calls = []
+    start = threading.Barrier(16)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)  # Keep the flight open while the others arrive
+        return "value"
+
+    def worker(results):
+        start.wait()
+        results.append(store.get_or_set("key", loader))
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(16)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(calls) == 1
+    assert results == ["value"] * 16
+
+
+def test_get_or_set_shares_errors_without_caching_them(disk):
+    def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        disk.get_or_set("key", failing)
+    assert disk.get("key") is MISS
+    assert disk.get_or_set("key", lambda: 42) == 42
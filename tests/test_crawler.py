@@ -0,0 +1,46 @@
+from requests.structures import CaseInsensitiveDict
+
+import crawler
+from crawler import HostGate, crawl_site
+from fetcher import PageResponse
+
+SITE = {
+    "/": b'<html><title>Home</title><a href="/a">A</a><a href="/b">B</a></html>',
+    "/a": b"<html><title>A</title></html>",
+    "/b": b"<html><title>B</title></html>",
+}
+
+
+def _fetch(url, **kwargs):
+    page = PageResponse(url)
+    path = url.split("crawl.test", 1)[1] or "/"
+    page.status_code = 200 if path in SITE else 404
+    page.headers = CaseInsensitiveDict({"Content-Type": "text/html"})
+    page.body = SITE.get(path, b"")
+    return page
+
+
+def test_a_failing_page_is_recorded_not_raised(monkeypatch):
+    monkeypatch.setattr(crawler, "fetch_page", _fetch)
+    real = crawler.fingerprint
+
+    def fingerprint(page):
+        if page.url.endswith("/a"):
+            raise ValueError("bad markup")
+        return real(page)
+
+    monkeypatch.setattr(crawler, "fingerprint", fingerprint)
+    pages = []
+    report = crawl_site("https://crawl.test/", on_page=pages.append, gate=HostGate(delay=0.0), use_sitemap=False)
+
+    assert report["pages"] == 3
+    failed = [p for p in pages if p["error"]]
+    assert [(p["url"], p["error"], p["status"]) for p in failed] == [("https://crawl.test/a", "bad markup", 200)]
+    assert report["broken_count"] == 1
+
+
+def test_audit_site_stage_is_off_by_default(monkeypatch):
+    import orchestrator
+    monkeypatch.setattr(crawler, "fetch_page", lambda *a, **k: (_ for _ in ()).throw(AssertionError("crawled")))
+    assert crawler.CRAWL_AUDIT_PAGES == 0
+    assert orchestrator._stage_site({"url": "https://crawl.test/", "page": None}) is None
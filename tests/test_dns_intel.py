@@ -0,0 +1,77 @@
+import socket
+import threading
+
+import pytest
+
+pytest.importorskip("dns.resolver")
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.resolver
+import dns.rrset
+
+import dns_intel
+from cache import LRUCache
+
+ZONE = {
+    ("example.test", "SOA"): ["ns1.example.test. hostmaster.example.test. 1 3600 600 86400 300"],
+    ("example.test", "MX"): ["10 mx1.example.test."],
+    ("example.test", "NS"): ["ns1.example.test.", "ns2.example.test."],
+    ("example.test", "TXT"): ['"v=spf1 include:_spf.example.test -all"'],
+    ("_dmarc.example.test", "TXT"): ['"v=DMARC1; p=reject"'],
+    ("shop.example.test", "A"): ["127.0.0.2"],
+    ("deep.shop.example.test", "A"): ["127.0.0.3"],
+}
+
+
+@pytest.fixture
+def fake_dns(monkeypatch):
+    """Authoritative stand-in for example.test on a local UDP port."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+
+    def serve():
+        while True:
+            try:
+                data, addr = sock.recvfrom(4096)
+            except OSError:
+                return
+            query = dns.message.from_wire(data)
+            response = dns.message.make_response(query)
+            question = query.question[0]
+            name, rdtype = question.name.to_text().rstrip("."), dns.rdatatype.to_text(question.rdtype)
+            records = ZONE.get((name, rdtype))
+            if records:
+                response.answer.append(dns.rrset.from_text(question.name, 300, "IN", rdtype, *records))
+            elif not any(n == name for n, _ in ZONE):
+                response.set_rcode(dns.rcode.NXDOMAIN)
+            sock.sendto(response.to_wire(), addr)
+
+    threading.Thread(target=serve, daemon=True).start()
+    resolver = dns.resolver.Resolver(configure=False)
+    resolver.nameservers = ["127.0.0.1"]
+    resolver.port = sock.getsockname()[1]
+    resolver.lifetime = 2
+    monkeypatch.setattr(dns_intel, "_resolver", resolver)
+    monkeypatch.setattr(dns_intel, "DNS_CACHE", LRUCache(max_entries=1024))
+    yield
+    sock.close()
+
+
+def test_subdomain_uses_organizational_domain(fake_dns):
+    assert dns_intel.mail_domain("shop.example.test") == "example.test"
+    assert dns_intel.mail_domain("deep.shop.example.test") == "example.test"
+    assert dns_intel.mail_domain("www.example.test") == "example.test"
+
+
+def test_subdomain_lookup_has_no_false_email_findings(fake_dns):
+    record = dns_intel.lookup("shop.example.test")
+    assert record["domain"] == "example.test"
+    assert record["a"] == ["127.0.0.2"]
+    assert record["spf"].startswith("v=spf1")
+    assert record["dmarc_policy"] == "reject"
+    assert record["findings"] == []
+
+
+def test_unknown_domain_falls_back_to_host(fake_dns):
+    assert dns_intel.mail_domain("shop.nowhere.test") == "shop.nowhere.test"
@@ -0,0 +1,35 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from fetcher import fetch_page
+from tls_probe import parse_hsts
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = b"<html><head><title>x</title></head></html>"
+        self.send_response(200)
+        self.send_header("content-type", "text/html")
+        self.send_header("strict-transport-security", "max-age=600; includeSubDomains")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server_url():
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+
+
+def test_page_headers_are_case_insensitive(server_url):
+    page = fetch_page(server_url)
+    assert page.headers.get("Content-Type") == "text/html"
+    assert parse_hsts(page.headers) == {"enabled": True, "max_age": 600, "include_subdomains": True, "preload": False}
@@ -0,0 +1,25 @@
+from fetcher import PageResponse
+from fingerprint import fingerprint
+
+
+def _page(body, headers=None):
+    page = PageResponse("https://example.test/")
+    page.status_code = 200
+    page.body = body.encode("utf-8")
+    page.headers.update(headers or {})
+    return page
+
+
+def _names(page):
+    return {t["name"] for t in fingerprint(page)}
+
+
+def test_overlapping_body_literals_are_all_reported():
+    # "/sites/default/files/" (Drupal) and "/wp-content/" (WordPress) share the middle "/"
+    names = _names(_page('<img src="/sites/default/files/wp-content/logo.png">'))
+    assert {"Drupal", "WordPress"} <= names
+
+
+def test_contained_and_separate_literals_still_match():
+    names = _names(_page('<script src="/wp-includes/js/wp-emoji-release.min.js"></script><div id="drupal-settings-json"></div>'))
+    assert {"Drupal", "WordPress"} <= names
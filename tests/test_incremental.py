@@ -0,0 +1,51 @@
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+import incremental
+from cache import DiskCache
+from fetcher import PageResponse
+
+
+def _page(url, status, headers, body=b""):
+    page = PageResponse(url)
+    page.status_code = status
+    page.headers = CaseInsensitiveDict(headers)
+    page.body = body
+    page.not_modified = status == 304
+    return page
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    """Fake fetch_page: answers with the queued responses and records the request headers."""
+    monkeypatch.setattr(incremental, "PAGE_STATE", DiskCache("page_state", path=str(tmp_path / "state.sqlite3")))
+    monkeypatch.setattr(incremental, "ANALYSIS", DiskCache("analysis", path=str(tmp_path / "analysis.sqlite3")))
+    sent, responses = [], []
+
+    def fetch_page(url, headers=None, **kwargs):
+        sent.append(dict(headers or {}))
+        return responses.pop(0)(url)
+
+    monkeypatch.setattr(incremental, "fetch_page", fetch_page)
+    return sent, responses
+
+
+def test_304_refreshes_the_stored_validators(server):
+    sent, responses = server
+    url = "https://acme.test/"
+    responses.append(lambda u: _page(u, 200, {
+        "etag": '"v1"', "last-modified": "Mon, 01 Jun 2026 00:00:00 GMT", "strict-transport-security": "max-age=300"
+    }, b"<html></html>"))
+    first = incremental.fetch_incremental(url)
+    for kind in incremental.KINDS:
+        incremental.ANALYSIS.set(f"{kind}|{first.analysis_key}", {})
+
+    responses.append(lambda u: _page(u, 304, {"ETag": '"v2"', "Last-Modified": "Tue, 02 Jun 2026 00:00:00 GMT"}))
+    second = incremental.fetch_incremental(url)
+    assert sent[1] == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jun 2026 00:00:00 GMT"}
+    assert second.unchanged and second.analysis_key == first.analysis_key
+    assert second.headers["Strict-Transport-Security"] == "max-age=300"
+
+    responses.append(lambda u: _page(u, 304, {}))
+    incremental.fetch_incremental(url)
+    assert sent[2] == {"If-None-Match": '"v2"', "If-Modified-Since": "Tue, 02 Jun 2026 00:00:00 GMT"}
@@ -0,0 +1,74 @@
+import multiprocessing
+
+import pytest
+
+from jobs import JobQueue, QUEUED, RUNNING, FAILED
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def _age_heartbeat(queue, job_id, seconds):
+    with queue._lock:
+        queue._conn.execute("UPDATE jobs SET heartbeat_at = heartbeat_at - ? WHERE id = ?", (seconds, job_id))
+
+
+def _claim_all(path, worker_id, out):
+    queue = JobQueue(path)
+    claimed = []
+    while True:
+        job = queue.claim(worker_id)
+        if job is None:
+            break
+        claimed.append(job["id"])
+    out.put(claimed)
+
+
+def test_claim_hands_each_job_to_exactly_one_process(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(path)
+    submitted = {queue.submit(f"Lead {i}", "Makati") for i in range(200)}
+
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    workers = [ctx.Process(target=_claim_all, args=(path, f"w{i}", out)) for i in range(4)]
+    for w in workers: w.start()
+    claimed = [job_id for _ in workers for job_id in out.get(timeout=60)]
+    for w in workers: w.join(timeout=60)
+
+    assert len(claimed) == len(submitted)
+    assert set(claimed) == submitted
+    assert queue.counts() == {RUNNING: 200}
+
+
+def test_claim_takes_the_oldest_job(queue):
+    first = queue.submit("A", "")
+    queue.submit("B", "")
+    job = queue.claim("w1")
+    assert job["id"] == first
+    assert job["status"] == RUNNING and job["worker"] == "w1" and job["attempts"] == 1
+
+
+def test_requeue_stale_returns_abandoned_jobs(queue):
+    job_id = queue.submit("A", "")
+    queue.claim("w1")
+    assert queue.requeue_stale(stale_after=60) == 0  # Still heart-beating
+    _age_heartbeat(queue, job_id, 120)
+    assert queue.requeue_stale(stale_after=60) == 1
+    job = queue.get(job_id)
+    assert job["status"] == QUEUED and job["worker"] is None
+    assert queue.claim("w2")["attempts"] == 2
+
+
+def test_job_fails_after_max_attempts(queue):
+    job_id = queue.submit("A", "")
+    for attempt in range(1, 4):
+        assert queue.claim(f"w{attempt}")["id"] == job_id
+        _age_heartbeat(queue, job_id, 120)
+        queue.requeue_stale(stale_after=60, max_attempts=3)
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert job["error"] == "worker lost"
+    assert queue.claim("w4") is None
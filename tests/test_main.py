@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """run_batch() without Serper/Gemini/DNS: audit_target is faked per test."""
+    monkeypatch.setattr(main, "prefetch_industries", lambda rows: rows)
+    monkeypatch.setattr(main, "prefetch_dns", lambda rows: rows)
+    monkeypatch.setattr(main, "record_audits", lambda records: len(records))
+    audited = []
+
+    def use(fake):
+        def audit_target(row, with_narrative=False):
+            audited.append(row["id"])
+            return fake(row)
+        monkeypatch.setattr(main, "audit_target", audit_target)
+        return audited
+    return use
+
+
+def _leads(tmp_path, rows):
+    path = tmp_path / "leads.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    return str(path)
+
+
+def _ok(row):
+    return {"key": main.row_key(row), "input": row, "score": 80, "errors": {}}
+
+
+def test_numeric_ids_are_checkpointed_and_skipped(tmp_path, offline):
+    audited = offline(_ok)
+    leads = _leads(tmp_path, [{"id": 1, "name": "Acme"}, {"id": 2, "name": "Globex"}])
+    out, ckpt = str(tmp_path / "out.jsonl"), str(tmp_path / "out.ckpt")
+
+    assert main.run_batch(leads, out, ckpt) == 2
+    assert main.load_checkpoint(ckpt) == {"1", "2"}
+    assert main.run_batch(leads, out, ckpt) == 0
+    assert audited == ["1", "2"]
+
+
+def test_failed_rows_are_retried_on_resume(tmp_path, offline):
+    attempts = {}
+
+    def flaky(row):
+        attempts[row["id"]] = attempts.get(row["id"], 0) + 1
+        if row["id"] == "b" and attempts["b"] == 1:
+            return {"key": main.row_key(row), "input": row, "errors": {"url": "Serper HTTP 429"}}
+        if row["id"] == "c" and attempts["c"] == 1:
+            raise RuntimeError("worker crashed")
+        return _ok(row)
+
+    audited = offline(flaky)
+    leads = _leads(tmp_path, [{"id": "a", "name": "A"}, {"id": "b", "name": "B"}, {"id": "c", "name": "C"}])
+    out, ckpt = str(tmp_path / "out.jsonl"), str(tmp_path / "out.ckpt")
+
+    main.run_batch(leads, out, ckpt)
+    assert main.load_checkpoint(ckpt) == {"a"}
+    main.run_batch(leads, out, ckpt)
+    assert main.load_checkpoint(ckpt) == {"a", "b", "c"}
+    assert sorted(audited) == ["a", "b", "b", "c", "c"]
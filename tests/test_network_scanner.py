@@ -0,0 +1,18 @@
+import pytest
+
+from network_scanner import extract_hostname
+
+
+@pytest.mark.parametrize("target, host", [
+    ("https://www.example.com/path", "www.example.com"),
+    ("example.com", "example.com"),
+    ("example.com/about", "example.com"),
+    ("10.0.0.1", "10.0.0.1"),
+    ("::1", "::1"),
+    ("2001:db8::1", "2001:db8::1"),
+    ("[::1]:443", "::1"),
+    ("[2001:db8::1]", "2001:db8::1"),
+    ("https://[2001:db8::1]:8443/", "2001:db8::1"),
+])
+def test_extract_hostname(target, host):
+    assert extract_hostname(target) == host
@@ -0,0 +1,31 @@
+import threading
+
+import orchestrator
+
+
+def _stages(seen):
+    page_started, serp_done = threading.Event(), threading.Event()
+
+    def serp(ctx):
+        page_started.wait(2)  # A slow search: only finishes early if the page stage got going
+        serp_done.set()
+        return "serp"
+
+    def page(ctx):
+        page_started.set()
+        seen["serp_done_before_page"] = serp_done.is_set()
+        return "page"
+
+    return [
+        ("serp", [], serp),
+        ("url", ["serp"], orchestrator._stage_url),
+        ("page", ["url"], page),
+    ]
+
+
+def test_supplied_url_does_not_wait_for_search():
+    seen = {}
+    result = orchestrator.run_audit("Acme", "", url="https://acme.test", stages=_stages(seen))
+    assert result.ok
+    assert seen["serp_done_before_page"] is False
+    assert result.url == "https://acme.test"
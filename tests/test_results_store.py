@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from results_store import ResultStore, audit_row
+
+
+def _snapshot(url, ssl=True, description="Plumbing", ports=None, at=0.0):
+    return {
+        "target": {"name": url.split("//")[1], "url": url, "location": "Makati"},
+        "audit": {"ssl": ssl, "seo": {"description": description}, "ports": ports or {}},
+        "audited_at": at,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "audits"))
+
+
+def test_append_writes_one_part_per_call(store):
+    assert store.append([audit_row(_snapshot("https://a.example", at=1.0)),
+                         audit_row(_snapshot("https://b.example", at=1.0))]) == 2
+    assert store.append([]) == 0
+    assert len(store.parts()) == 1
+    assert len(store.history()) == 2
+
+
+def test_load_keeps_the_latest_audit_per_target(store):
+    store.append([audit_row(_snapshot("https://a.example", ssl=False, at=1.0))])
+    store.append([audit_row(_snapshot("https://a.example", ssl=True, at=2.0))])
+    store.append([audit_row(_snapshot("https://b.example", ports={"21": "Open (Risk)"}, at=1.0))])
+
+    df = store.load()
+    assert len(store.history()) == 3
+    assert df.set_index("url")["score"].to_dict() == {"https://a.example": 100, "https://b.example": 80}
+    assert df.iloc[0]["url"] == "https://b.example"  # Worst score first
+    assert df.iloc[0]["issues"] == "open_ports"
+
+
+def test_load_rescores_with_the_given_rules(store):
+    store.append([audit_row(_snapshot("https://a.example", description="", at=1.0))])
+    assert store.load()["score"].tolist() == [85]
+    assert store.load(rules=[])["score"].tolist() == [100]
+
+
+def test_compact_merges_parts_without_dropping_rows(store):
+    for i in range(3):
+        store.append([audit_row(_snapshot(f"https://{i}.example", at=float(i)))])
+    assert store.compact() == 3
+    assert len(store.parts()) == 1
+    assert sorted(store.history()["url"]) == ["https://0.example", "https://1.example", "https://2.example"]
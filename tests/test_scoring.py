@@ -0,0 +1,41 @@
+import itertools
+
+import pytest
+
+from scoring import RULES, audit_features, score_audit, score_frame, failed_rules
+
+
+def legacy_score(audit):
+    # The hard-coded scorer RULES replaced
+    score = 100
+    if not audit['ssl']: score -= 30
+    if not audit['seo'].get('description'): score -= 15
+    if "Risk" in str(audit['ports']): score -= 20
+    return score
+
+
+def _audits():
+    ports = [{}, {"443": "Open"}, {"21": "Open (Risk)"}, {"22": "Open (Risk)", "3389": "Open (Risk)"}]
+    for ssl, description, port_map in itertools.product([True, False], ["", "A plumber in Makati"], ports):
+        yield {"ssl": ssl, "seo": {"description": description}, "ports": port_map}
+
+
+@pytest.mark.parametrize("audit", list(_audits()))
+def test_rules_match_the_legacy_score(audit):
+    assert score_audit(audit) == legacy_score(audit)
+
+
+def test_score_frame_matches_score_audit():
+    pd = pytest.importorskip("pandas")
+    audits = list(_audits())
+    df = pd.DataFrame([audit_features(a) for a in audits])
+    assert score_frame(df).tolist() == [legacy_score(a) for a in audits]
+
+
+def test_failed_rules_names_each_tripped_rule():
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame([
+        audit_features({"ssl": False, "seo": {}, "ports": {"21": "Open (Risk)"}}),
+        audit_features({"ssl": True, "seo": {"description": "x"}, "ports": {}}),
+    ])
+    assert failed_rules(df).tolist() == [",".join(name for name, _, _ in RULES), ""]
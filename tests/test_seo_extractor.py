@@ -0,0 +1,30 @@
+from seo_extractor import extract_seo
+
+
+def _seo(html, **kwargs):
+    return extract_seo([html.encode("utf-8")], **kwargs)
+
+
+def test_pixel_noscript_in_head_does_not_end_the_head():
+    html = (
+        "<html><head><title>Shop</title>"
+        "<noscript><img height=\"1\" width=\"1\" src=\"https://www.facebook.com/tr?id=1&ev=PageView\"/></noscript>"
+        "<meta name=\"description\" content=\"Fresh bread daily\">"
+        "<link rel=\"canonical\" href=\"https://shop.example/\">"
+        "</head><body><h1>Shop</h1></body></html>"
+    )
+    seo = _seo(html)
+    assert seo["title"] == "Shop"
+    assert seo["description"] == "Fresh bread daily"
+    assert seo["canonical"] == "https://shop.example/"
+    assert seo["h1_count"] == 1
+
+
+def test_body_tag_still_ends_the_head():
+    html = "<html><head><title>A</title><div>x</div><meta name=\"description\" content=\"late\"></head></html>"
+    assert _seo(html)["description"] is None
+
+
+def test_unclosed_noscript_does_not_hide_body():
+    html = "<head><noscript><img src=\"p.gif\"></head><body><meta name=\"description\" content=\"body\"></body>"
+    assert _seo(html, head_only=True)["description"] is None
@@ -0,0 +1,147 @@
+import pytest
+import requests
+
+import serper_client
+from serper_client import (
+    SerperClient, TokenBucket, SerperAuthError, SerperConfigError, SerperNetworkError,
+    SerperRateLimitError, SerperResponseError, SerperServerError, _http_error, BACKOFF_CAP
+)
+
+
+class FakeTime:
+    """Stands in for the time module: sleep() advances monotonic() and is recorded."""
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(serper_client, "time", fake)
+    return fake
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None, text=""):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self._body = body
+        self.headers = headers or {}
+        self.text = text
+
+    def json(self):
+        if self._body is None:
+            raise ValueError("not json")
+        return self._body
+
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def post(self, url, json=None, timeout=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _client(outcomes, max_retries=3):
+    client = SerperClient("key", qps=1e6, burst=1e6, max_retries=max_retries)
+    client.session = FakeSession(outcomes)
+    return client
+
+
+# --- Token bucket ---
+
+def test_token_bucket_allows_burst_then_paces(fake_time):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert fake_time.sleeps == []
+    bucket.acquire()
+    assert fake_time.sleeps == [pytest.approx(0.5)]
+
+
+def test_token_bucket_refills_over_time(fake_time):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    fake_time.now += 10  # Refills to capacity, not beyond
+    bucket.acquire()
+    bucket.acquire()
+    assert fake_time.sleeps == []
+    bucket.acquire()
+    assert fake_time.sleeps == [pytest.approx(1.0)]
+
+
+# --- Backoff ---
+
+def test_backoff_honours_retry_after_up_to_the_cap():
+    client = SerperClient("key")
+    assert client._backoff(0, "3") == 3.0
+    assert client._backoff(0, "9999") == BACKOFF_CAP
+
+
+def test_backoff_is_jittered_and_capped():
+    client = SerperClient("key")
+    for attempt in range(10):
+        delay = client._backoff(attempt, "not-a-number")
+        assert 0 <= delay <= min(BACKOFF_CAP, serper_client.BACKOFF_BASE * 2 ** attempt)
+
+
+# --- Error mapping ---
+
+@pytest.mark.parametrize("status, cls", [
+    (401, SerperAuthError), (403, SerperAuthError), (429, SerperRateLimitError),
+    (500, SerperServerError), (503, SerperServerError), (400, SerperResponseError), (404, SerperResponseError),
+])
+def test_http_error_mapping(status, cls):
+    error = _http_error(FakeResponse(status, text="nope"))
+    assert type(error) is cls
+    assert error.status_code == status
+
+
+def test_missing_key_is_a_config_error():
+    with pytest.raises(SerperConfigError):
+        SerperClient("")
+
+
+# --- Retries ---
+
+def test_retries_rate_limits_and_server_errors(fake_time):
+    client = _client([FakeResponse(429, headers={"Retry-After": "2"}), FakeResponse(502), FakeResponse(200, {"organic": []})])
+    assert client.query("search", "acme") == {"organic": []}
+    assert client.session.calls == 3
+    assert fake_time.sleeps[0] == 2.0
+
+
+def test_auth_errors_are_not_retried(fake_time):
+    client = _client([FakeResponse(401)])
+    with pytest.raises(SerperAuthError):
+        client.query("search", "acme")
+    assert client.session.calls == 1
+
+
+def test_network_errors_surface_after_the_last_retry(fake_time):
+    client = _client([requests.ConnectionError("down")] * 3, max_retries=2)
+    with pytest.raises(SerperNetworkError):
+        client.query("search", "acme")
+    assert client.session.calls == 3
+    assert len(fake_time.sleeps) == 2
+
+
+def test_non_json_body_is_a_response_error(fake_time):
+    client = _client([FakeResponse(200, body=None)])
+    with pytest.raises(SerperResponseError):
+        client.query("search", "acme")
@@ -0,0 +1,28 @@
+import pytest
+
+import analyzer
+import tls_probe
+
+
+@pytest.mark.parametrize("url, port", [
+    ("https://example.test", 443),
+    ("https://example.test:8443/path", 8443),
+    ("example.test:8443", 8443),
+    ("http://example.test:8080", 443),
+    ("https://[2001:db8::1]:8443/", 8443),
+    ("2001:db8::1", 443),
+])
+def test_https_port(url, port):
+    assert tls_probe.https_port(url) == port
+
+
+def test_inspect_ssl_probes_the_urls_port(monkeypatch):
+    calls = []
+
+    def fake_probe(host, port=443, timeout=None, ip=None):
+        calls.append((host, port))
+        return tls_probe._empty_result(host, port)
+
+    monkeypatch.setattr(tls_probe, "probe_tls", fake_probe)
+    analyzer.inspect_ssl("https://example.test:8443/")
+    assert calls == [("example.test", 8443)]
@@ -0,0 +1,194 @@
+"""
+Module: tls_probe.py
+Description: Handshake-only TLS probe with certificate intelligence (no page download)
+"""
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import metrics
+from cache import LRUCache, MISS
+from network_scanner import extract_hostname
+
+DEFAULT_TIMEOUT = 5
+EXPIRY_WARNING_DAYS = 30
+LEGACY_PROTOCOLS = {"SSLv3", "TLSv1", "TLSv1.1"}
+
+# TLS sessions per (host, port): repeat probes resume instead of a full handshake.
+# Bounded, and expired well before servers typically drop their session state.
+_sessions = LRUCache(max_entries=2048, ttl=3600)
+_context = None   # Built on first probe: loading the CA store takes tens of ms
+_context_lock = threading.Lock()
+
+def _default_context():
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                _context = ssl.create_default_context()
+    return _context
+
+# --- 1. CERTIFICATE HELPERS ---
+
+def _name_field(name_tuples, field):
+    # getpeercert() returns ((("commonName", "x"),), (("organizationName", "y"),), ...)
+    for rdn in name_tuples or ():
+        for key, value in rdn:
+            if key == field:
+                return value
+    return None
+
+def _hostname_matches(hostname, patterns):
+    hostname = hostname.lower().rstrip(".")
+    for pattern in patterns:
+        pattern = pattern.lower().rstrip(".")
+        if pattern == hostname:
+            return True
+        # "*.example.com" covers exactly one extra label
+        if pattern.startswith("*.") and hostname.count(".") == pattern.count(".") and hostname.endswith(pattern[1:]):
+            return True
+    return False
+
+def parse_hsts(headers):
+    """Reads Strict-Transport-Security from a case-insensitive header mapping (PageResponse.headers)."""
+    value = (headers or {}).get("Strict-Transport-Security")
+    if not value:
+        return {"enabled": False, "max_age": None, "include_subdomains": False, "preload": False}
+    max_age = None
+    for part in value.split(";"):
+        part = part.strip().lower()
+        if part.startswith("max-age="):
+            try:
+                max_age = int(part.split("=", 1)[1].strip('"'))
+            except ValueError:
+                pass
+    lowered = value.lower()
+    return {
+        "enabled": bool(max_age), "max_age": max_age,
+        "include_subdomains": "includesubdomains" in lowered, "preload": "preload" in lowered
+    }
+
+# --- 2. PROBE ---
+
+def _empty_result(host, port):
+    return {
+        "host": host, "port": port, "valid": False, "error": None,
+        "expires": None, "days_remaining": None, "issuer": None, "subject": None,
+        "san": [], "hostname_match": None, "protocol": None, "cipher": None, "cipher_bits": None,
+        "session_reused": False, "handshake_ms": None
+    }
+
+def _handshake(host, port, timeout, context, ip=None, session=None):
+    raw = socket.create_connection((ip or host, port), timeout=timeout)
+    try:
+        return context.wrap_socket(raw, server_hostname=host, session=session)
+    except Exception:
+        raw.close()
+        raise
+
+def probe_tls(host, port=443, timeout=DEFAULT_TIMEOUT, ip=None):
+    """
+    TLS handshake only (no HTTP request). Pass `ip` to skip DNS when the
+    address is already known. Never raises: failures land in result["error"].
+    """
+    with metrics.span("tls_handshake"):
+        return _probe(host, port, timeout, ip)
+
+def https_port(url):
+    """The port a target URL serves TLS on: its explicit https:// port, else 443."""
+    try:
+        parsed = urlparse(url if "//" in (url or "") else f"https://{url}")
+        return parsed.port if parsed.scheme == "https" and parsed.port else 443
+    except ValueError:
+        return 443  # Bare IPv6 literal or a malformed port
+
+def probe_url(url, timeout=DEFAULT_TIMEOUT, ip=None):
+    """probe_tls() for a target URL: its hostname on its https port."""
+    return probe_tls(extract_hostname(url), https_port(url), timeout, ip)
+
+def _probe(host, port, timeout, ip):
+    result = _empty_result(host, port)
+    key = (host, port)
+    session = _sessions.get(key)
+    session = None if session is MISS else session
+
+    start = time.perf_counter()
+    try:
+        try:
+            sock = _handshake(host, port, timeout, _default_context(), ip, session)
+        except ssl.SSLError:
+            if session is None: raise
+            # A stale session can fail the resume; retry with a full handshake
+            sock = _handshake(host, port, timeout, _default_context(), ip)
+        with sock:
+            result["handshake_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            cert = sock.getpeercert()
+            result["valid"] = True
+            result["protocol"] = sock.version()
+            name, _, bits = sock.cipher()
+            result["cipher"], result["cipher_bits"] = name, bits
+            result["session_reused"] = sock.session_reused
+            _sessions.set(key, sock.session)
+
+        expires = ssl.cert_time_to_seconds(cert["notAfter"])
+        result["expires"] = time.strftime("%Y-%m-%d", time.gmtime(expires))
+        result["days_remaining"] = int((expires - time.time()) // 86400)
+        result["issuer"] = _name_field(cert.get("issuer"), "organizationName") or _name_field(cert.get("issuer"), "commonName")
+        result["subject"] = _name_field(cert.get("subject"), "commonName")
+        result["san"] = [v for k, v in cert.get("subjectAltName", ()) if k == "DNS"]
+        result["hostname_match"] = _hostname_matches(host, result["san"] or [result["subject"] or ""])
+
+    except ssl.SSLCertVerificationError as e:
+        result["error"] = e.verify_message or str(e)
+        result["hostname_match"] = False if "hostname" in (e.verify_message or "").lower() else None
+        metrics.count_error("tls_handshake", e.__class__.__name__)
+        _probe_unverified(result, host, port, timeout, ip)
+    except (ssl.SSLError, OSError) as e:
+        result["error"] = str(e) or e.__class__.__name__
+        metrics.count_error("tls_handshake", e.__class__.__name__)
+    return result
+
+def _probe_unverified(result, host, port, timeout, ip):
+    # Bad certificate: still record what the server negotiates
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    try:
+        with _handshake(host, port, timeout, context, ip) as sock:
+            result["protocol"] = sock.version()
+            name, _, bits = sock.cipher()
+            result["cipher"], result["cipher_bits"] = name, bits
+    except Exception:
+        pass
+
+def probe_many(hosts, port=443, timeout=DEFAULT_TIMEOUT, max_workers=32):
+    """Probes many hosts concurrently. Returns {host: result}."""
+    hosts = list(dict.fromkeys(hosts))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(hosts)))) as pool:
+        return dict(zip(hosts, pool.map(lambda h: probe_tls(h, port, timeout), hosts)))
+
+# --- 3. FINDINGS ---
+
+def tls_findings(result, hsts=None):
+    """Turns a probe result (+ HSTS info) into report-ready sentences."""
+    findings = []
+    if not result["valid"]:
+        findings.append(f"Certificate invalid: {result['error'] or 'handshake failed'}")
+    days = result["days_remaining"]
+    if days is not None:
+        if days < 0:
+            findings.append(f"Certificate expired {-days} days ago")
+        elif days <= EXPIRY_WARNING_DAYS:
+            findings.append(f"Certificate expires in {days} days ({result['expires']})")
+    if result["hostname_match"] is False:
+        findings.append("Certificate does not cover this hostname")
+    if result["protocol"] in LEGACY_PROTOCOLS:
+        findings.append(f"Legacy protocol negotiated: {result['protocol']}")
+    if result["cipher_bits"] is not None and result["cipher_bits"] < 128:
+        findings.append(f"Weak cipher: {result['cipher']} ({result['cipher_bits']} bits)")
+    if hsts is not None and not hsts["enabled"]:
+        findings.append("No HSTS header (browsers may connect over plain HTTP first)")
+    return findings
@@ -0,0 +1,123 @@
+"""
+Project: B2B Threat & Opportunity Intelligence Tool
+Description: Audit worker pool. Pulls jobs from the SQLite queue (jobs.py) and runs the full pipeline.
+
+Usage:
+    python worker.py --workers 4          # one process per worker; run it on as many hosts as share RECON_JOBS_DB
+    python worker.py --workers 8 --drain  # exit once the queue is empty (batch mode)
+Ctrl+C / SIGTERM stops taking new jobs and lets running audits finish.
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import uuid
+
+HEARTBEAT_SECONDS = 10
+
+# Stage values that are plain JSON and worth showing while the audit runs
+PARTIAL_STAGES = {"url", "industry", "socials", "ssl", "seo", "tech", "ports", "dns", "site", "competitors"}
+
+# --- 1. ONE JOB ---
+
+def _heartbeat(queue, job_id, worker_id, done):
+    # Long stages (port scans, Gemini) must not look like a dead worker
+    while not done.wait(HEARTBEAT_SECONDS):
+        queue.heartbeat(job_id)
+        queue.worker_seen(worker_id)
+
+def run_job(queue, job, worker_id):
+    from orchestrator import run_audit, store_audit
+
+    def on_stage(stage, value, error):
+        if error is not None:
+            queue.record_stage(job["id"], stage, error=str(error) or error.__class__.__name__)
+        elif stage in PARTIAL_STAGES:
+            queue.record_stage(job["id"], stage, value)
+        else:
+            queue.heartbeat(job["id"])
+
+    done = threading.Event()
+    threading.Thread(target=_heartbeat, args=(queue, job["id"], worker_id, done), daemon=True).start()
+    try:
+        result = run_audit(job["name"], job["location"], url=job["url"], on_stage=on_stage)
+        if not result.ok:
+            queue.fail(job["id"], result.errors["url"])
+        else:
+            # Also lands in the shared audit cache, so repeat scans skip the queue
+            queue.complete(job["id"], store_audit(result))
+        print(f"[{worker_id}] {job['name'] or job['url'] or job['id']} -> {'done' if result.ok else 'failed'} in {result.elapsed:.1f}s")
+    except Exception as e:
+        queue.fail(job["id"], f"pipeline: {e}")
+        print(f"[{worker_id}] {job['name'] or job['url'] or job['id']} -> crashed: {e}")
+    finally:
+        done.set()
+
+# --- 2. WORKER PROCESS ---
+
+def work_loop(worker_id, stop, poll_interval=1.0, drain=False):
+    # Ctrl+C goes to the whole process group; only the parent reacts to it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from jobs import JobQueue
+    queue = JobQueue()
+    print(f"[+] Worker {worker_id} started (pid {os.getpid()})")
+    try:
+        while not stop.is_set():
+            queue.worker_seen(worker_id)
+            queue.requeue_stale()
+            job = queue.claim(worker_id)
+            if job is None:
+                if drain:
+                    break
+                stop.wait(poll_interval)
+                continue
+            run_job(queue, job, worker_id)
+    finally:
+        queue.worker_gone(worker_id)
+
+def run_pool(workers=None, poll_interval=1.0, drain=False):
+    """Starts `workers` processes (default: CPU count) and waits for them."""
+    workers = workers or os.cpu_count() or 1
+    stop = multiprocessing.Event()
+    prefix = f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+    procs = [
+        multiprocessing.Process(target=work_loop, args=(f"{prefix}-{i}", stop, poll_interval, drain), daemon=False)
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    def shutdown(*_):
+        if not stop.is_set():
+            print("\n[!] Stopping - running audits will finish first.")
+            stop.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        shutdown()
+        for p in procs:
+            p.join()
+    return 0
+
+# --- 3. CLI ---
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Audit worker pool for the SQLite job queue.")
+    parser.add_argument("-w", "--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between queue polls when idle")
+    parser.add_argument("--drain", action="store_true", help="Exit when the queue is empty")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    return run_pool(args.workers, args.poll, args.drain)
+
+if __name__ == "__main__":
+    sys.exit(main())